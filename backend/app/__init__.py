@@ -1,3 +1,11 @@
-from .main import create_app, app
-
 __all__ = ["create_app", "app"]
+
+
+def __getattr__(name: str):
+    # Importing a submodule such as ``app.db`` should not pull in FastAPI and
+    # every router through ``app.main``.
+    if name in __all__:
+        from app import main
+
+        return getattr(main, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,194 @@
+import asyncio
+import math
+import os
+import threading
+import time
+from collections import deque
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+
+from app.metrics import metrics
+
+
+class AdmissionRejected(Exception):
+    """The request could not be admitted; the client should retry later."""
+
+    def __init__(self, message: str, retry_after: float) -> None:
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class AdmissionSuperseded(Exception):
+    """A newer request for the same user and board replaced this queued one."""
+
+
+@dataclass(eq=False)
+class _Waiter:
+    user_id: int
+    key: str
+    loop: asyncio.AbstractEventLoop
+    future: asyncio.Future
+    enqueued_at: float = field(default_factory=time.monotonic)
+    admitted: bool = False
+    error: BaseException | None = None
+
+
+class AdmissionController:
+    """Bounds concurrent AI calls globally and per user.
+
+    Requests that cannot start immediately wait in a bounded FIFO queue;
+    the oldest waiter whose user is under the per-user limit goes first. A
+    new request from the same user for the same board evicts any queued
+    (not yet running) one, since only the newest state matters.
+
+    Waiting happens on the event loop: each queued request awaits a future
+    that a releasing request resolves, so a queue of any length holds no
+    threads. Waiters may sit on different loops (background jobs run their
+    own), so futures are always resolved through ``call_soon_threadsafe``
+    and the bookkeeping is guarded by a plain lock that is never held
+    across an await.
+    """
+
+    def __init__(
+        self,
+        max_in_flight: int = 16,
+        max_per_user: int = 2,
+        max_queue: int = 64,
+        queue_timeout: float = 30.0,
+    ) -> None:
+        self.max_in_flight = max_in_flight
+        self.max_per_user = max_per_user
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self._lock = threading.Lock()
+        self._queue: deque[_Waiter] = deque()
+        self._in_flight = 0
+        self._per_user: dict[int, int] = {}
+        # Moving average of how long an admitted call runs, for Retry-After.
+        self._avg_run_seconds = 5.0
+
+    @classmethod
+    def from_env(cls) -> "AdmissionController":
+        return cls(
+            max_in_flight=int(os.getenv("PM_AI_MAX_IN_FLIGHT", "16")),
+            max_per_user=int(os.getenv("PM_AI_MAX_PER_USER", "2")),
+            max_queue=int(os.getenv("PM_AI_MAX_QUEUE", "64")),
+            queue_timeout=float(os.getenv("PM_AI_QUEUE_TIMEOUT_SECONDS", "30")),
+        )
+
+    @property
+    def queue_depth(self) -> int:
+        return len(self._queue)
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    def _retry_after(self) -> float:
+        waves = (len(self._queue) + 1) / max(self.max_in_flight, 1)
+        return max(1.0, math.ceil(waves * self._avg_run_seconds))
+
+    def _can_start(self, user_id: int) -> bool:
+        return self._in_flight < self.max_in_flight and self._per_user.get(user_id, 0) < self.max_per_user
+
+    def _take_slot(self, user_id: int) -> None:
+        self._in_flight += 1
+        self._per_user[user_id] = self._per_user.get(user_id, 0) + 1
+
+    def _give_back_slot(self, user_id: int) -> None:
+        self._in_flight -= 1
+        self._per_user[user_id] -= 1
+        if not self._per_user[user_id]:
+            del self._per_user[user_id]
+
+    def _settle(self, waiter: _Waiter, error: BaseException | None = None) -> bool:
+        waiter.error = error
+
+        def resolve() -> None:
+            if waiter.future.done():
+                return
+            if error is None:
+                waiter.future.set_result(None)
+            else:
+                waiter.future.set_exception(error)
+
+        try:
+            waiter.loop.call_soon_threadsafe(resolve)
+        except RuntimeError:
+            # The waiter's loop has shut down; nobody is left to run.
+            return False
+        return True
+
+    def _admit_waiting(self) -> None:
+        """Hand free slots to the oldest eligible waiters. Caller holds the lock."""
+        while self._in_flight < self.max_in_flight:
+            waiter = next((w for w in self._queue if self._can_start(w.user_id)), None)
+            if waiter is None:
+                return
+            self._queue.remove(waiter)
+            if self._settle(waiter):
+                waiter.admitted = True
+                self._take_slot(waiter.user_id)
+
+    async def _acquire(self, user_id: int, key: str) -> None:
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            for queued in [w for w in self._queue if w.user_id == user_id and w.key == key]:
+                self._queue.remove(queued)
+                self._settle(queued, AdmissionSuperseded("Superseded by a newer request for this board"))
+                metrics.inc("ai_superseded_total")
+            if not self._queue and self._can_start(user_id):
+                self._take_slot(user_id)
+                metrics.observe("ai_queue_wait_seconds", 0.0)
+                return
+            if len(self._queue) >= self.max_queue:
+                metrics.inc("ai_rejected_total")
+                raise AdmissionRejected("AI request queue is full", self._retry_after())
+            waiter = _Waiter(user_id=user_id, key=key, loop=loop, future=loop.create_future())
+            self._queue.append(waiter)
+            # Everyone ahead may be at their per-user limit, leaving a slot
+            # this waiter can take straight away.
+            self._admit_waiting()
+
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter.future), self.queue_timeout)
+        except (TimeoutError, asyncio.CancelledError) as exc:
+            with self._lock:
+                if waiter.admitted:
+                    if isinstance(exc, TimeoutError):
+                        # Admitted just as the timer fired: take the slot.
+                        metrics.observe("ai_queue_wait_seconds", time.monotonic() - waiter.enqueued_at)
+                        return
+                    self._give_back_slot(user_id)
+                    self._admit_waiting()
+                elif waiter in self._queue:
+                    self._queue.remove(waiter)
+                    self._admit_waiting()
+            if isinstance(exc, TimeoutError):
+                if waiter.error is not None:
+                    raise waiter.error from None
+                metrics.inc("ai_queue_timeouts_total")
+                raise AdmissionRejected("Timed out waiting for an AI slot", self._retry_after()) from None
+            raise
+        metrics.observe("ai_queue_wait_seconds", time.monotonic() - waiter.enqueued_at)
+
+    def _release(self, user_id: int, run_seconds: float) -> None:
+        with self._lock:
+            self._give_back_slot(user_id)
+            self._avg_run_seconds = 0.8 * self._avg_run_seconds + 0.2 * run_seconds
+            self._admit_waiting()
+
+    @asynccontextmanager
+    async def admit(self, user_id: int, key: str) -> AsyncIterator[None]:
+        await self._acquire(user_id, key)
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            self._release(user_id, time.monotonic() - started)
+
+
+admission = AdmissionController.from_env()
+metrics.register("ai_queue_depth", lambda: admission.queue_depth)
+metrics.register("ai_in_flight", lambda: admission.in_flight)
@@ -1,9 +1,25 @@
+from __future__ import annotations
+
 import os
+import random
+import threading
+import time
+from collections import deque
+from collections.abc import Callable
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from email.utils import parsedate_to_datetime
+from typing import TYPE_CHECKING
+
+from app.metrics import metrics
 
-import httpx
+if TYPE_CHECKING:
+    # httpx takes ~100 ms to import; it is loaded on the first AI request.
+    import httpx
 
 MODEL_NAME = "openai/gpt-oss-120b"
-OPENROUTER_CHAT_URL = "https://openrouter.ai/api/v1/chat/completions"
+OPENROUTER_BASE_URL = "https://openrouter.ai/api/v1"
+
+RETRYABLE_STATUS_CODES = {408, 425, 429, 500, 502, 503, 504}
 
 
 class OpenRouterConfigurationError(Exception):
@@ -18,7 +34,226 @@ class OpenRouterTimeoutError(Exception):
     pass
 
 
+class OpenRouterUnavailableError(OpenRouterRequestError):
+    """Raised without calling upstream while the circuit breaker is open."""
+
+    def __init__(self, message: str, retry_after: float) -> None:
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+def _env_float(name: str, default: float) -> float:
+    return float(os.getenv(name, str(default)))
+
+
+def _env_int(name: str, default: int) -> int:
+    return int(os.getenv(name, str(default)))
+
+
+# ── Circuit breaker ──────────────────────────────────────────────────────
+
+
+class CircuitBreaker:
+    """Fails fast once the recent upstream error rate crosses a threshold.
+
+    Outcomes of the last ``window`` attempts are tracked. When at least
+    ``min_requests`` of them exist and the failure ratio reaches
+    ``failure_ratio`` the breaker opens for ``cooldown`` seconds, then lets a
+    single probe through (half-open) whose outcome closes or re-opens it.
+    """
+
+    def __init__(
+        self,
+        failure_ratio: float = 0.5,
+        window: int = 20,
+        min_requests: int = 5,
+        cooldown: float = 30.0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.failure_ratio = failure_ratio
+        self.min_requests = min_requests
+        self.cooldown = cooldown
+        self._clock = clock
+        self._outcomes: deque[bool] = deque(maxlen=window)
+        self._lock = threading.Lock()
+        self._opened_at: float | None = None
+        self._probe_in_flight = False
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._state()
+
+    def _state(self) -> str:
+        if self._opened_at is None:
+            return "closed"
+        if self._clock() - self._opened_at >= self.cooldown:
+            return "half_open"
+        return "open"
+
+    def allow(self) -> bool:
+        with self._lock:
+            state = self._state()
+            if state == "closed":
+                return True
+            if state == "half_open" and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return True
+            return False
+
+    def retry_after(self) -> float:
+        with self._lock:
+            if self._opened_at is None:
+                return 0.0
+            return max(0.0, self.cooldown - (self._clock() - self._opened_at))
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._outcomes.append(True)
+            if self._opened_at is not None:
+                self._opened_at = None
+                self._probe_in_flight = False
+                self._outcomes.clear()
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._outcomes.append(False)
+            if self._opened_at is not None:
+                if self._probe_in_flight:
+                    # A failed half-open probe starts a new cooldown.
+                    self._opened_at = self._clock()
+                    self._probe_in_flight = False
+                    metrics.inc("openrouter_circuit_opened_total")
+                return
+            failures = self._outcomes.count(False)
+            if (
+                len(self._outcomes) >= self.min_requests
+                and failures / len(self._outcomes) >= self.failure_ratio
+            ):
+                self._opened_at = self._clock()
+                metrics.inc("openrouter_circuit_opened_total")
+
+
+circuit_breaker = CircuitBreaker(
+    failure_ratio=_env_float("OPENROUTER_BREAKER_FAILURE_RATIO", 0.5),
+    window=_env_int("OPENROUTER_BREAKER_WINDOW", 20),
+    min_requests=_env_int("OPENROUTER_BREAKER_MIN_REQUESTS", 5),
+    cooldown=_env_float("OPENROUTER_BREAKER_COOLDOWN_SECONDS", 30.0),
+)
+metrics.register("openrouter_circuit_state", lambda: circuit_breaker.state)
+
+
+# ── HTTP transport ───────────────────────────────────────────────────────
+
+_transport: httpx.BaseTransport | None = None
+_client: httpx.Client | None = None
+_client_lock = threading.Lock()
+_hedge_pool = ThreadPoolExecutor(max_workers=8, thread_name_prefix="openrouter-hedge")
+
+
+def set_transport(transport: httpx.BaseTransport | None) -> None:
+    """Route OpenRouter traffic through ``transport`` (e.g. a fake in tests)."""
+    global _transport, _client
+    with _client_lock:
+        if _client is not None:
+            _client.close()
+        _transport = transport
+        _client = None
+
+
+def _get_client() -> httpx.Client:
+    import httpx
+
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = httpx.Client(
+                transport=_transport,
+                timeout=httpx.Timeout(
+                    _env_float("OPENROUTER_READ_TIMEOUT_SECONDS", 20.0),
+                    connect=_env_float("OPENROUTER_CONNECT_TIMEOUT_SECONDS", 5.0),
+                ),
+            )
+        return _client
+
+
+def _chat_url() -> str:
+    """Chat completions URL; OPENROUTER_BASE_URL can point at a local simulator."""
+    base_url = os.getenv("OPENROUTER_BASE_URL") or OPENROUTER_BASE_URL
+    return f"{base_url.rstrip('/')}/chat/completions"
+
+
+def _post(headers: dict, payload: dict) -> httpx.Response:
+    return _get_client().post(_chat_url(), headers=headers, json=payload)
+
+
+def _send(headers: dict, payload: dict) -> httpx.Response:
+    """Send once, or hedge with a second request if the first is slow.
+
+    The losing request is left to finish in the background; its result is
+    discarded.
+    """
+    import httpx
+
+    hedge_after = _env_float("OPENROUTER_HEDGE_AFTER_SECONDS", 0.0)
+    if hedge_after <= 0:
+        return _post(headers, payload)
+
+    primary = _hedge_pool.submit(_post, headers, payload)
+    done, _ = wait([primary], timeout=hedge_after)
+    if done:
+        return primary.result()
+
+    metrics.inc("openrouter_hedged_requests_total")
+    pending = {primary, _hedge_pool.submit(_post, headers, payload)}
+    fallback: httpx.Response | None = None
+    error: BaseException | None = None
+    while pending:
+        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            try:
+                response = future.result()
+            except httpx.HTTPError as exc:
+                error = exc
+                continue
+            if response.status_code < 500:
+                return response
+            fallback = response
+    if fallback is not None:
+        return fallback
+    assert error is not None
+    raise error
+
+
+def _retry_after_seconds(response: httpx.Response) -> float | None:
+    value = response.headers.get("retry-after")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def _backoff_delay(attempt: int, retry_after: float | None) -> float:
+    base = _env_float("OPENROUTER_BACKOFF_BASE_SECONDS", 0.5)
+    cap = _env_float("OPENROUTER_BACKOFF_MAX_SECONDS", 8.0)
+    delay = random.uniform(0, min(cap, base * 2**attempt))
+    if retry_after is not None:
+        delay = max(delay, retry_after)
+    return delay
+
+
+# ── Public API ───────────────────────────────────────────────────────────
+
+
 def query_openrouter(prompt: str) -> str:
+    import httpx
+
     api_key = os.getenv("OPENROUTER_API_KEY")
     if not api_key:
         raise OpenRouterConfigurationError("OPENROUTER_API_KEY is not configured")
@@ -45,23 +280,61 @@ def query_openrouter(prompt: str) -> str:
         ],
     }
 
-    try:
-        response = httpx.post(
-            OPENROUTER_CHAT_URL,
-            headers=headers,
-            json=payload,
-            timeout=20.0,
-        )
-    except httpx.TimeoutException as exc:
-        raise OpenRouterTimeoutError("OpenRouter request timed out") from exc
-    except httpx.HTTPError as exc:
-        raise OpenRouterRequestError(str(exc)) from exc
-
-    if response.status_code >= 400:
-        raise OpenRouterRequestError(
-            f"OpenRouter returned status {response.status_code}: {response.text}"
-        )
+    max_retries = _env_int("OPENROUTER_MAX_RETRIES", 2)
+    max_retry_after = _env_float("OPENROUTER_MAX_RETRY_AFTER_SECONDS", 10.0)
+
+    for attempt in range(max_retries + 1):
+        if not circuit_breaker.allow():
+            metrics.inc("openrouter_short_circuited_total")
+            raise OpenRouterUnavailableError(
+                "OpenRouter is temporarily unavailable", circuit_breaker.retry_after()
+            )
+
+        retry_after = None
+        cause: Exception | None = None
+        started = time.perf_counter()
+        metrics.inc("openrouter_requests_total")
+        try:
+            response = _send(headers, payload)
+        except httpx.TimeoutException as exc:
+            error: Exception = OpenRouterTimeoutError("OpenRouter request timed out")
+            cause = exc
+        except httpx.HTTPError as exc:
+            error = OpenRouterRequestError(str(exc))
+            cause = exc
+        except BaseException:
+            # Anything else (a broken transport, the hedge pool shutting
+            # down) must still settle a half-open probe, or the breaker
+            # would stay half-open with its one probe slot taken for good.
+            circuit_breaker.record_failure()
+            metrics.inc("openrouter_failures_total")
+            raise
+        else:
+            metrics.observe("openrouter_request_seconds", time.perf_counter() - started)
+            if response.status_code < 400:
+                circuit_breaker.record_success()
+                return _parse_content(response)
+
+            error = OpenRouterRequestError(
+                f"OpenRouter returned status {response.status_code}: {response.text}"
+            )
+            if response.status_code not in RETRYABLE_STATUS_CODES:
+                # The request itself is bad; upstream is healthy.
+                circuit_breaker.record_success()
+                raise error
+            retry_after = _retry_after_seconds(response)
+
+        circuit_breaker.record_failure()
+        metrics.inc("openrouter_failures_total")
+        if attempt == max_retries or (retry_after is not None and retry_after > max_retry_after):
+            raise error from cause
+        metrics.inc("openrouter_retries_total")
+        time.sleep(_backoff_delay(attempt, retry_after))
+
+    raise AssertionError("unreachable")
+
 
+def _parse_content(response: httpx.Response) -> str:
     data = response.json()
     choices = data.get("choices") or []
     if not choices:
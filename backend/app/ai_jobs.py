@@ -0,0 +1,134 @@
+import asyncio
+import inspect
+import logging
+import os
+import socket
+import threading
+import uuid
+from collections.abc import Awaitable, Callable
+
+from app.db import (
+    claim_next_ai_job,
+    count_pending_ai_jobs,
+    finish_ai_job,
+    renew_ai_job_leases,
+    requeue_running_ai_jobs,
+)
+from app.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+FINISHED_STATUSES = {"succeeded", "failed", "cancelled"}
+
+
+def _lease_seconds() -> float:
+    return float(os.getenv("PM_AI_JOB_LEASE_SECONDS", "30"))
+
+
+class JobCancelled(Exception):
+    """Raised by a job handler that noticed its job was cancelled."""
+
+
+class AIJobWorker:
+    """Runs queued AI jobs from the ``ai_jobs`` table on background threads.
+
+    The table is the queue, so jobs outlive the process. A claimed job is
+    leased to this worker, and a heartbeat thread renews the lease every
+    third of ``PM_AI_JOB_LEASE_SECONDS``. A running job whose lease has
+    lapsed lost its worker, so it is queued again: at startup, and on every
+    heartbeat of any process sharing the database. Jobs that other live
+    processes are running are left alone.
+    ``handler`` receives the claimed job and returns its result; an exception
+    with ``status_code``/``detail`` attributes (such as ``HTTPException``)
+    fails the job with that status. A coroutine handler is run to completion
+    on an event loop private to the worker thread.
+    """
+
+    def __init__(
+        self, handler: Callable[[dict], dict | Awaitable[dict]], poll_interval: float = 1.0
+    ) -> None:
+        self.handler = handler
+        self.workers = int(os.getenv("PM_AI_JOB_WORKERS", "2"))
+        self.poll_interval = poll_interval
+        self.lease_seconds = _lease_seconds()
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+        self._threads: list[threading.Thread] = []
+
+    async def start(self) -> None:
+        requeued = await asyncio.to_thread(requeue_running_ai_jobs)
+        if requeued:
+            logger.info("Requeued %d interrupted AI jobs", requeued)
+        self._stopping.clear()
+        if not self.workers:
+            return
+        for index in range(self.workers):
+            thread = threading.Thread(target=self._run, name=f"ai-job-{index}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        heartbeat = threading.Thread(target=self._heartbeat, name="ai-job-heartbeat", daemon=True)
+        heartbeat.start()
+        self._threads.append(heartbeat)
+
+    async def stop(self, timeout: float = 5.0) -> None:
+        self._stopping.set()
+        self._wakeup.set()
+        for thread in self._threads:
+            # A job still talking to OpenRouter stays 'running'; once the
+            # heartbeat stops its lease lapses and it is queued again.
+            await asyncio.to_thread(thread.join, timeout)
+        self._threads = []
+
+    def notify(self) -> None:
+        """Wake idle workers after a job has been queued."""
+        self._wakeup.set()
+
+    def _heartbeat(self) -> None:
+        while not self._stopping.wait(self.lease_seconds / 3):
+            try:
+                renew_ai_job_leases(self.worker_id, self.lease_seconds)
+                if requeue_running_ai_jobs():
+                    self._wakeup.set()
+            except Exception:
+                logger.exception("Could not renew AI job leases")
+
+    def _run(self) -> None:
+        while not self._stopping.is_set():
+            try:
+                job = claim_next_ai_job(self.worker_id, self.lease_seconds)
+            except Exception:
+                logger.exception("Could not claim an AI job")
+                job = None
+            if job is None:
+                self._wakeup.wait(self.poll_interval)
+                self._wakeup.clear()
+                continue
+            self._execute(job)
+
+    def _execute(self, job: dict) -> None:
+        try:
+            result = self.handler(job)
+            if inspect.isawaitable(result):
+                result = asyncio.run(result)
+        except JobCancelled:
+            metrics.inc("ai_jobs_cancelled_total")
+            return
+        except Exception as exc:
+            status_code = getattr(exc, "status_code", 500)
+            detail = getattr(exc, "detail", None) or str(exc) or type(exc).__name__
+            if status_code >= 500 and not hasattr(exc, "detail"):
+                logger.exception("AI job %s crashed", job["id"])
+            finish_ai_job(
+                job["id"], "failed", error=str(detail), status_code=status_code, worker_id=self.worker_id
+            )
+            metrics.inc("ai_jobs_failed_total")
+            return
+
+        if finish_ai_job(job["id"], "succeeded", result=result, status_code=200, worker_id=self.worker_id):
+            metrics.inc("ai_jobs_succeeded_total")
+        else:
+            metrics.inc("ai_jobs_cancelled_total")
+
+
+metrics.register("ai_jobs_pending", count_pending_ai_jobs)
@@ -0,0 +1,96 @@
+import asyncio
+import logging
+import os
+from datetime import datetime, timedelta, timezone
+
+from app.db import (
+    archive_cards,
+    connect,
+    find_archivable_cards,
+    get_db_path,
+    get_shard_count,
+    get_shard_path,
+)
+from app.metrics import metrics
+from app.write_behind import write_buffer
+
+logger = logging.getLogger(__name__)
+
+
+def _archive_after_days() -> float:
+    return float(os.getenv("PM_ARCHIVE_AFTER_DAYS", "0"))
+
+
+def _archive_columns() -> set[str]:
+    titles = os.getenv("PM_ARCHIVE_COLUMNS", "Done")
+    return {title.strip().lower() for title in titles.split(",") if title.strip()}
+
+
+def _batch_size() -> int:
+    return int(os.getenv("PM_ARCHIVE_BATCH_SIZE", "500"))
+
+
+def _cutoff(days: float, now: datetime | None = None) -> str:
+    moment = (now or datetime.now(timezone.utc)) - timedelta(days=days)
+    return moment.strftime("%Y-%m-%dT%H:%M:%S.") + f"{moment.microsecond // 1000:03d}Z"
+
+
+def sweep_once(now: datetime | None = None) -> int:
+    """Archive one batch of cards per database that have sat in an archive
+    column for longer than ``PM_ARCHIVE_AFTER_DAYS``.
+
+    Archive columns are those titled in ``PM_ARCHIVE_COLUMNS`` (default
+    "Done"). Returns the number of cards archived.
+    """
+    days = _archive_after_days()
+    if days <= 0:
+        return 0
+    cutoff = _cutoff(days, now)
+    paths = [get_db_path(), *(get_shard_path(index) for index in range(get_shard_count()))]
+    archived = 0
+    for path in paths:
+        if not path.exists():
+            continue
+        with connect(path) as connection:
+            groups = find_archivable_cards(connection, cutoff, _archive_columns(), _batch_size())
+        for user_id, board_id, card_ids in groups:
+            # A buffered save still holds these cards; write it first so it
+            # cannot put them back afterwards.
+            write_buffer.flush_board(board_id)
+            try:
+                archived += len(archive_cards(board_id, user_id, card_ids))
+            except ValueError:
+                # The board was deleted meanwhile.
+                continue
+    if archived:
+        metrics.inc("cards_archived_total", archived)
+    return archived
+
+
+class ArchiveSweeper:
+    """Runs ``sweep_once`` every ``PM_ARCHIVE_SWEEP_SECONDS`` seconds."""
+
+    def __init__(self) -> None:
+        self.interval = float(os.getenv("PM_ARCHIVE_SWEEP_SECONDS", "3600"))
+        self._task: asyncio.Task | None = None
+
+    async def start(self) -> None:
+        if self.interval > 0 and _archive_after_days() > 0:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                # Keep going in batches while there is a backlog, yielding to
+                # request handlers between them.
+                while await asyncio.to_thread(sweep_once) >= _batch_size():
+                    await asyncio.sleep(0)
+            except Exception:
+                logger.exception("Archive sweep failed")
+            await asyncio.sleep(self.interval)
@@ -0,0 +1,342 @@
+import argparse
+import asyncio
+import gzip
+import json
+import logging
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+from app.db import clear_shard_cache, clear_user_cache, get_db_path, get_shard_count, get_shard_path
+from app.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_PREFIX = "pm-"
+SNAPSHOT_SUFFIXES = (".db", ".db.gz")
+# A sharded snapshot is a directory holding one copy per database file and
+# this manifest, written last.
+MANIFEST_NAME = "manifest.json"
+
+
+def _env_flag(name: str, default: bool) -> bool:
+    value = os.getenv(name)
+    if value is None:
+        return default
+    return value.lower() in {"1", "true", "yes"}
+
+
+def get_backup_dir() -> Path:
+    configured_path = os.getenv("PM_BACKUP_DIR")
+    if configured_path:
+        return Path(configured_path)
+
+    return get_db_path().parent / "backups"
+
+
+def _pages_per_step() -> int:
+    return int(os.getenv("PM_BACKUP_PAGES_PER_STEP", "256"))
+
+
+def _step_sleep_seconds() -> float:
+    return float(os.getenv("PM_BACKUP_STEP_SLEEP_SECONDS", "0.005"))
+
+
+def _max_restarts() -> int:
+    return int(os.getenv("PM_BACKUP_MAX_RESTARTS", "3"))
+
+
+def _keep_count() -> int:
+    return int(os.getenv("PM_BACKUP_KEEP", "7"))
+
+
+def _is_snapshot(path: Path) -> bool:
+    if not path.name.startswith(SNAPSHOT_PREFIX):
+        return False
+    if path.is_dir():
+        return not path.name.endswith(".partial") and (path / MANIFEST_NAME).exists()
+    return path.name.endswith(SNAPSHOT_SUFFIXES)
+
+
+def list_snapshots(backup_dir: Path | None = None) -> list[Path]:
+    """Return snapshots oldest first."""
+    directory = backup_dir or get_backup_dir()
+    if not directory.exists():
+        return []
+    return sorted(path for path in directory.iterdir() if _is_snapshot(path))
+
+
+def snapshot_bytes(snapshot: Path) -> int:
+    if snapshot.is_dir():
+        return sum(path.stat().st_size for path in snapshot.iterdir())
+    return snapshot.stat().st_size
+
+
+def _remove_snapshot(path: Path) -> None:
+    if path.is_dir():
+        shutil.rmtree(path, ignore_errors=True)
+    else:
+        path.unlink(missing_ok=True)
+
+
+def rotate_snapshots(backup_dir: Path, keep: int) -> list[Path]:
+    snapshots = list_snapshots(backup_dir)
+    removed = snapshots[:-keep] if keep > 0 else []
+    for path in removed:
+        _remove_snapshot(path)
+    return removed
+
+
+class _BackupRestarting(Exception):
+    pass
+
+
+def _copy_database(source_path: Path, target_path: Path) -> None:
+    """Copy with the backup API, paced, falling back to one unpaced step.
+
+    A paced backup restarts from the first page whenever another connection
+    writes to the source between steps, so under steady writes it may never
+    finish. After ``PM_BACKUP_MAX_RESTARTS`` restarts the copy is redone as
+    a single step, which reads one consistent snapshot; in WAL mode writers
+    carry on meanwhile.
+    """
+    step_sleep = _step_sleep_seconds()
+    max_restarts = _max_restarts()
+    restarts = 0
+    last_remaining = None
+
+    def pace(status: int, remaining: int, total: int) -> None:
+        nonlocal restarts, last_remaining
+        if last_remaining is not None and remaining >= last_remaining:
+            restarts += 1
+            metrics.inc("backup_restarts_total")
+            if restarts > max_restarts:
+                raise _BackupRestarting
+        last_remaining = remaining
+        metrics.set("backup_pages_remaining", remaining)
+        if remaining and step_sleep:
+            time.sleep(step_sleep)
+
+    source = sqlite3.connect(source_path)
+    target = sqlite3.connect(target_path)
+    try:
+        try:
+            source.backup(target, pages=_pages_per_step(), progress=pace)
+        except _BackupRestarting:
+            metrics.inc("backup_unpaced_fallbacks_total")
+            source.backup(target)
+        metrics.set("backup_pages_remaining", 0)
+    finally:
+        target.close()
+        source.close()
+
+
+def _shard_files() -> list[tuple[int, Path]]:
+    return [
+        (index, get_shard_path(index))
+        for index in range(get_shard_count())
+        if get_shard_path(index).exists()
+    ]
+
+
+def _write_copy(source_path: Path, target_stem: Path, compress: bool) -> Path:
+    """Copy one database to ``target_stem`` plus ``.db`` or ``.db.gz``."""
+    partial_path = target_stem.with_name(f"{target_stem.name}.partial")
+    final_path = target_stem.with_name(f"{target_stem.name}{'.db.gz' if compress else '.db'}")
+    try:
+        _copy_database(source_path, partial_path)
+        if compress:
+            with partial_path.open("rb") as raw, gzip.open(final_path, "wb", compresslevel=6) as packed:
+                shutil.copyfileobj(raw, packed)
+            partial_path.unlink()
+        else:
+            partial_path.replace(final_path)
+    except BaseException:
+        partial_path.unlink(missing_ok=True)
+        raise
+    return final_path
+
+
+def create_snapshot(
+    backup_dir: Path | None = None,
+    compress: bool | None = None,
+    keep: int | None = None,
+) -> dict:
+    """Take an online snapshot of the live database.
+
+    The copy is made with SQLite's backup API a few pages at a time, sleeping
+    between steps to limit the I/O it takes from requests; see
+    ``_copy_database`` for how it still finishes under steady writes.
+
+    With ``PM_DB_SHARDS`` set the snapshot is a directory holding the central
+    database and every shard file plus a manifest. The central database is
+    copied first, so every user it knows of has their shard copied after.
+    """
+    directory = backup_dir or get_backup_dir()
+    directory.mkdir(parents=True, exist_ok=True)
+    compress = _env_flag("PM_BACKUP_COMPRESS", True) if compress is None else compress
+    keep = _keep_count() if keep is None else keep
+
+    stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S%fZ")
+    sharded = get_shard_count() > 0
+
+    started = time.perf_counter()
+    try:
+        with metrics.activity("backup"):
+            if sharded:
+                final_path = directory / f"{SNAPSHOT_PREFIX}{stamp}"
+                partial_dir = directory / f"{SNAPSHOT_PREFIX}{stamp}.partial"
+                partial_dir.mkdir()
+                try:
+                    central = _write_copy(get_db_path(), partial_dir / "central", compress)
+                    files = [{"file": central.name, "shard": None}]
+                    for index, path in _shard_files():
+                        copy = _write_copy(path, partial_dir / f"shard-{index:03d}", compress)
+                        files.append({"file": copy.name, "shard": index})
+                    manifest = {"created_at": stamp, "shard_count": get_shard_count(), "files": files}
+                    (partial_dir / MANIFEST_NAME).write_text(json.dumps(manifest, indent=2))
+                    partial_dir.replace(final_path)
+                except BaseException:
+                    shutil.rmtree(partial_dir, ignore_errors=True)
+                    raise
+            else:
+                final_path = _write_copy(get_db_path(), directory / f"{SNAPSHOT_PREFIX}{stamp}", compress)
+    except Exception:
+        metrics.inc("backup_failures_total")
+        raise
+
+    elapsed = time.perf_counter() - started
+    size = snapshot_bytes(final_path)
+    removed = rotate_snapshots(directory, keep)
+
+    metrics.inc("backups_total")
+    metrics.inc("backup_bytes_total", size)
+    metrics.observe("backup_seconds", elapsed)
+    metrics.set("backup_last_success_timestamp", time.time())
+    metrics.set("backup_last_bytes_per_second", size / elapsed if elapsed else 0.0)
+
+    return {
+        "path": str(final_path),
+        "bytes": size,
+        "seconds": round(elapsed, 3),
+        "compressed": compress,
+        "rotated": [path.name for path in removed],
+    }
+
+
+def _restore_file(source_path: Path, target_path: Path) -> None:
+    target_path.parent.mkdir(parents=True, exist_ok=True)
+    with tempfile.TemporaryDirectory() as scratch:
+        if source_path.name.endswith(".gz"):
+            unpacked = Path(scratch) / "restore.db"
+            with gzip.open(source_path, "rb") as packed, unpacked.open("wb") as raw:
+                shutil.copyfileobj(packed, raw)
+            source_path = unpacked
+
+        source = sqlite3.connect(source_path)
+        target = sqlite3.connect(target_path)
+        try:
+            source.backup(target)
+        finally:
+            target.close()
+            source.close()
+
+
+def restore_snapshot(snapshot: Path, db_path: Path | None = None) -> Path:
+    """Restore a snapshot over the database file (and its shards).
+
+    Meant to run while the app is stopped; each copy goes through the backup
+    API so its target is replaced page by page in one transaction. Shards are
+    written next to ``db_path`` the way ``get_shard_path`` lays them out.
+    """
+    target_path = db_path or get_db_path()
+
+    if snapshot.is_dir():
+        manifest = json.loads((snapshot / MANIFEST_NAME).read_text())
+        copies = []
+        for entry in manifest["files"]:
+            if entry["shard"] is None:
+                target = target_path
+            else:
+                target = target_path.parent / get_shard_path(entry["shard"]).relative_to(get_db_path().parent)
+            copies.append((snapshot / entry["file"], target))
+    else:
+        if get_shard_count() > 0:
+            raise ValueError(
+                "Snapshot holds no shard files but PM_DB_SHARDS is set; "
+                "restore it unsharded, then run python -m app.shards rebalance"
+            )
+        copies = [(snapshot, target_path)]
+
+    for source_path, target in copies:
+        _restore_file(source_path, target)
+    clear_user_cache()
+    clear_shard_cache()
+    return target_path
+
+
+class BackupScheduler:
+    """Runs ``create_snapshot`` every ``PM_BACKUP_INTERVAL_SECONDS`` seconds."""
+
+    def __init__(self) -> None:
+        self.interval = float(os.getenv("PM_BACKUP_INTERVAL_SECONDS", "0"))
+        self._task: asyncio.Task | None = None
+
+    async def start(self) -> None:
+        if self.interval > 0:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await asyncio.to_thread(create_snapshot)
+            except Exception:
+                logger.exception("Scheduled backup failed")
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m app.backup")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    create = commands.add_parser("create", help="take an online snapshot")
+    create.add_argument("--dir", type=Path, default=None)
+    create.add_argument("--no-compress", action="store_true")
+    create.add_argument("--keep", type=int, default=None)
+
+    commands.add_parser("list", help="list snapshots").add_argument("--dir", type=Path, default=None)
+
+    restore = commands.add_parser("restore", help="restore a snapshot (stop the app first)")
+    restore.add_argument("snapshot", type=Path)
+    restore.add_argument("--db", type=Path, default=None)
+
+    args = parser.parse_args(argv)
+    if args.command == "create":
+        result = create_snapshot(args.dir, compress=not args.no_compress, keep=args.keep)
+        print(f"Wrote {result['path']} ({result['bytes']} bytes in {result['seconds']}s)")
+    elif args.command == "list":
+        for path in list_snapshots(args.dir):
+            print(path)
+    elif args.command == "restore":
+        if not args.snapshot.exists():
+            sys.exit(f"Snapshot not found: {args.snapshot}")
+        try:
+            target = restore_snapshot(args.snapshot, args.db)
+        except ValueError as exc:
+            sys.exit(str(exc))
+        print(f"Restored {args.snapshot} into {target}")
+
+
+if __name__ == "__main__":
+    main()
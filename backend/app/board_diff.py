@@ -0,0 +1,66 @@
+def diff_boards(old: dict, new: dict) -> dict:
+    """Compute the compact delta that turns ``old`` into ``new``.
+
+    Only changed cards are stored. Columns are stored individually when just
+    their contents changed, and as a full list when columns were added,
+    removed or reordered.
+    """
+    delta: dict = {}
+
+    old_columns = old.get("columns", [])
+    new_columns = new.get("columns", [])
+    if [column["id"] for column in old_columns] != [column["id"] for column in new_columns]:
+        delta["columns"] = new_columns
+    else:
+        changed_columns = {
+            column["id"]: column
+            for old_column, column in zip(old_columns, new_columns)
+            if old_column != column
+        }
+        if changed_columns:
+            delta["column_updates"] = changed_columns
+
+    old_cards = old.get("cards", {})
+    new_cards = new.get("cards", {})
+    changed_cards = {
+        card_id: card for card_id, card in new_cards.items() if old_cards.get(card_id) != card
+    }
+    if changed_cards:
+        delta["cards"] = changed_cards
+    removed = [card_id for card_id in old_cards if card_id not in new_cards]
+    if removed:
+        delta["removed"] = removed
+
+    return delta
+
+
+def apply_delta(board: dict, delta: dict) -> dict:
+    """Return a new board with ``delta`` applied; ``board`` is not modified."""
+    columns = board.get("columns", [])
+    if "columns" in delta:
+        columns = delta["columns"]
+    elif "column_updates" in delta:
+        updates = delta["column_updates"]
+        columns = [updates.get(column["id"], column) for column in columns]
+
+    for card_id, column_id, after_id in delta.get("moves", []):
+        columns = _move_card(columns, card_id, column_id, after_id)
+
+    cards = dict(board.get("cards", {}))
+    cards.update(delta.get("cards", {}))
+    for card_id in delta.get("removed", []):
+        cards.pop(card_id, None)
+
+    return {**board, "columns": columns, "cards": cards}
+
+
+def _move_card(columns: list[dict], card_id: str, column_id: str, after_id: str | None) -> list[dict]:
+    """Put ``card_id`` into ``column_id`` right after ``after_id`` (or first)."""
+    moved = []
+    for column in columns:
+        card_ids = [other for other in column["cardIds"] if other != card_id]
+        if column["id"] == column_id:
+            position = card_ids.index(after_id) + 1 if after_id in card_ids else 0
+            card_ids.insert(position, card_id)
+        moved.append({**column, "cardIds": card_ids})
+    return moved
@@ -0,0 +1,67 @@
+class BoardOperationError(ValueError):
+    pass
+
+
+def _find_column(columns: list[dict], column_id: str) -> dict:
+    for column in columns:
+        if column["id"] == column_id:
+            return column
+    raise BoardOperationError(f"Unknown column: {column_id}")
+
+
+def _detach_card(columns: list[dict], card_id: str) -> None:
+    for column in columns:
+        if card_id in column["cardIds"]:
+            column["cardIds"].remove(card_id)
+
+
+def _insert_card(column: dict, card_id: str, position: int | None) -> None:
+    if position is None or position >= len(column["cardIds"]):
+        column["cardIds"].append(card_id)
+    else:
+        column["cardIds"].insert(max(position, 0), card_id)
+
+
+def apply_operations(board: dict, operations: list[dict]) -> dict:
+    """Apply an operation list to a board and return the new board.
+
+    ``board`` is left untouched: columns are copied and edited cards are
+    replaced rather than mutated, so callers can still diff old against new.
+    Raises ``BoardOperationError`` when an operation refers to something that
+    does not exist.
+    """
+    columns = [{**column, "cardIds": list(column["cardIds"])} for column in board["columns"]]
+    cards = dict(board["cards"])
+
+    for operation in operations:
+        kind = operation["op"]
+        if kind == "move_card":
+            card_id = operation["card_id"]
+            if card_id not in cards:
+                raise BoardOperationError(f"Unknown card: {card_id}")
+            target = _find_column(columns, operation["column_id"])
+            _detach_card(columns, card_id)
+            _insert_card(target, card_id, operation.get("position"))
+        elif kind == "add_card":
+            card = operation["card"]
+            if card["id"] in cards:
+                raise BoardOperationError(f"Card already exists: {card['id']}")
+            target = _find_column(columns, operation["column_id"])
+            cards[card["id"]] = card
+            _insert_card(target, card["id"], operation.get("position"))
+        elif kind == "edit_card":
+            card_id = operation["card_id"]
+            if card_id not in cards:
+                raise BoardOperationError(f"Unknown card: {card_id}")
+            cards[card_id] = {**cards[card_id], **operation["changes"]}
+        elif kind == "delete_card":
+            card_id = operation["card_id"]
+            if cards.pop(card_id, None) is None:
+                raise BoardOperationError(f"Unknown card: {card_id}")
+            _detach_card(columns, card_id)
+        elif kind == "rename_column":
+            _find_column(columns, operation["column_id"])["title"] = operation["title"]
+        else:
+            raise BoardOperationError(f"Unknown operation: {kind}")
+
+    return {**board, "columns": columns, "cards": cards}
@@ -0,0 +1,86 @@
+"""Compact in-memory form of a board for boards held between requests.
+
+A board as JSON is dicts of dicts: every card costs a dict plus a dict per
+label. These slotted records hold the same fields in a fraction of the
+space, with the short repeated strings (priorities, label colours) interned.
+They round-trip exactly through ``from_json``/``to_json`` for boards that
+passed ``BoardPayload`` validation.
+"""
+
+import sys
+from dataclasses import dataclass
+
+
+@dataclass(frozen=True, slots=True)
+class LabelRecord:
+    id: str
+    text: str
+    color: str
+
+
+@dataclass(frozen=True, slots=True)
+class CardRecord:
+    id: str
+    title: str
+    details: str
+    labels: tuple[LabelRecord, ...]
+    due_date: str | None
+    priority: str
+
+
+@dataclass(frozen=True, slots=True)
+class ColumnRecord:
+    id: str
+    title: str
+    card_ids: tuple[str, ...]
+
+
+@dataclass(frozen=True, slots=True)
+class BoardRecord:
+    columns: tuple[ColumnRecord, ...]
+    cards: tuple[CardRecord, ...]
+
+    @classmethod
+    def from_json(cls, board: dict) -> "BoardRecord":
+        return cls(
+            columns=tuple(
+                ColumnRecord(column["id"], column["title"], tuple(column["cardIds"]))
+                for column in board["columns"]
+            ),
+            cards=tuple(
+                CardRecord(
+                    card["id"],
+                    card["title"],
+                    card["details"],
+                    tuple(
+                        LabelRecord(label["id"], label["text"], sys.intern(label["color"]))
+                        for label in card["labels"]
+                    ),
+                    card["due_date"],
+                    sys.intern(card["priority"]),
+                )
+                for card in board["cards"].values()
+            ),
+        )
+
+    def to_json(self) -> dict:
+        return {
+            "columns": [
+                {"id": column.id, "title": column.title, "cardIds": list(column.card_ids)}
+                for column in self.columns
+            ],
+            "cards": {
+                card.id: {
+                    "id": card.id,
+                    "title": card.title,
+                    "details": card.details,
+                    "labels": [
+                        {"id": label.id, "text": label.text, "color": label.color}
+                        for label in card.labels
+                    ],
+                    "due_date": card.due_date,
+                    "priority": card.priority,
+                }
+                for card in self.cards
+            },
+        }
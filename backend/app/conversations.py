@@ -0,0 +1,147 @@
+import os
+import re
+from dataclasses import dataclass
+
+from app.db import (
+    append_ai_conversation_turns,
+    create_ai_conversation,
+    get_ai_conversation_turns,
+    update_ai_conversation_summary,
+)
+from app.metrics import metrics
+
+# Each summarized turn becomes one line of at most this many characters;
+# lines are squeezed down to SUMMARY_MIN_LINE_CHARS, oldest first, before
+# any line is dropped.
+SUMMARY_LINE_CHARS = 160
+SUMMARY_MIN_LINE_CHARS = 40
+
+_SENTENCE_BREAK = re.compile(r"(?<=[.!?;])\s+")
+# Ids, numbers, dates and quoted names are what later turns refer back to.
+_SALIENT = re.compile(r'\b(?:card|col|board)-[\w-]+|\d|"[^"]+"|\'[^\']+\'')
+
+
+def _history_token_budget() -> int:
+    return int(os.getenv("PM_AI_HISTORY_TOKEN_BUDGET", "2000"))
+
+
+def _summary_token_budget() -> int:
+    return int(os.getenv("PM_AI_SUMMARY_TOKEN_BUDGET", "500"))
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (about four characters per token for English)."""
+    return len(text) // 4 + 1
+
+
+@dataclass
+class ConversationContext:
+    summary: str
+    turns: list[dict]
+
+
+def split_by_budget(turns: list[dict], budget: int) -> tuple[list[dict], list[dict]]:
+    """Split ``turns`` into (older, recent) so that ``recent`` fits ``budget``.
+
+    The newest turn is always kept, even when it alone exceeds the budget.
+    """
+    used = 0
+    keep_from = len(turns)
+    for index in range(len(turns) - 1, -1, -1):
+        used += estimate_tokens(turns[index]["content"])
+        if used > budget and index < len(turns) - 1:
+            break
+        keep_from = index
+    return turns[:keep_from], turns[keep_from:]
+
+
+def condense(text: str, max_chars: int) -> str:
+    """Extract the sentences of ``text`` that best fit in ``max_chars``.
+
+    The opening sentence (usually the request or the answer itself) is kept
+    first, then the sentences with the most ids, numbers and quoted names;
+    the chosen ones stay in their original order.
+    """
+    text = " ".join(text.split())
+    if len(text) <= max_chars:
+        return text
+    sentences = _SENTENCE_BREAK.split(text)
+    ranked = sorted(
+        range(len(sentences)),
+        key=lambda index: (index != 0, -len(_SALIENT.findall(sentences[index])), index),
+    )
+    chosen: list[int] = []
+    used = 0
+    for index in ranked:
+        cost = len(sentences[index]) + 3
+        if used + cost <= max_chars:
+            chosen.append(index)
+            used += cost
+    if not chosen:
+        return sentences[0][: max_chars - 1] + "…"
+    chosen.sort()
+    parts = [sentences[chosen[0]]]
+    for previous, index in zip(chosen, chosen[1:]):
+        parts.append(("… " if index - previous > 1 else "") + sentences[index])
+    return " ".join(parts)
+
+
+def _squeeze(line: str) -> str:
+    role, _, text = line.partition(": ")
+    if len(text) <= SUMMARY_MIN_LINE_CHARS:
+        return line
+    return f"{role}: {condense(text, max(SUMMARY_MIN_LINE_CHARS, len(text) // 2))}"
+
+
+def extend_summary(summary: str, turns: list[dict], budget: int) -> str:
+    """Fold ``turns`` into ``summary``, one condensed line per turn.
+
+    Over ``budget``, the older half of the lines is condensed further, so the
+    newest turns keep the most detail; the oldest line is only dropped once
+    every older line is down to ``SUMMARY_MIN_LINE_CHARS``.
+    """
+    lines = summary.splitlines() if summary else []
+    lines.extend(f"{turn['role']}: {condense(turn['content'], SUMMARY_LINE_CHARS)}" for turn in turns)
+    while len(lines) > 1 and estimate_tokens("\n".join(lines)) > budget:
+        older = len(lines) // 2
+        squeezed = [_squeeze(line) for line in lines[:older]]
+        if squeezed == lines[:older]:
+            lines.pop(0)
+        else:
+            lines[:older] = squeezed
+    return "\n".join(lines)
+
+
+def load_context(conversation: dict, user_id: int) -> ConversationContext:
+    """Return the summary and recent turns to put in the next prompt.
+
+    Turns that no longer fit the history budget are folded into the stored
+    summary once, so each request only reads the unsummarized tail.
+    """
+    summary = conversation["summary"]
+    turns = get_ai_conversation_turns(conversation["id"], user_id, conversation["summarized_through"])
+    older, recent = split_by_budget(turns, _history_token_budget())
+    if older:
+        summary = extend_summary(summary, older, _summary_token_budget())
+        update_ai_conversation_summary(conversation["id"], user_id, summary, older[-1]["seq"])
+        metrics.inc("ai_conversation_turns_summarized_total", len(older))
+    return ConversationContext(summary=summary, turns=recent)
+
+
+def seed_context(history: list[tuple[str, str]]) -> ConversationContext:
+    """Context for a conversation not stored yet, from client-sent history."""
+    turns = [{"role": role, "content": content} for role, content in history]
+    older, recent = split_by_budget(turns, _history_token_budget())
+    summary = extend_summary("", older, _summary_token_budget()) if older else ""
+    return ConversationContext(summary=summary, turns=recent)
+
+
+def start_conversation(
+    user_id: int, board_id: str, history: list[tuple[str, str]], question: str, answer: str
+) -> dict:
+    """Store a new conversation once its first exchange has succeeded."""
+    return create_ai_conversation(user_id, board_id, [*history, ("user", question), ("assistant", answer)])
+
+
+def record_exchange(conversation_id: str, user_id: int, question: str, answer: str) -> None:
+    append_ai_conversation_turns(conversation_id, user_id, [("user", question), ("assistant", answer)])
@@ -1,12 +1,37 @@
+import hashlib
 import json
 import os
 import sqlite3
+import threading
+import time
 import uuid
+from collections import Counter, OrderedDict
+from collections.abc import Callable, Iterator
 from pathlib import Path
 
-import bcrypt
+from app.board_defaults import DEFAULT_BOARD
+from app.board_diff import apply_delta, diff_boards
+from app.board_ops import BoardOperationError
+from app.ranks import MAX_RANK_LENGTH, rank_between, rerank, spread_ranks
 
-from app.board_defaults import default_board
+# Every SNAPSHOT_INTERVAL-th version of a board is stored in full, so any
+# version can be rebuilt from one snapshot plus fewer than that many deltas.
+SNAPSHOT_INTERVAL = 20
+
+# Due cards on the same date are listed most urgent first.
+PRIORITY_RANK_SQL = (
+    "CASE priority WHEN 'urgent' THEN 0 WHEN 'high' THEN 1 WHEN 'medium' THEN 2 "
+    "WHEN 'low' THEN 3 ELSE 4 END"
+)
+
+DEFAULT_TEMPLATE_ID = "template-default"
+# bcrypt of the well-known seed password "password". bcrypt is deliberately
+# slow (~0.4 s), so seeding a database does not hash it afresh.
+DEFAULT_PASSWORD_HASH = "$2b$12$rCXTJGtlF/vii75QshVWAesJ0i2rBwyhufSAjxwYfVjBXueqkS/y6"
+
+
+def _history_max_versions() -> int:
+    return int(os.getenv("PM_HISTORY_MAX_VERSIONS", "200"))
 
 
 def get_db_path() -> Path:
@@ -17,47 +42,344 @@ def get_db_path() -> Path:
     return Path(__file__).parent.parent / "data" / "pm.db"
 
 
-def get_connection() -> sqlite3.Connection:
-    db_path = get_db_path()
+class _ClosingConnection(sqlite3.Connection):
+    """Commits or rolls back like a normal connection, then closes on exit."""
+
+    def __exit__(self, *exc_info):
+        try:
+            return super().__exit__(*exc_info)
+        finally:
+            self.close()
+
+
+def connect(db_path: Path, check_same_thread: bool = True) -> sqlite3.Connection:
     db_path.parent.mkdir(parents=True, exist_ok=True)
-    connection = sqlite3.connect(db_path)
+    connection = sqlite3.connect(
+        db_path,
+        check_same_thread=check_same_thread,
+        factory=_ClosingConnection,
+    )
     connection.row_factory = sqlite3.Row
     connection.execute("PRAGMA foreign_keys = ON")
     return connection
 
 
+def get_connection(check_same_thread: bool = True) -> sqlite3.Connection:
+    """Connection to the central database (users, jobs, shard map)."""
+    return connect(get_db_path(), check_same_thread)
+
+
 def init_db() -> None:
+    sharded = get_shard_count() > 0
     with get_connection() as connection:
-        _migrate_if_needed(connection)
+        _init_schema(connection)
         connection.execute(
             """
-            CREATE TABLE IF NOT EXISTS users (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                username TEXT NOT NULL UNIQUE,
-                password_hash TEXT NOT NULL,
-                display_name TEXT NOT NULL DEFAULT '',
-                created_at TEXT NOT NULL DEFAULT (strftime('%Y-%m-%dT%H:%M:%fZ', 'now')),
-                updated_at TEXT NOT NULL DEFAULT (strftime('%Y-%m-%dT%H:%M:%fZ', 'now'))
+            CREATE TABLE IF NOT EXISTS user_shards (
+                user_id INTEGER PRIMARY KEY,
+                shard INTEGER NOT NULL,
+                FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
             )
             """
         )
+        _init_user_cache_version(connection)
+        # With sharding on, the default board is created lazily in the
+        # user's shard like any other user's.
+        _seed_default_user(connection, with_board=not sharded)
+        _backfill_board_events(connection)
+    for index in range(get_shard_count()):
+        with connect(get_shard_path(index)) as connection:
+            _init_schema(connection)
+            _backfill_board_events(connection)
+
+
+def _init_schema(connection: sqlite3.Connection) -> None:
+    """Create or upgrade the schema; runs on the central DB and every shard."""
+    # Only takes effect before the first table exists; older databases are
+    # converted once by app.maintenance.
+    connection.execute("PRAGMA auto_vacuum = INCREMENTAL")
+    # WAL lets readers (including online backups) run alongside the writer.
+    connection.execute("PRAGMA journal_mode = WAL")
+    _migrate_if_needed(connection)
+    connection.execute(
+        """
+        CREATE TABLE IF NOT EXISTS users (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            username TEXT NOT NULL UNIQUE,
+            password_hash TEXT NOT NULL,
+            display_name TEXT NOT NULL DEFAULT '',
+            created_at TEXT NOT NULL DEFAULT (strftime('%Y-%m-%dT%H:%M:%fZ', 'now')),
+            updated_at TEXT NOT NULL DEFAULT (strftime('%Y-%m-%dT%H:%M:%fZ', 'now'))
+        )
+        """
+    )
+    connection.execute(
+        """
+        CREATE TABLE IF NOT EXISTS boards (
+            id TEXT PRIMARY KEY,
+            user_id INTEGER NOT NULL,
+            name TEXT NOT NULL DEFAULT 'My Board',
+            board_json TEXT NOT NULL CHECK (json_valid(board_json)),
+            created_at TEXT NOT NULL DEFAULT (strftime('%Y-%m-%dT%H:%M:%fZ', 'now')),
+            updated_at TEXT NOT NULL DEFAULT (strftime('%Y-%m-%dT%H:%M:%fZ', 'now')),
+            FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
+        )
+        """
+    )
+    connection.execute(
+        "CREATE INDEX IF NOT EXISTS idx_boards_user_id ON boards(user_id)"
+    )
+    _add_column_if_missing(connection, "boards", "version", "INTEGER NOT NULL DEFAULT 1")
+    connection.execute(
+        """
+        CREATE TABLE IF NOT EXISTS board_templates (
+            id TEXT PRIMARY KEY,
+            user_id INTEGER,
+            name TEXT NOT NULL,
+            board_json TEXT NOT NULL CHECK (json_valid(board_json)),
+            created_at TEXT NOT NULL DEFAULT (strftime('%Y-%m-%dT%H:%M:%fZ', 'now')),
+            FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
+        )
+        """
+    )
+    connection.execute(
+        "INSERT OR IGNORE INTO board_templates (id, user_id, name, board_json) VALUES (?, NULL, ?, ?)",
+        (DEFAULT_TEMPLATE_ID, "Default", json.dumps(DEFAULT_BOARD)),
+    )
+    # A board created from a template stores no content of its own
+    # (board_json is the JSON 'null') until its first write copies the
+    # template in and clears template_id.
+    _add_column_if_missing(
+        connection, "boards", "template_id", "TEXT REFERENCES board_templates(id)"
+    )
+    # Set when cards were moved by rank only: the cardIds stored in
+    # board_json are then out of date and are rebuilt from card_index.
+    _add_column_if_missing(connection, "boards", "order_stale", "INTEGER NOT NULL DEFAULT 0")
+    connection.execute("DROP VIEW IF EXISTS board_contents")
+    connection.execute(
+        """
+        CREATE VIEW board_contents AS
+        SELECT b.id, b.user_id, b.name, b.version, b.template_id, b.order_stale,
+               b.created_at, b.updated_at,
+               COALESCE(t.board_json, b.board_json) AS board_json
+        FROM boards b LEFT JOIN board_templates t ON t.id = b.template_id
+        """
+    )
+    connection.execute(
+        """
+        CREATE TABLE IF NOT EXISTS board_events (
+            board_id TEXT NOT NULL,
+            version INTEGER NOT NULL,
+            kind TEXT NOT NULL CHECK (kind IN ('snapshot', 'delta')),
+            payload TEXT NOT NULL CHECK (json_valid(payload)),
+            created_at TEXT NOT NULL DEFAULT (strftime('%Y-%m-%dT%H:%M:%fZ', 'now')),
+            PRIMARY KEY (board_id, version),
+            FOREIGN KEY (board_id) REFERENCES boards(id) ON DELETE CASCADE
+        )
+        """
+    )
+    has_card_index = connection.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'card_index'"
+    ).fetchone()
+    connection.execute(
+        """
+        CREATE TABLE IF NOT EXISTS card_index (
+            board_id TEXT NOT NULL,
+            card_id TEXT NOT NULL,
+            user_id INTEGER NOT NULL,
+            column_id TEXT,
+            title TEXT NOT NULL,
+            due_date TEXT,
+            priority TEXT NOT NULL,
+            labels TEXT NOT NULL DEFAULT '[]',
+            column_since TEXT NOT NULL DEFAULT (strftime('%Y-%m-%dT%H:%M:%fZ', 'now')),
+            rank TEXT,
+            PRIMARY KEY (board_id, card_id),
+            FOREIGN KEY (board_id) REFERENCES boards(id) ON DELETE CASCADE
+        )
+        """
+    )
+    if has_card_index and "labels" not in _table_columns(connection, "card_index"):
+        # Older indexes held only cards with a due date or priority.
+        connection.execute("ALTER TABLE card_index ADD COLUMN labels TEXT NOT NULL DEFAULT '[]'")
+        has_card_index = None
+    if has_card_index and "rank" not in _table_columns(connection, "card_index"):
+        connection.execute("ALTER TABLE card_index ADD COLUMN rank TEXT")
+        has_card_index = None
+    if "column_since" not in _table_columns(connection, "card_index"):
+        connection.execute("ALTER TABLE card_index ADD COLUMN column_since TEXT")
+        connection.execute(
+            "UPDATE card_index SET column_since = strftime('%Y-%m-%dT%H:%M:%fZ', 'now')"
+        )
+    connection.execute(
+        "CREATE INDEX IF NOT EXISTS idx_card_index_since ON card_index(column_since, board_id, user_id)"
+    )
+    connection.execute(
+        "CREATE INDEX IF NOT EXISTS idx_card_index_order ON card_index(board_id, column_id, rank, card_id)"
+    )
+    # Covers the due-cards query, in its priority-rank order, so it never
+    # touches the table rows. The first version sorted priority as text.
+    connection.execute("DROP INDEX IF EXISTS idx_card_index_due")
+    connection.execute(
+        f"""
+        CREATE INDEX IF NOT EXISTS idx_card_index_due_rank
+        ON card_index(
+            user_id, due_date, {PRIORITY_RANK_SQL}, board_id, card_id, column_id, title, priority
+        )
+        WHERE due_date IS NOT NULL
+        """
+    )
+    has_outlines = connection.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'board_outlines'"
+    ).fetchone()
+    # A board's columns kept apart from board_json, so opening a large board
+    # reads neither its cards nor the overflow pages that hold them.
+    connection.execute(
+        """
+        CREATE TABLE IF NOT EXISTS board_outlines (
+            board_id TEXT PRIMARY KEY,
+            columns_json TEXT NOT NULL CHECK (json_valid(columns_json)),
+            FOREIGN KEY (board_id) REFERENCES boards(id) ON DELETE CASCADE
+        )
+        """
+    )
+    has_aggregates = connection.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'board_aggregates'"
+    ).fetchone()
+    connection.execute(
+        """
+        CREATE TABLE IF NOT EXISTS board_aggregates (
+            board_id TEXT NOT NULL,
+            dimension TEXT NOT NULL CHECK (dimension IN ('column', 'priority', 'label')),
+            key TEXT NOT NULL,
+            user_id INTEGER NOT NULL,
+            count INTEGER NOT NULL,
+            PRIMARY KEY (board_id, dimension, key),
+            FOREIGN KEY (board_id) REFERENCES boards(id) ON DELETE CASCADE
+        )
+        """
+    )
+    connection.execute(
+        """
+        CREATE INDEX IF NOT EXISTS idx_board_aggregates_user
+        ON board_aggregates(user_id, dimension, key, count)
+        """
+    )
+    connection.execute(
+        """
+        CREATE TABLE IF NOT EXISTS archived_cards (
+            board_id TEXT NOT NULL,
+            card_id TEXT NOT NULL,
+            user_id INTEGER NOT NULL,
+            column_id TEXT,
+            column_title TEXT,
+            title TEXT NOT NULL,
+            card_json TEXT NOT NULL CHECK (json_valid(card_json)),
+            archived_at TEXT NOT NULL DEFAULT (strftime('%Y-%m-%dT%H:%M:%fZ', 'now')),
+            PRIMARY KEY (board_id, card_id),
+            FOREIGN KEY (board_id) REFERENCES boards(id) ON DELETE CASCADE
+        )
+        """
+    )
+    connection.execute(
+        "CREATE INDEX IF NOT EXISTS idx_archived_cards_user ON archived_cards(user_id, archived_at)"
+    )
+    if not has_outlines:
         connection.execute(
             """
-            CREATE TABLE IF NOT EXISTS boards (
-                id TEXT PRIMARY KEY,
-                user_id INTEGER NOT NULL,
-                name TEXT NOT NULL DEFAULT 'My Board',
-                board_json TEXT NOT NULL CHECK (json_valid(board_json)),
-                created_at TEXT NOT NULL DEFAULT (strftime('%Y-%m-%dT%H:%M:%fZ', 'now')),
-                updated_at TEXT NOT NULL DEFAULT (strftime('%Y-%m-%dT%H:%M:%fZ', 'now')),
-                FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
-            )
+            INSERT INTO board_outlines (board_id, columns_json)
+            SELECT id, json_extract(board_json, '$.columns') FROM board_contents
             """
         )
-        connection.execute(
-            "CREATE INDEX IF NOT EXISTS idx_boards_user_id ON boards(user_id)"
+    if not has_card_index or not has_aggregates:
+        for row in connection.execute("SELECT id, user_id, board_json FROM board_contents").fetchall():
+            board = json.loads(row["board_json"])
+            if not has_card_index:
+                _index_board_cards(connection, row["user_id"], row["id"], board)
+            if not has_aggregates:
+                _aggregate_board(connection, row["user_id"], row["id"], board)
+    connection.execute(
+        """
+        CREATE TABLE IF NOT EXISTS ai_jobs (
+            id TEXT PRIMARY KEY,
+            user_id INTEGER NOT NULL,
+            dedupe_key TEXT NOT NULL,
+            status TEXT NOT NULL DEFAULT 'pending'
+                CHECK (status IN ('pending', 'running', 'succeeded', 'failed', 'cancelled')),
+            request_json TEXT NOT NULL CHECK (json_valid(request_json)),
+            result_json TEXT,
+            error TEXT,
+            status_code INTEGER,
+            created_at TEXT NOT NULL DEFAULT (strftime('%Y-%m-%dT%H:%M:%fZ', 'now')),
+            updated_at TEXT NOT NULL DEFAULT (strftime('%Y-%m-%dT%H:%M:%fZ', 'now')),
+            FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
+        )
+        """
+    )
+    # A running job is leased to one worker, which renews the lease while it
+    # works; only a lapsed lease lets another process take the job over.
+    _add_column_if_missing(connection, "ai_jobs", "worker_id", "TEXT")
+    _add_column_if_missing(connection, "ai_jobs", "lease_expires_at", "TEXT")
+    connection.execute(
+        "CREATE INDEX IF NOT EXISTS idx_ai_jobs_pending ON ai_jobs(created_at) WHERE status = 'pending'"
+    )
+    connection.execute(
+        """
+        CREATE INDEX IF NOT EXISTS idx_ai_jobs_dedupe ON ai_jobs(user_id, dedupe_key)
+        WHERE status IN ('pending', 'running')
+        """
+    )
+    connection.execute(
+        """
+        CREATE TABLE IF NOT EXISTS ai_conversations (
+            id TEXT PRIMARY KEY,
+            user_id INTEGER NOT NULL,
+            board_id TEXT NOT NULL,
+            summary TEXT NOT NULL DEFAULT '',
+            summarized_through INTEGER NOT NULL DEFAULT 0,
+            created_at TEXT NOT NULL DEFAULT (strftime('%Y-%m-%dT%H:%M:%fZ', 'now')),
+            updated_at TEXT NOT NULL DEFAULT (strftime('%Y-%m-%dT%H:%M:%fZ', 'now')),
+            FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE,
+            FOREIGN KEY (board_id) REFERENCES boards(id) ON DELETE CASCADE
+        )
+        """
+    )
+    connection.execute(
+        """
+        CREATE TABLE IF NOT EXISTS ai_conversation_turns (
+            conversation_id TEXT NOT NULL,
+            seq INTEGER NOT NULL,
+            role TEXT NOT NULL,
+            content TEXT NOT NULL,
+            created_at TEXT NOT NULL DEFAULT (strftime('%Y-%m-%dT%H:%M:%fZ', 'now')),
+            PRIMARY KEY (conversation_id, seq),
+            FOREIGN KEY (conversation_id) REFERENCES ai_conversations(id) ON DELETE CASCADE
         )
-        _seed_default_user(connection)
+        """
+    )
+
+
+def _backfill_board_events(connection: sqlite3.Connection) -> None:
+    # Boards written before history existed get their current state as the
+    # base snapshot.
+    connection.execute(
+        """
+        INSERT INTO board_events (board_id, version, kind, payload)
+        SELECT id, version, 'snapshot', board_json FROM boards
+        WHERE template_id IS NULL AND id NOT IN (SELECT DISTINCT board_id FROM board_events)
+        """
+    )
+
+
+def _table_columns(connection: sqlite3.Connection, table: str) -> set[str]:
+    return {row["name"] for row in connection.execute(f"PRAGMA table_info({table})")}
+
+
+def _add_column_if_missing(
+    connection: sqlite3.Connection, table: str, column: str, definition: str
+) -> None:
+    if column not in _table_columns(connection, table):
+        connection.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
 
 
 def _migrate_if_needed(connection: sqlite3.Connection) -> None:
@@ -102,7 +424,7 @@ def _migrate_if_needed(connection: sqlite3.Connection) -> None:
     ).fetchall()
 
     for row in rows:
-        password_hash = bcrypt.hashpw(b"password", bcrypt.gensalt()).decode()
+        password_hash = DEFAULT_PASSWORD_HASH
         connection.execute(
             "INSERT INTO users (username, password_hash, display_name, created_at, updated_at) VALUES (?, ?, ?, ?, ?)",
             (row["username"], password_hash, row["username"], row["created_at"], row["updated_at"]),
@@ -119,106 +441,411 @@ def _migrate_if_needed(connection: sqlite3.Connection) -> None:
     connection.execute("DROP TABLE user_boards")
 
 
-def _seed_default_user(connection: sqlite3.Connection) -> None:
+def _seed_default_user(connection: sqlite3.Connection, with_board: bool = True) -> None:
     existing = connection.execute(
         "SELECT id FROM users WHERE username = 'user'"
     ).fetchone()
     if existing:
         return
 
-    password_hash = bcrypt.hashpw(b"password", bcrypt.gensalt()).decode()
+    password_hash = DEFAULT_PASSWORD_HASH
     connection.execute(
         "INSERT INTO users (username, password_hash, display_name) VALUES (?, ?, ?)",
         ("user", password_hash, "Default User"),
     )
+    if not with_board:
+        return
     user = connection.execute(
         "SELECT id FROM users WHERE username = 'user'"
     ).fetchone()
     board_id = f"board-{uuid.uuid4()}"
-    board = default_board()
     connection.execute(
-        "INSERT INTO boards (id, user_id, name, board_json) VALUES (?, ?, ?, ?)",
-        (board_id, user["id"], "My Board", json.dumps(board)),
+        "INSERT INTO boards (id, user_id, name, board_json, template_id) VALUES (?, ?, ?, 'null', ?)",
+        (board_id, user["id"], "My Board", DEFAULT_TEMPLATE_ID),
     )
+    _index_board(connection, user["id"], board_id, DEFAULT_BOARD)
 
 
-# ── User operations ──────────────────────────────────────────────────────
+# ── Sharding ─────────────────────────────────────────────────────────────
+#
+# With PM_DB_SHARDS=N each user's boards, history and conversations live in
+# one of N shard files; users, AI jobs and the user_shards map stay in the
+# central database. A user is assigned a shard
+# by a stable hash of their id the first time their data is touched, and
+# keeps it until ``python -m app.shards rebalance`` moves them.
 
+_shard_lock = threading.Lock()
+_user_shards: dict[tuple[str, int], int] = {}
+_shadow_users: set[tuple[str, int]] = set()
+
+
+def get_shard_count() -> int:
+    return int(os.getenv("PM_DB_SHARDS", "0"))
+
+
+def get_shard_path(index: int) -> Path:
+    return get_db_path().parent / "shards" / f"pm-shard-{index:03d}.db"
+
+
+def shard_for_user(user_id: int, shard_count: int) -> int:
+    digest = hashlib.blake2b(str(user_id).encode(), digest_size=8).digest()
+    return int.from_bytes(digest, "big") % shard_count
+
+
+def clear_shard_cache() -> None:
+    with _shard_lock:
+        _user_shards.clear()
+        _shadow_users.clear()
+
+
+def get_user_shard(user_id: int) -> int | None:
+    """Return the shard holding ``user_id``'s boards, or None for the central DB."""
+    shard_count = get_shard_count()
+    if shard_count <= 0:
+        return None
+    key = (str(get_db_path()), user_id)
+    with _shard_lock:
+        cached = _user_shards.get(key)
+    if cached is not None:
+        return cached
 
-def create_user(username: str, password_hash: str, display_name: str = "") -> dict:
     with get_connection() as connection:
-        connection.execute(
-            "INSERT INTO users (username, password_hash, display_name) VALUES (?, ?, ?)",
-            (username, password_hash, display_name),
-        )
         row = connection.execute(
-            "SELECT id, username, display_name FROM users WHERE username = ?",
-            (username,),
+            "SELECT shard FROM user_shards WHERE user_id = ?", (user_id,)
         ).fetchone()
-        return dict(row)
+        if row:
+            shard = row["shard"]
+        else:
+            shard = shard_for_user(user_id, shard_count)
+            connection.execute(
+                "INSERT OR IGNORE INTO user_shards (user_id, shard) VALUES (?, ?)",
+                (user_id, shard),
+            )
+    with _shard_lock:
+        _user_shards[key] = shard
+    return shard
+
+
+def ensure_shadow_user(connection: sqlite3.Connection, user_id: int) -> None:
+    """Give a shard a stub ``users`` row so its foreign keys hold."""
+    connection.execute(
+        "INSERT OR IGNORE INTO users (id, username, password_hash) VALUES (?, ?, '')",
+        (user_id, f"#{user_id}"),
+    )
+    connection.commit()
+
+
+def get_board_connection(user_id: int, check_same_thread: bool = True) -> sqlite3.Connection:
+    """Connection to whichever database holds ``user_id``'s boards."""
+    shard = get_user_shard(user_id)
+    if shard is None:
+        return get_connection(check_same_thread)
+
+    shard_path = get_shard_path(shard)
+    connection = connect(shard_path, check_same_thread)
+    key = (str(shard_path), user_id)
+    with _shard_lock:
+        shadowed = key in _shadow_users
+    if not shadowed:
+        ensure_shadow_user(connection, user_id)
+        with _shard_lock:
+            _shadow_users.add(key)
+    return connection
+
+
+# ── User operations ──────────────────────────────────────────────────────
+#
+# Users are read through an in-process cache keyed by id and by username,
+# which also remembers usernames that do not exist. Every change to the
+# users table bumps user_cache_version (by trigger, so no writer can skip
+# it); the cache is emptied when it sees a newer version, which keeps it
+# correct when several processes share the database.
+
+_USER_COLUMNS = "id, username, password_hash, display_name"
+
+
+def _user_cache_size() -> int:
+    return int(os.getenv("PM_USER_CACHE_SIZE", "10000"))
+
+
+def _user_cache_check_seconds() -> float:
+    return float(os.getenv("PM_USER_CACHE_CHECK_MS", "1000")) / 1000
+
+
+def _init_user_cache_version(connection: sqlite3.Connection) -> None:
+    connection.execute(
+        """
+        CREATE TABLE IF NOT EXISTS user_cache_version (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            version INTEGER NOT NULL
+        )
+        """
+    )
+    connection.execute("INSERT OR IGNORE INTO user_cache_version (id, version) VALUES (1, 0)")
+    for event in ("INSERT", "UPDATE", "DELETE"):
+        connection.execute(
+            f"""
+            CREATE TRIGGER IF NOT EXISTS users_{event.lower()}_bumps_cache_version
+            AFTER {event} ON users
+            BEGIN
+                UPDATE user_cache_version SET version = version + 1 WHERE id = 1;
+            END
+            """
+        )
+
+
+def _user_cache_version(connection: sqlite3.Connection) -> int:
+    return connection.execute("SELECT version FROM user_cache_version WHERE id = 1").fetchone()["version"]
+
+
+class _UserCache:
+    """Bounded LRU of user rows, valid for one user_cache_version.
+
+    The stored version is re-read at most every PM_USER_CACHE_CHECK_MS, so
+    a change made by another process shows up within that time. Changes
+    made through this module update the cache as they commit.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._path: str | None = None
+        self._version: int | None = None
+        self._checked_at = 0.0
+        self._by_id: OrderedDict[int, dict] = OrderedDict()
+        self._by_username: OrderedDict[str, int | None] = OrderedDict()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._reset(None, None)
+
+    def _reset(self, path: str | None, version: int | None) -> None:
+        self._by_id.clear()
+        self._by_username.clear()
+        self._path = path
+        self._version = version
+        self._checked_at = time.monotonic()
+
+    def _revalidate(self) -> None:
+        path = str(get_db_path())
+        with self._lock:
+            if path == self._path and time.monotonic() - self._checked_at < _user_cache_check_seconds():
+                return
+        with get_connection() as connection:
+            version = _user_cache_version(connection)
+        with self._lock:
+            if path != self._path or version != self._version:
+                self._reset(path, version)
+            self._checked_at = time.monotonic()
+
+    def by_username(self, username: str) -> tuple[bool, dict | None]:
+        """(found, user); ``(True, None)`` means the username is known to be free."""
+        self._revalidate()
+        with self._lock:
+            if username not in self._by_username:
+                return False, None
+            self._by_username.move_to_end(username)
+            user_id = self._by_username[username]
+            return True, None if user_id is None else dict(self._by_id[user_id])
+
+    def forget_username(self, username: str) -> None:
+        with self._lock:
+            user_id = self._by_username.pop(username, None)
+            if user_id is not None:
+                self._by_id.pop(user_id, None)
+
+    def by_id(self, user_id: int) -> dict | None:
+        self._revalidate()
+        with self._lock:
+            user = self._by_id.get(user_id)
+            if user is None:
+                return None
+            self._by_id.move_to_end(user_id)
+            return dict(user)
+
+    def store(
+        self,
+        version: int,
+        user: dict | None,
+        username: str | None = None,
+        written: bool = False,
+    ) -> None:
+        """Remember ``user`` (or that ``username`` is free) as of ``version``.
+
+        ``version`` must be read before the row, or after the caller's own
+        write in the same transaction (``written``), so a row is never
+        newer than the version it is stored under.
+        """
+        path = str(get_db_path())
+        with self._lock:
+            expected = None if self._version is None else self._version + written
+            if path != self._path or expected is None or version > expected:
+                # Something changed that this cache did not see.
+                self._reset(path, version)
+            elif version < expected:
+                return  # read before a change the cache already holds
+            self._version = version
+            if user is None:
+                self._put(self._by_username, username, None)
+                return
+            stale = self._by_id.get(user["id"])
+            if stale is not None and stale["username"] != user["username"]:
+                self._by_username.pop(stale["username"], None)
+            self._put(self._by_id, user["id"], dict(user))
+            self._put(self._by_username, user["username"], user["id"])
+
+    def _put(self, entries: OrderedDict, key, value) -> None:
+        entries[key] = value
+        entries.move_to_end(key)
+        while len(entries) > _user_cache_size():
+            evicted_key, evicted = entries.popitem(last=False)
+            if entries is self._by_id:
+                # Keep the username map pointing only at cached rows.
+                self._by_username.pop(evicted["username"], None)
+
+
+_user_cache = _UserCache()
+
+
+def clear_user_cache() -> None:
+    _user_cache.clear()
+
+
+def _public_user(user: dict) -> dict:
+    return {key: value for key, value in user.items() if key != "password_hash"}
+
+
+def create_user(username: str, password_hash: str, display_name: str = "") -> dict:
+    """Insert a user; raises ``sqlite3.IntegrityError`` if the name is taken."""
+    with get_connection() as connection:
+        try:
+            row = connection.execute(
+                f"""
+                INSERT INTO users (username, password_hash, display_name) VALUES (?, ?, ?)
+                RETURNING {_USER_COLUMNS}
+                """,
+                (username, password_hash, display_name),
+            ).fetchone()
+        except sqlite3.IntegrityError:
+            # Whatever the cache thought about this name (often that it was
+            # free, from the caller's own check), it is out of date.
+            _user_cache.forget_username(username)
+            raise
+        user = dict(row)
+        _user_cache.store(_user_cache_version(connection), user, written=True)
+        return _public_user(user)
 
 
 def get_user_by_username(username: str) -> dict | None:
+    found, user = _user_cache.by_username(username)
+    if found:
+        return user
     with get_connection() as connection:
+        version = _user_cache_version(connection)
         row = connection.execute(
-            "SELECT id, username, password_hash, display_name FROM users WHERE username = ?",
-            (username,),
+            f"SELECT {_USER_COLUMNS} FROM users WHERE username = ?", (username,)
         ).fetchone()
-        return dict(row) if row else None
+    user = dict(row) if row else None
+    _user_cache.store(version, user, username=username)
+    return user
 
 
-def get_user_by_id(user_id: int) -> dict | None:
+def _get_user(user_id: int) -> dict | None:
+    user = _user_cache.by_id(user_id)
+    if user is not None:
+        return user
     with get_connection() as connection:
+        version = _user_cache_version(connection)
         row = connection.execute(
-            "SELECT id, username, display_name FROM users WHERE id = ?",
-            (user_id,),
+            f"SELECT {_USER_COLUMNS} FROM users WHERE id = ?", (user_id,)
         ).fetchone()
-        return dict(row) if row else None
+    if not row:
+        return None
+    user = dict(row)
+    _user_cache.store(version, user)
+    return user
 
 
-def update_user_display_name(user_id: int, display_name: str) -> dict:
+def get_user_by_id(user_id: int) -> dict | None:
+    user = _get_user(user_id)
+    return _public_user(user) if user else None
+
+
+def get_user_password_hash(user_id: int) -> str | None:
+    user = _get_user(user_id)
+    return user["password_hash"] if user else None
+
+
+def _update_user(user_id: int, column: str, value: str) -> dict:
     with get_connection() as connection:
-        connection.execute(
-            "UPDATE users SET display_name = ?, updated_at = strftime('%Y-%m-%dT%H:%M:%fZ', 'now') WHERE id = ?",
-            (display_name, user_id),
-        )
         row = connection.execute(
-            "SELECT id, username, display_name FROM users WHERE id = ?",
-            (user_id,),
+            f"""
+            UPDATE users SET {column} = ?, updated_at = strftime('%Y-%m-%dT%H:%M:%fZ', 'now')
+            WHERE id = ?
+            RETURNING {_USER_COLUMNS}
+            """,
+            (value, user_id),
         ).fetchone()
-        return dict(row)
+        if not row:
+            raise ValueError("User not found")
+        user = dict(row)
+        _user_cache.store(_user_cache_version(connection), user, written=True)
+        return user
+
+
+def update_user_display_name(user_id: int, display_name: str) -> dict:
+    return _public_user(_update_user(user_id, "display_name", display_name))
 
 
 def update_user_password(user_id: int, password_hash: str) -> None:
-    with get_connection() as connection:
-        connection.execute(
-            "UPDATE users SET password_hash = ?, updated_at = strftime('%Y-%m-%dT%H:%M:%fZ', 'now') WHERE id = ?",
-            (password_hash, user_id),
-        )
+    _update_user(user_id, "password_hash", password_hash)
 
 
 # ── Board operations ─────────────────────────────────────────────────────
 
 
-def create_board(user_id: int, name: str, board_json: dict | None = None) -> dict:
+def create_board(
+    user_id: int,
+    name: str,
+    board_json: dict | None = None,
+    template_id: str | None = None,
+) -> dict:
+    """Create a board holding ``board_json``, or else backed by a template.
+
+    A template-backed board shares the template's content until its first
+    write, so creating one inserts no board blob and no history.
+    """
     board_id = f"board-{uuid.uuid4()}"
-    data = board_json if board_json is not None else default_board()
-    with get_connection() as connection:
-        connection.execute(
-            "INSERT INTO boards (id, user_id, name, board_json) VALUES (?, ?, ?, ?)",
-            (board_id, user_id, name, json.dumps(data)),
-        )
+    with get_board_connection(user_id) as connection:
+        if board_json is not None:
+            serialized = json.dumps(board_json)
+            connection.execute(
+                "INSERT INTO boards (id, user_id, name, board_json) VALUES (?, ?, ?, ?)",
+                (board_id, user_id, name, serialized),
+            )
+            connection.execute(
+                "INSERT INTO board_events (board_id, version, kind, payload) VALUES (?, 1, 'snapshot', ?)",
+                (board_id, serialized),
+            )
+            data = board_json
+        else:
+            template_id = template_id or DEFAULT_TEMPLATE_ID
+            data = _template_board(connection, template_id, user_id)
+            connection.execute(
+                "INSERT INTO boards (id, user_id, name, board_json, template_id) VALUES (?, ?, ?, 'null', ?)",
+                (board_id, user_id, name, template_id),
+            )
+        _index_board(connection, user_id, board_id, data)
         row = connection.execute(
-            "SELECT id, name, board_json, created_at, updated_at FROM boards WHERE id = ?",
+            "SELECT id, name, version, created_at, updated_at FROM boards WHERE id = ?",
             (board_id,),
         ).fetchone()
         result = dict(row)
-        result["board_json"] = json.loads(result["board_json"])
+        result["board_json"] = data
         return result
 
 
 def get_boards_for_user(user_id: int) -> list[dict]:
-    with get_connection() as connection:
+    with get_board_connection(user_id) as connection:
         rows = connection.execute(
             "SELECT id, name, created_at, updated_at FROM boards WHERE user_id = ? ORDER BY created_at",
             (user_id,),
@@ -227,42 +854,330 @@ def get_boards_for_user(user_id: int) -> list[dict]:
 
 
 def get_board(board_id: str, user_id: int) -> dict | None:
-    with get_connection() as connection:
+    with get_board_connection(user_id) as connection:
         row = connection.execute(
-            "SELECT id, name, board_json, created_at, updated_at FROM boards WHERE id = ? AND user_id = ?",
+            """
+            SELECT id, name, board_json, order_stale, version, created_at, updated_at
+            FROM board_contents WHERE id = ? AND user_id = ?
+            """,
             (board_id, user_id),
         ).fetchone()
         if not row:
             return None
-        result = dict(row)
-        result["board_json"] = json.loads(result["board_json"])
-        return result
+        return _board_result(connection, row)
 
 
-def update_board(board_id: str, user_id: int, board_json: dict) -> dict:
-    with get_connection() as connection:
-        cursor = connection.execute(
-            """
-            UPDATE boards SET
-                board_json = ?,
-                updated_at = strftime('%Y-%m-%dT%H:%M:%fZ', 'now')
-            WHERE id = ? AND user_id = ?
+def _board_result(connection: sqlite3.Connection, row: sqlite3.Row) -> dict:
+    result = dict(row)
+    result["board_json"] = _load_board_json(connection, row)
+    del result["order_stale"]
+    return result
+
+
+def _load_board_json(connection: sqlite3.Connection, row: sqlite3.Row) -> dict:
+    board = json.loads(row["board_json"])
+    return _with_ranked_order(connection, row["id"], board) if row["order_stale"] else board
+
+
+def get_board_outline(board_id: str, user_id: int) -> dict | None:
+    """A board's metadata and columns without decoding any card."""
+    with get_board_connection(user_id) as connection:
+        row = connection.execute(
+            """
+            SELECT b.id, b.name, b.version, b.created_at, b.updated_at, b.order_stale,
+                   o.columns_json AS columns
+            FROM boards b JOIN board_outlines o ON o.board_id = b.id
+            WHERE b.id = ? AND b.user_id = ?
+            """,
+            (board_id, user_id),
+        ).fetchone()
+        if not row:
+            return None
+        result = dict(row)
+        result["columns"] = json.loads(result["columns"])
+        if result.pop("order_stale"):
+            result["columns"] = _with_ranked_order(connection, board_id, result)["columns"]
+        return result
+
+
+def get_card_headers(board_id: str, user_id: int, card_ids: list[str]) -> dict[str, dict]:
+    """Title, labels, priority and due date of ``card_ids``, from card_index."""
+    if not card_ids:
+        return {}
+    with get_board_connection(user_id) as connection:
+        rows = connection.execute(
+            """
+            SELECT card_id AS id, title, labels, priority, due_date FROM card_index
+            WHERE board_id = ? AND user_id = ?
+              AND card_id IN (SELECT value FROM json_each(?))
+            """,
+            (board_id, user_id, json.dumps(card_ids)),
+        ).fetchall()
+    headers = {}
+    for row in rows:
+        header = dict(row)
+        header["labels"] = json.loads(header["labels"])
+        headers[header["id"]] = header
+    return headers
+
+
+def get_card(board_id: str, user_id: int, card_id: str) -> dict | None:
+    with get_board_connection(user_id) as connection:
+        row = connection.execute(
+            """
+            SELECT c.value FROM board_contents b, json_each(b.board_json, '$.cards') c
+            WHERE b.id = ? AND b.user_id = ? AND c.key = ?
             """,
-            (json.dumps(board_json), board_id, user_id),
+            (board_id, user_id, card_id),
+        ).fetchone()
+    return json.loads(row["value"]) if row else None
+
+
+def update_board(board_id: str, user_id: int, board_json: dict) -> dict:
+    return modify_board(board_id, user_id, lambda _current: board_json)
+
+
+def modify_board(board_id: str, user_id: int, change: Callable[[dict], dict]) -> dict:
+    """Replace a board with ``change(current_board)`` in one transaction.
+
+    ``change`` must not mutate its argument. Any exception it raises rolls
+    the transaction back and propagates to the caller.
+    """
+    with get_board_connection(user_id) as connection:
+        # Take the write lock up front so the version read below cannot race
+        # another writer.
+        connection.execute("BEGIN IMMEDIATE")
+        return _write_board(connection, board_id, user_id, change)
+
+
+def _write_board(
+    connection: sqlite3.Connection,
+    board_id: str,
+    user_id: int,
+    change: Callable[[dict], dict | None],
+) -> dict | None:
+    """The body of ``modify_board``, inside a transaction the caller opened.
+
+    Returns None without writing if ``change`` returns None.
+    """
+    current = connection.execute(
+        """
+        SELECT id, board_json, version, template_id, order_stale
+        FROM board_contents WHERE id = ? AND user_id = ?
+        """,
+        (board_id, user_id),
+    ).fetchone()
+    if not current:
+        raise ValueError("Board not found")
+
+    current_board = _load_board_json(connection, current)
+    board_json = change(current_board)
+    if board_json is None:
+        return None
+    if current["template_id"] is not None:
+        # First write to a template-backed board: its history starts from
+        # the template content.
+        connection.execute(
+            "INSERT INTO board_events (board_id, version, kind, payload) VALUES (?, ?, 'snapshot', ?)",
+            (board_id, current["version"], current["board_json"]),
         )
-        if cursor.rowcount == 0:
+    version = current["version"] + 1
+    serialized = json.dumps(board_json)
+    connection.execute(
+        """
+        UPDATE boards SET
+            board_json = ?,
+            template_id = NULL,
+            order_stale = 0,
+            version = ?,
+            updated_at = strftime('%Y-%m-%dT%H:%M:%fZ', 'now')
+        WHERE id = ?
+        """,
+        (serialized, version, board_id),
+    )
+    delta = diff_boards(current_board, board_json)
+    _record_board_event(connection, board_id, version, delta, serialized)
+    _update_board_indexes(connection, user_id, board_id, current_board, board_json, delta)
+    row = connection.execute(
+        "SELECT id, name, version, created_at, updated_at FROM boards WHERE id = ?",
+        (board_id,),
+    ).fetchone()
+    result = dict(row)
+    result["board_json"] = board_json
+    return result
+
+
+def move_card(
+    board_id: str,
+    user_id: int,
+    card_id: str,
+    column_id: str,
+    before_id: str | None = None,
+    after_id: str | None = None,
+) -> dict:
+    """Move a card into ``column_id``, before ``before_id``, after ``after_id``
+    or else at the end of the column.
+
+    Only the card's card_index row is given a new rank; board_json keeps
+    its old cardIds (and the board is marked ``order_stale``) until the
+    next full write or history snapshot folds the ranked order back in.
+    """
+    with get_board_connection(user_id) as connection:
+        connection.execute("BEGIN IMMEDIATE")
+        board = connection.execute(
+            "SELECT version FROM boards WHERE id = ? AND user_id = ?", (board_id, user_id)
+        ).fetchone()
+        if not board:
             raise ValueError("Board not found")
+        card = connection.execute(
+            "SELECT column_id FROM card_index WHERE board_id = ? AND card_id = ?",
+            (board_id, card_id),
+        ).fetchone()
+        if not card:
+            raise ValueError("Card not found")
+        titles = {
+            row["id"]: row["title"]
+            for row in connection.execute(
+                """
+                SELECT json_extract(c.value, '$.id') AS id, json_extract(c.value, '$.title') AS title
+                FROM board_outlines o, json_each(o.columns_json) c
+                WHERE o.board_id = ?
+                """,
+                (board_id,),
+            )
+        }
+        if column_id not in titles:
+            raise BoardOperationError(f"Column '{column_id}' not found")
+        anchor = before_id or after_id
+        if anchor is not None:
+            if anchor == card_id:
+                raise BoardOperationError("A card cannot be moved next to itself")
+            anchor_column = connection.execute(
+                "SELECT column_id FROM card_index WHERE board_id = ? AND card_id = ?",
+                (board_id, anchor),
+            ).fetchone()
+            if not anchor_column or anchor_column["column_id"] != column_id:
+                raise BoardOperationError(f"Card '{anchor}' is not in column '{column_id}'")
+
+        # The card's own content is untouched, so a template-backed board
+        # only needs its own copy for the order to diverge from.
+        _materialize_template_boards(connection, "id = ?", (board_id,))
+        rank = _rank_for_move(connection, board_id, card_id, column_id, before_id, after_id)
+        connection.execute(
+            """
+            UPDATE card_index SET
+                rank = ?,
+                column_id = ?,
+                column_since = CASE WHEN column_id = ? THEN column_since
+                    ELSE strftime('%Y-%m-%dT%H:%M:%fZ', 'now') END
+            WHERE board_id = ? AND card_id = ?
+            """,
+            (rank, column_id, column_id, board_id, card_id),
+        )
+        old_title = titles.get(card["column_id"])
+        if old_title != titles[column_id]:
+            changes: Counter = Counter({("column", titles[column_id]): 1})
+            if old_title is not None:
+                changes[("column", old_title)] -= 1
+            _apply_aggregate_changes(connection, user_id, board_id, changes)
+
+        previous = connection.execute(
+            """
+            SELECT card_id FROM card_index
+            WHERE board_id = ? AND column_id = ? AND rank < ?
+            ORDER BY rank DESC LIMIT 1
+            """,
+            (board_id, column_id, rank),
+        ).fetchone()
+        version = board["version"] + 1
+        connection.execute(
+            """
+            UPDATE boards SET
+                order_stale = 1,
+                version = ?,
+                updated_at = strftime('%Y-%m-%dT%H:%M:%fZ', 'now')
+            WHERE id = ?
+            """,
+            (version, board_id),
+        )
+        if version % SNAPSHOT_INTERVAL == 0:
+            # Fold the ranked order back into board_json for the snapshot.
+            stored = connection.execute(
+                "SELECT board_json FROM boards WHERE id = ?", (board_id,)
+            ).fetchone()
+            folded = _with_ranked_order(connection, board_id, json.loads(stored["board_json"]))
+            serialized = json.dumps(folded)
+            connection.execute(
+                "UPDATE boards SET board_json = ?, order_stale = 0 WHERE id = ?",
+                (serialized, board_id),
+            )
+            _save_board_outline(connection, board_id, folded)
+            _record_board_event(connection, board_id, version, {}, serialized)
+        else:
+            move = [card_id, column_id, previous["card_id"] if previous else None]
+            connection.execute(
+                "INSERT INTO board_events (board_id, version, kind, payload) VALUES (?, ?, 'delta', ?)",
+                (board_id, version, json.dumps({"moves": [move]})),
+            )
         row = connection.execute(
-            "SELECT id, name, board_json, created_at, updated_at FROM boards WHERE id = ?",
+            "SELECT id, name, version, created_at, updated_at FROM boards WHERE id = ?",
             (board_id,),
         ).fetchone()
-        result = dict(row)
-        result["board_json"] = json.loads(result["board_json"])
-        return result
+        return {**dict(row), "card_id": card_id, "column_id": column_id, "rank": rank}
+
+
+def _rank_for_move(
+    connection: sqlite3.Connection,
+    board_id: str,
+    card_id: str,
+    column_id: str,
+    before_id: str | None,
+    after_id: str | None,
+) -> str:
+    def rank_of(other_id: str) -> str:
+        return connection.execute(
+            "SELECT rank FROM card_index WHERE board_id = ? AND card_id = ?", (board_id, other_id)
+        ).fetchone()["rank"]
+
+    def neighbour(query: str, *params: object) -> str | None:
+        return connection.execute(query, (board_id, column_id, card_id, *params)).fetchone()[0]
+
+    others = "FROM card_index WHERE board_id = ? AND column_id = ? AND card_id != ?"
+    if after_id is not None:
+        low = rank_of(after_id)
+        high = neighbour(f"SELECT MIN(rank) {others} AND rank > ?", low)
+    elif before_id is not None:
+        high = rank_of(before_id)
+        low = neighbour(f"SELECT MAX(rank) {others} AND rank < ?", high)
+    else:
+        low, high = neighbour(f"SELECT MAX(rank) {others}"), None
+    rank = rank_between(low, high)
+    if len(rank) <= MAX_RANK_LENGTH:
+        return rank
+
+    # Repeated inserts at one spot have used up the gap: respread the column.
+    order = [
+        row["card_id"]
+        for row in connection.execute(
+            f"SELECT card_id {others} ORDER BY rank", (board_id, column_id, card_id)
+        )
+    ]
+    position = len(order)
+    if after_id is not None:
+        position = order.index(after_id) + 1
+    elif before_id is not None:
+        position = order.index(before_id)
+    order.insert(position, card_id)
+    ranks = spread_ranks(len(order))
+    connection.executemany(
+        "UPDATE card_index SET rank = ? WHERE board_id = ? AND card_id = ?",
+        [(new_rank, board_id, other_id) for other_id, new_rank in zip(order, ranks) if other_id != card_id],
+    )
+    return ranks[position]
 
 
 def rename_board(board_id: str, user_id: int, name: str) -> dict:
-    with get_connection() as connection:
+    with get_board_connection(user_id) as connection:
         cursor = connection.execute(
             """
             UPDATE boards SET
@@ -282,7 +1197,7 @@ def rename_board(board_id: str, user_id: int, name: str) -> dict:
 
 
 def delete_board(board_id: str, user_id: int) -> bool:
-    with get_connection() as connection:
+    with get_board_connection(user_id) as connection:
         count = connection.execute(
             "SELECT COUNT(*) as cnt FROM boards WHERE user_id = ?",
             (user_id,),
@@ -297,20 +1212,1066 @@ def delete_board(board_id: str, user_id: int) -> bool:
         return cursor.rowcount > 0
 
 
+def import_boards(user_id: int, boards: list[tuple[str, dict]]) -> list[str]:
+    """Insert many boards in a single transaction. Returns the new board ids."""
+    rows = [
+        (f"board-{uuid.uuid4()}", user_id, name, json.dumps(board_json))
+        for name, board_json in boards
+    ]
+    with get_board_connection(user_id) as connection:
+        connection.executemany(
+            "INSERT INTO boards (id, user_id, name, board_json) VALUES (?, ?, ?, ?)",
+            rows,
+        )
+        connection.executemany(
+            "INSERT INTO board_events (board_id, version, kind, payload) VALUES (?, 1, 'snapshot', ?)",
+            [(row[0], row[3]) for row in rows],
+        )
+        for row, (_name, board_json) in zip(rows, boards):
+            _index_board(connection, user_id, row[0], board_json)
+    return [row[0] for row in rows]
+
+
+def iter_board_rows_for_user(user_id: int, batch_size: int = 100) -> Iterator[dict]:
+    """Stream a user's boards without loading them all into memory.
+
+    ``board_json`` is yielded as the stored JSON text so callers can forward
+    it without a parse/serialize round trip. The connection may be advanced
+    from different threads (Starlette iterates sync generators on its
+    threadpool), but never concurrently.
+    """
+    connection = get_board_connection(user_id, check_same_thread=False)
+    try:
+        cursor = connection.execute(
+            """
+            SELECT id, name, board_json, order_stale, created_at, updated_at
+            FROM board_contents WHERE user_id = ? ORDER BY created_at
+            """,
+            (user_id,),
+        )
+        while rows := cursor.fetchmany(batch_size):
+            for row in rows:
+                result = dict(row)
+                if result.pop("order_stale"):
+                    result["board_json"] = json.dumps(_load_board_json(connection, row))
+                yield result
+    finally:
+        connection.close()
+
+
 def get_default_board_for_user(user_id: int) -> dict:
-    with get_connection() as connection:
+    with get_board_connection(user_id) as connection:
         row = connection.execute(
-            "SELECT id, name, board_json, created_at, updated_at FROM boards WHERE user_id = ? ORDER BY created_at LIMIT 1",
+            """
+            SELECT id, name, board_json, order_stale, version, created_at, updated_at
+            FROM board_contents WHERE user_id = ? ORDER BY created_at LIMIT 1
+            """,
             (user_id,),
         ).fetchone()
         if not row:
             # Create a default board if none exists
             return create_board(user_id, "My Board")
-        result = dict(row)
-        result["board_json"] = json.loads(result["board_json"])
+        return _board_result(connection, row)
+
+
+# ── Board templates ──────────────────────────────────────────────────────
+#
+# Templates are immutable; boards created from one reference it through
+# boards.template_id until their first write (see board_contents). The
+# built-in default template has no owner and exists in every database.
+
+
+def _template_board(connection: sqlite3.Connection, template_id: str, user_id: int) -> dict:
+    row = connection.execute(
+        """
+        SELECT board_json FROM board_templates
+        WHERE id = ? AND (user_id IS NULL OR user_id = ?)
+        """,
+        (template_id, user_id),
+    ).fetchone()
+    if not row:
+        raise ValueError("Template not found")
+    return json.loads(row["board_json"])
+
+
+def list_templates(user_id: int) -> list[dict]:
+    with get_board_connection(user_id) as connection:
+        rows = connection.execute(
+            """
+            SELECT id, name, user_id IS NULL AS builtin, created_at FROM board_templates
+            WHERE user_id IS NULL OR user_id = ?
+            ORDER BY user_id IS NOT NULL, created_at
+            """,
+            (user_id,),
+        ).fetchall()
+        return [{**dict(row), "builtin": bool(row["builtin"])} for row in rows]
+
+
+def create_template(user_id: int, name: str, board_json: dict) -> dict:
+    template_id = f"template-{uuid.uuid4()}"
+    with get_board_connection(user_id) as connection:
+        connection.execute(
+            "INSERT INTO board_templates (id, user_id, name, board_json) VALUES (?, ?, ?, ?)",
+            (template_id, user_id, name, json.dumps(board_json)),
+        )
+        row = connection.execute(
+            "SELECT id, name, created_at FROM board_templates WHERE id = ?", (template_id,)
+        ).fetchone()
+        return {**dict(row), "builtin": False}
+
+
+def delete_template(template_id: str, user_id: int) -> bool:
+    """Delete one of the user's templates, first giving boards still backed
+    by it their own copy of its content."""
+    with get_board_connection(user_id) as connection:
+        connection.execute("BEGIN IMMEDIATE")
+        row = connection.execute(
+            "SELECT board_json FROM board_templates WHERE id = ? AND user_id = ?",
+            (template_id, user_id),
+        ).fetchone()
+        if not row:
+            return False
+        _materialize_template_boards(connection, "template_id = ?", (template_id,))
+        connection.execute("DELETE FROM board_templates WHERE id = ?", (template_id,))
+        return True
+
+
+def _materialize_template_boards(
+    connection: sqlite3.Connection, condition: str, params: tuple
+) -> None:
+    """Give template-backed boards matching ``condition`` their own copy of
+    the template, recorded as a snapshot of their current version."""
+    connection.execute(
+        f"""
+        INSERT INTO board_events (board_id, version, kind, payload)
+        SELECT id, version, 'snapshot', board_json FROM board_contents
+        WHERE template_id IS NOT NULL AND {condition}
+        """,
+        params,
+    )
+    connection.execute(
+        f"""
+        UPDATE boards SET
+            board_json = (SELECT t.board_json FROM board_templates t WHERE t.id = boards.template_id),
+            template_id = NULL
+        WHERE template_id IS NOT NULL AND {condition}
+        """,
+        params,
+    )
+
+
+# ── Board history ────────────────────────────────────────────────────────
+
+
+def _record_board_event(
+    connection: sqlite3.Connection,
+    board_id: str,
+    version: int,
+    delta: dict,
+    serialized: str,
+) -> None:
+    if version % SNAPSHOT_INTERVAL == 0:
+        connection.execute(
+            "INSERT INTO board_events (board_id, version, kind, payload) VALUES (?, ?, 'snapshot', ?)",
+            (board_id, version, serialized),
+        )
+        _compact_board_events(connection, board_id, version)
+        return
+
+    connection.execute(
+        "INSERT INTO board_events (board_id, version, kind, payload) VALUES (?, ?, 'delta', ?)",
+        (board_id, version, json.dumps(delta)),
+    )
+
+
+def _compact_board_events(connection: sqlite3.Connection, board_id: str, version: int) -> None:
+    """Drop events that are no longer needed to rebuild retained versions."""
+    oldest_retained = version - _history_max_versions()
+    base = connection.execute(
+        """
+        SELECT MAX(version) AS version FROM board_events
+        WHERE board_id = ? AND kind = 'snapshot' AND version <= ?
+        """,
+        (board_id, max(oldest_retained, 1)),
+    ).fetchone()["version"]
+    if base is not None:
+        connection.execute(
+            "DELETE FROM board_events WHERE board_id = ? AND version < ?",
+            (board_id, base),
+        )
+
+
+def get_board_history(
+    board_id: str, user_id: int, limit: int = 50, before: int | None = None
+) -> list[dict] | None:
+    with get_board_connection(user_id) as connection:
+        owned = connection.execute(
+            "SELECT version, template_id, created_at FROM boards WHERE id = ? AND user_id = ?",
+            (board_id, user_id),
+        ).fetchone()
+        if not owned:
+            return None
+        if owned["template_id"] is not None:
+            # Unwritten since it was created from a template: one implicit
+            # snapshot.
+            if before is not None and before <= owned["version"]:
+                return []
+            return [{"version": owned["version"], "kind": "snapshot", "created_at": owned["created_at"]}]
+        rows = connection.execute(
+            """
+            SELECT version, kind, created_at FROM board_events
+            WHERE board_id = ? AND version < ?
+            ORDER BY version DESC LIMIT ?
+            """,
+            (board_id, before if before is not None else owned["version"] + 1, limit),
+        ).fetchall()
+        return [dict(row) for row in rows]
+
+
+def get_board_version(board_id: str, user_id: int, version: int) -> dict | None:
+    """Rebuild a past version from its nearest snapshot plus later deltas."""
+    with get_board_connection(user_id) as connection:
+        board = connection.execute(
+            "SELECT version, template_id, board_json FROM board_contents WHERE id = ? AND user_id = ?",
+            (board_id, user_id),
+        ).fetchone()
+        if board and board["template_id"] is not None:
+            return json.loads(board["board_json"]) if version == board["version"] else None
+        rows = connection.execute(
+            """
+            SELECT e.version, e.kind, e.payload FROM board_events e
+            JOIN boards b ON b.id = e.board_id
+            WHERE e.board_id = ? AND b.user_id = ? AND e.version <= ?
+              AND e.version >= (
+                  SELECT MAX(version) FROM board_events
+                  WHERE board_id = ? AND kind = 'snapshot' AND version <= ?
+              )
+            ORDER BY e.version
+            """,
+            (board_id, user_id, version, board_id, version),
+        ).fetchall()
+
+    if not rows or rows[-1]["version"] != version:
+        return None
+    board = json.loads(rows[0]["payload"])
+    for row in rows[1:]:
+        board = apply_delta(board, json.loads(row["payload"]))
+    return board
+
+
+# ── Card index ───────────────────────────────────────────────────────────
+#
+# card_index mirrors each card's header (column, title, labels, due date,
+# priority) so cross-board "what's due" queries and shallow board loads
+# never parse board_json. It is kept in step with each board write from the
+# same diff that feeds history.
+
+
+def _card_columns(board: dict) -> dict[str, str]:
+    return {
+        card_id: column["id"]
+        for column in board.get("columns", [])
+        for card_id in column.get("cardIds", [])
+    }
+
+
+def _upsert_card_index(
+    connection: sqlite3.Connection,
+    user_id: int,
+    board_id: str,
+    cards: dict[str, dict],
+    columns: dict[str, str],
+    ranks: dict[str, str] | None = None,
+) -> None:
+    ranks = ranks or {}
+    connection.executemany(
+        """
+        INSERT INTO card_index
+            (board_id, card_id, user_id, column_id, title, due_date, priority, labels, rank)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT (board_id, card_id) DO UPDATE SET
+            rank = COALESCE(excluded.rank, card_index.rank),
+            column_id = excluded.column_id,
+            title = excluded.title,
+            due_date = excluded.due_date,
+            priority = excluded.priority,
+            labels = excluded.labels,
+            column_since = CASE
+                WHEN card_index.column_id IS excluded.column_id THEN card_index.column_since
+                ELSE excluded.column_since
+            END
+        """,
+        [
+            (
+                board_id,
+                card_id,
+                user_id,
+                columns.get(card_id),
+                card.get("title", ""),
+                card.get("due_date") or None,
+                card.get("priority") or "none",
+                json.dumps(card.get("labels", [])),
+                ranks.get(card_id),
+            )
+            for card_id, card in cards.items()
+        ],
+    )
+
+
+def _index_board_cards(
+    connection: sqlite3.Connection, user_id: int, board_id: str, board: dict
+) -> None:
+    ranks = {
+        card_id: rank
+        for column in board.get("columns", [])
+        for card_id, rank in zip(column["cardIds"], spread_ranks(len(column["cardIds"])))
+    }
+    _upsert_card_index(
+        connection, user_id, board_id, board.get("cards", {}), _card_columns(board), ranks
+    )
+
+
+def _update_card_index(
+    connection: sqlite3.Connection,
+    user_id: int,
+    board_id: str,
+    old_board: dict,
+    new_board: dict,
+    delta: dict,
+) -> None:
+    new_cards = new_board.get("cards", {})
+    changed = dict(delta.get("cards", {}))
+    new_columns: dict[str, str] = {}
+    reordered: list[dict] = []
+    if "columns" in delta or "column_updates" in delta:
+        # A card that only moved between columns is not in delta["cards"].
+        old_columns = _card_columns(old_board)
+        new_columns = _card_columns(new_board)
+        for card_id, column_id in new_columns.items():
+            if old_columns.get(card_id) != column_id and card_id in new_cards:
+                changed.setdefault(card_id, new_cards[card_id])
+        old_order = {column["id"]: column["cardIds"] for column in old_board.get("columns", [])}
+        reordered = [
+            column
+            for column in new_board.get("columns", [])
+            if old_order.get(column["id"]) != column["cardIds"]
+        ]
+    previous = _card_positions(
+        connection, board_id, [card_id for column in reordered for card_id in column["cardIds"]]
+    )
+    if changed:
+        _upsert_card_index(connection, user_id, board_id, changed, new_columns or _card_columns(new_board))
+    connection.executemany(
+        "DELETE FROM card_index WHERE board_id = ? AND card_id = ?",
+        [(board_id, card_id) for card_id in delta.get("removed", [])],
+    )
+    _rank_columns(connection, board_id, reordered, previous)
+
+
+def _card_positions(
+    connection: sqlite3.Connection, board_id: str, card_ids: list[str]
+) -> dict[str, tuple[str | None, str | None]]:
+    if not card_ids:
+        return {}
+    rows = connection.execute(
+        """
+        SELECT card_id, column_id, rank FROM card_index
+        WHERE board_id = ? AND card_id IN (SELECT value FROM json_each(?))
+        """,
+        (board_id, json.dumps(card_ids)),
+    )
+    return {row["card_id"]: (row["column_id"], row["rank"]) for row in rows}
+
+
+def _rank_columns(
+    connection: sqlite3.Connection,
+    board_id: str,
+    columns: list[dict],
+    previous: dict[str, tuple[str | None, str | None]],
+) -> None:
+    """Give reordered columns ranks matching their cardIds, rewriting as
+    few existing ranks as possible."""
+    updates = []
+    for column in columns:
+        kept = [
+            rank if column_id == column["id"] else None
+            for column_id, rank in (previous.get(card_id, (None, None)) for card_id in column["cardIds"])
+        ]
+        for card_id, old_rank, rank in zip(column["cardIds"], kept, rerank(kept)):
+            if rank != old_rank:
+                updates.append((rank, board_id, card_id))
+    connection.executemany("UPDATE card_index SET rank = ? WHERE board_id = ? AND card_id = ?", updates)
+
+
+def _with_ranked_order(connection: sqlite3.Connection, board_id: str, board: dict) -> dict:
+    """``board`` with each column's cardIds rebuilt from card_index ranks."""
+    order: dict[str, list[str]] = {}
+    for row in connection.execute(
+        """
+        SELECT column_id, card_id FROM card_index
+        WHERE board_id = ? AND column_id IS NOT NULL
+        ORDER BY column_id, rank
+        """,
+        (board_id,),
+    ):
+        order.setdefault(row["column_id"], []).append(row["card_id"])
+    return {
+        **board,
+        "columns": [{**column, "cardIds": order.get(column["id"], [])} for column in board["columns"]],
+    }
+
+
+def get_due_cards(
+    user_id: int,
+    before: str | None = None,
+    priorities: list[str] | None = None,
+    limit: int = 100,
+) -> list[dict]:
+    """Cards with a due date, soonest first, optionally due before ``before``."""
+    clauses = ["user_id = ?", "due_date IS NOT NULL"]
+    params: list = [user_id]
+    if before is not None:
+        clauses.append("due_date < ?")
+        params.append(before)
+    if priorities:
+        clauses.append(f"priority IN ({', '.join('?' for _ in priorities)})")
+        params.extend(priorities)
+    params.append(limit)
+    with get_board_connection(user_id) as connection:
+        rows = connection.execute(
+            f"""
+            SELECT board_id, card_id, column_id, title, due_date, priority
+            FROM card_index
+            WHERE {' AND '.join(clauses)}
+            ORDER BY due_date, {PRIORITY_RANK_SQL}, board_id, card_id
+            LIMIT ?
+            """,
+            params,
+        ).fetchall()
+        return [dict(row) for row in rows]
+
+
+# ── Board aggregates ─────────────────────────────────────────────────────
+#
+# board_aggregates holds, per board, how many cards sit in each column (by
+# title, so boards built from the same layout line up), at each priority and
+# under each label. Writes adjust only the counts of the cards in the diff.
+
+
+def _card_facets(card: dict, column_title: str | None) -> list[tuple[str, str]]:
+    facets = [("priority", card.get("priority") or "none")]
+    if column_title is not None:
+        facets.append(("column", column_title))
+    facets.extend(("label", label["text"]) for label in card.get("labels", []))
+    return facets
+
+
+def _card_column_titles(board: dict) -> dict[str, str]:
+    return {
+        card_id: column["title"]
+        for column in board.get("columns", [])
+        for card_id in column.get("cardIds", [])
+    }
+
+
+def _apply_aggregate_changes(
+    connection: sqlite3.Connection, user_id: int, board_id: str, changes: Counter
+) -> None:
+    connection.executemany(
+        """
+        INSERT INTO board_aggregates (board_id, dimension, key, user_id, count)
+        VALUES (?, ?, ?, ?, ?)
+        ON CONFLICT (board_id, dimension, key) DO UPDATE SET count = count + excluded.count
+        """,
+        [
+            (board_id, dimension, key, user_id, count)
+            for (dimension, key), count in changes.items()
+            if count
+        ],
+    )
+    connection.execute(
+        "DELETE FROM board_aggregates WHERE board_id = ? AND count <= 0", (board_id,)
+    )
+
+
+def _aggregate_board(
+    connection: sqlite3.Connection, user_id: int, board_id: str, board: dict
+) -> None:
+    titles = _card_column_titles(board)
+    changes: Counter = Counter()
+    for card_id, card in board.get("cards", {}).items():
+        changes.update(_card_facets(card, titles.get(card_id)))
+    _apply_aggregate_changes(connection, user_id, board_id, changes)
+
+
+def _update_board_aggregates(
+    connection: sqlite3.Connection,
+    user_id: int,
+    board_id: str,
+    old_board: dict,
+    new_board: dict,
+    delta: dict,
+) -> None:
+    old_cards = old_board.get("cards", {})
+    new_cards = new_board.get("cards", {})
+    affected = set(delta.get("cards", {})) | set(delta.get("removed", []))
+    if "columns" in delta or "column_updates" in delta:
+        old_titles = _card_column_titles(old_board)
+        new_titles = _card_column_titles(new_board)
+        affected.update(
+            card_id
+            for card_id in old_titles.keys() | new_titles.keys()
+            if old_titles.get(card_id) != new_titles.get(card_id)
+        )
+    elif affected:
+        old_titles = new_titles = _card_column_titles(new_board)
+    if not affected:
+        return
+
+    changes: Counter = Counter()
+    for card_id in affected:
+        if card_id in old_cards:
+            changes.subtract(_card_facets(old_cards[card_id], old_titles.get(card_id)))
+        if card_id in new_cards:
+            changes.update(_card_facets(new_cards[card_id], new_titles.get(card_id)))
+    _apply_aggregate_changes(connection, user_id, board_id, changes)
+
+
+def get_dashboard(user_id: int) -> dict:
+    """Card counts per column title, priority and label across all boards."""
+    dashboard: dict = {"boards": [], "columns": {}, "priorities": {}, "labels": {}}
+    sections = {"column": "columns", "priority": "priorities", "label": "labels"}
+    with get_board_connection(user_id) as connection:
+        for row in connection.execute(
+            """
+            SELECT dimension, key, SUM(count) AS count FROM board_aggregates
+            WHERE user_id = ?
+            GROUP BY dimension, key
+            ORDER BY dimension, key
+            """,
+            (user_id,),
+        ):
+            dashboard[sections[row["dimension"]]][row["key"]] = row["count"]
+        # Every card has exactly one priority, so those rows give the total.
+        rows = connection.execute(
+            """
+            SELECT b.id, b.name, COALESCE(SUM(a.count), 0) AS cards
+            FROM boards b
+            LEFT JOIN board_aggregates a ON a.board_id = b.id AND a.dimension = 'priority'
+            WHERE b.user_id = ?
+            GROUP BY b.id
+            ORDER BY b.created_at
+            """,
+            (user_id,),
+        ).fetchall()
+    dashboard["boards"] = [dict(row) for row in rows]
+    return dashboard
+
+
+# ── Derived board tables ─────────────────────────────────────────────────
+
+
+def _save_board_outline(connection: sqlite3.Connection, board_id: str, board: dict) -> None:
+    connection.execute(
+        "INSERT OR REPLACE INTO board_outlines (board_id, columns_json) VALUES (?, ?)",
+        (board_id, json.dumps(board.get("columns", []))),
+    )
+
+
+def _index_board(connection: sqlite3.Connection, user_id: int, board_id: str, board: dict) -> None:
+    _save_board_outline(connection, board_id, board)
+    _index_board_cards(connection, user_id, board_id, board)
+    _aggregate_board(connection, user_id, board_id, board)
+
+
+def _update_board_indexes(
+    connection: sqlite3.Connection,
+    user_id: int,
+    board_id: str,
+    old_board: dict,
+    new_board: dict,
+    delta: dict,
+) -> None:
+    if "columns" in delta or "column_updates" in delta:
+        _save_board_outline(connection, board_id, new_board)
+    _update_card_index(connection, user_id, board_id, old_board, new_board, delta)
+    _update_board_aggregates(connection, user_id, board_id, old_board, new_board, delta)
+    old_cards = old_board.get("cards", {})
+    added = [card_id for card_id in delta.get("cards", {}) if card_id not in old_cards]
+    if added:
+        # A card put back on the board (restore, revert, or a client that
+        # still had it) is no longer archived.
+        connection.execute(
+            "DELETE FROM archived_cards WHERE board_id = ? AND card_id IN (SELECT value FROM json_each(?))",
+            (board_id, json.dumps(added)),
+        )
+
+
+def rebuild_board_indexes(connection: sqlite3.Connection, user_id: int | None = None) -> int:
+    """Recompute board_outlines, card_index and board_aggregates from board_json.
+
+    Returns the number of boards reindexed.
+    """
+    where, params = ("WHERE user_id = ?", (user_id,)) if user_id is not None else ("", ())
+    connection.execute("BEGIN IMMEDIATE")
+    # card_index rows are upserted rather than recreated so each card keeps
+    # the time it entered its column.
+    connection.execute(f"DELETE FROM board_aggregates {where}", params)
+    rows = connection.execute(
+        f"SELECT id, user_id, board_json, order_stale FROM board_contents {where}", params
+    ).fetchall()
+    for row in rows:
+        # A board with rank-only moves takes its order from card_index.
+        board = _load_board_json(connection, row)
+        connection.execute(
+            "DELETE FROM card_index WHERE board_id = ? AND card_id NOT IN (SELECT value FROM json_each(?))",
+            (row["id"], json.dumps(list(board.get("cards", {})))),
+        )
+        _index_board(connection, row["user_id"], row["id"], board)
+    return len(rows)
+
+
+# ── Card archive ─────────────────────────────────────────────────────────
+#
+# Archived cards are moved out of board_json into archived_cards so that
+# long-lived boards stay small. Archiving and restoring are ordinary board
+# writes, so history, card_index and board_aggregates follow along.
+
+
+def archive_cards(board_id: str, user_id: int, card_ids: list[str]) -> list[str]:
+    """Move ``card_ids`` from the board into archived_cards. Returns those moved."""
+    archived: list[tuple] = []
+
+    def change(board: dict) -> dict | None:
+        titles = {column["id"]: column["title"] for column in board.get("columns", [])}
+        columns = _card_columns(board)
+        for card_id in dict.fromkeys(card_ids):
+            card = board.get("cards", {}).get(card_id)
+            if card is None:
+                continue
+            column_id = columns.get(card_id)
+            archived.append(
+                (
+                    board_id,
+                    card_id,
+                    user_id,
+                    column_id,
+                    titles.get(column_id),
+                    card.get("title", ""),
+                    json.dumps(card),
+                )
+            )
+        if not archived:
+            return None
+        moved = {row[1] for row in archived}
+        return {
+            **board,
+            "columns": [
+                {**column, "cardIds": [card_id for card_id in column["cardIds"] if card_id not in moved]}
+                for column in board.get("columns", [])
+            ],
+            "cards": {card_id: card for card_id, card in board["cards"].items() if card_id not in moved},
+        }
+
+    with get_board_connection(user_id) as connection:
+        connection.execute("BEGIN IMMEDIATE")
+        _write_board(connection, board_id, user_id, change)
+        connection.executemany(
+            """
+            INSERT OR REPLACE INTO archived_cards
+                (board_id, card_id, user_id, column_id, column_title, title, card_json)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+            """,
+            archived,
+        )
+    return [row[1] for row in archived]
+
+
+def restore_archived_card(board_id: str, user_id: int, card_id: str) -> dict | None:
+    """Put an archived card back at the end of its column (or the first one).
+
+    Returns the updated board, or None if the card is not archived.
+    """
+    with get_board_connection(user_id) as connection:
+        connection.execute("BEGIN IMMEDIATE")
+        row = connection.execute(
+            "SELECT column_id, card_json FROM archived_cards WHERE board_id = ? AND card_id = ? AND user_id = ?",
+            (board_id, card_id, user_id),
+        ).fetchone()
+        if not row:
+            return None
+
+        def change(board: dict) -> dict:
+            columns = board.get("columns", [])
+            if not columns:
+                raise ValueError("Board has no columns")
+            if card_id in board.get("cards", {}):
+                return board
+            target = next((column for column in columns if column["id"] == row["column_id"]), columns[0])
+            return {
+                **board,
+                "columns": [
+                    {**column, "cardIds": [*column["cardIds"], card_id]} if column is target else column
+                    for column in columns
+                ],
+                "cards": {**board.get("cards", {}), card_id: json.loads(row["card_json"])},
+            }
+
+        result = _write_board(connection, board_id, user_id, change)
+        connection.execute(
+            "DELETE FROM archived_cards WHERE board_id = ? AND card_id = ?", (board_id, card_id)
+        )
         return result
 
 
+def search_archived_cards(
+    user_id: int,
+    query: str | None = None,
+    board_id: str | None = None,
+    limit: int = 50,
+    before: str | None = None,
+) -> list[dict]:
+    """Archived cards, newest first, optionally matching ``query`` in title or details."""
+    clauses = ["user_id = ?"]
+    params: list = [user_id]
+    if board_id is not None:
+        clauses.append("board_id = ?")
+        params.append(board_id)
+    if before is not None:
+        clauses.append("archived_at < ?")
+        params.append(before)
+    if query:
+        pattern = "%" + query.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+        clauses.append(
+            "(title LIKE ? ESCAPE '\\' OR json_extract(card_json, '$.details') LIKE ? ESCAPE '\\')"
+        )
+        params.extend([pattern, pattern])
+    params.append(limit)
+    with get_board_connection(user_id) as connection:
+        rows = connection.execute(
+            f"""
+            SELECT board_id, card_id, column_id, column_title, card_json, archived_at
+            FROM archived_cards
+            WHERE {' AND '.join(clauses)}
+            ORDER BY archived_at DESC, card_id
+            LIMIT ?
+            """,
+            params,
+        ).fetchall()
+    results = []
+    for row in rows:
+        result = dict(row)
+        result["card"] = json.loads(result.pop("card_json"))
+        results.append(result)
+    return results
+
+
+def find_archivable_cards(
+    connection: sqlite3.Connection, older_than: str, column_titles: set[str], limit: int
+) -> list[tuple[int, str, list[str]]]:
+    """Cards that entered a column titled in ``column_titles`` before ``older_than``.
+
+    Titles are compared case-insensitively. Returns (user_id, board_id,
+    card_ids) groups holding at most ``limit`` cards in total.
+    """
+    found: list[tuple[int, str, list[str]]] = []
+    remaining = limit
+    boards = connection.execute(
+        "SELECT DISTINCT user_id, board_id FROM card_index WHERE column_since < ?",
+        (older_than,),
+    ).fetchall()
+    for board in boards:
+        outline = connection.execute(
+            "SELECT columns_json FROM board_outlines WHERE board_id = ?", (board["board_id"],)
+        ).fetchone()
+        if outline is None:
+            continue
+        column_ids = [
+            column["id"]
+            for column in json.loads(outline["columns_json"])
+            if column["title"].strip().lower() in column_titles
+        ]
+        if not column_ids:
+            continue
+        card_ids = [
+            row["card_id"]
+            for row in connection.execute(
+                f"""
+                SELECT card_id FROM card_index
+                WHERE board_id = ? AND column_since < ?
+                  AND column_id IN ({', '.join('?' for _ in column_ids)})
+                ORDER BY column_since
+                LIMIT ?
+                """,
+                (board["board_id"], older_than, *column_ids, remaining),
+            )
+        ]
+        if card_ids:
+            found.append((board["user_id"], board["board_id"], card_ids))
+            remaining -= len(card_ids)
+            if remaining <= 0:
+                break
+    return found
+
+
+# ── AI jobs ──────────────────────────────────────────────────────────────
+
+_AI_JOB_COLUMNS = "id, status, result_json, error, status_code, created_at, updated_at"
+
+
+def _ai_job_from_row(row: sqlite3.Row) -> dict:
+    result = dict(row)
+    result_json = result.pop("result_json")
+    result["result"] = json.loads(result_json) if result_json is not None else None
+    return result
+
+
+def create_ai_job(user_id: int, dedupe_key: str, request: dict) -> tuple[dict, bool]:
+    """Queue a job, or return the caller's identical job that has not finished.
+
+    Returns ``(job, created)``.
+    """
+    with get_connection() as connection:
+        connection.execute("BEGIN IMMEDIATE")
+        existing = connection.execute(
+            f"""
+            SELECT {_AI_JOB_COLUMNS} FROM ai_jobs
+            WHERE user_id = ? AND dedupe_key = ? AND status IN ('pending', 'running')
+            """,
+            (user_id, dedupe_key),
+        ).fetchone()
+        if existing:
+            return _ai_job_from_row(existing), False
+
+        job_id = f"job-{uuid.uuid4()}"
+        connection.execute(
+            "INSERT INTO ai_jobs (id, user_id, dedupe_key, request_json) VALUES (?, ?, ?, ?)",
+            (job_id, user_id, dedupe_key, json.dumps(request)),
+        )
+        row = connection.execute(
+            f"SELECT {_AI_JOB_COLUMNS} FROM ai_jobs WHERE id = ?", (job_id,)
+        ).fetchone()
+        return _ai_job_from_row(row), True
+
+
+def get_ai_job(job_id: str, user_id: int) -> dict | None:
+    with get_connection() as connection:
+        row = connection.execute(
+            f"SELECT {_AI_JOB_COLUMNS} FROM ai_jobs WHERE id = ? AND user_id = ?",
+            (job_id, user_id),
+        ).fetchone()
+        return _ai_job_from_row(row) if row else None
+
+
+def _lease_expiry(lease_seconds: float) -> str:
+    return f"+{lease_seconds:.3f} seconds"
+
+
+def claim_next_ai_job(worker_id: str, lease_seconds: float) -> dict | None:
+    """Lease the oldest pending job to ``worker_id`` and return it with its request."""
+    with get_connection() as connection:
+        connection.execute("BEGIN IMMEDIATE")
+        row = connection.execute(
+            """
+            SELECT id, user_id, request_json FROM ai_jobs
+            WHERE status = 'pending' ORDER BY created_at LIMIT 1
+            """
+        ).fetchone()
+        if not row:
+            return None
+        connection.execute(
+            """
+            UPDATE ai_jobs SET
+                status = 'running',
+                worker_id = ?,
+                lease_expires_at = strftime('%Y-%m-%dT%H:%M:%fZ', 'now', ?),
+                updated_at = strftime('%Y-%m-%dT%H:%M:%fZ', 'now')
+            WHERE id = ?
+            """,
+            (worker_id, _lease_expiry(lease_seconds), row["id"]),
+        )
+        return {"id": row["id"], "user_id": row["user_id"], "request": json.loads(row["request_json"])}
+
+
+def renew_ai_job_leases(worker_id: str, lease_seconds: float) -> int:
+    """Extend the lease of every job ``worker_id`` is still running."""
+    with get_connection() as connection:
+        cursor = connection.execute(
+            """
+            UPDATE ai_jobs SET lease_expires_at = strftime('%Y-%m-%dT%H:%M:%fZ', 'now', ?)
+            WHERE worker_id = ? AND status = 'running'
+            """,
+            (_lease_expiry(lease_seconds), worker_id),
+        )
+        return cursor.rowcount
+
+
+def finish_ai_job(
+    job_id: str,
+    status: str,
+    result: dict | None = None,
+    error: str | None = None,
+    status_code: int | None = None,
+    worker_id: str | None = None,
+) -> bool:
+    """Record a running job's outcome. Returns False if it was cancelled meanwhile.
+
+    With ``worker_id``, also False if the job's lease passed to another worker.
+    """
+    owner_clause = "" if worker_id is None else "AND worker_id = ?"
+    owner_params = () if worker_id is None else (worker_id,)
+    with get_connection() as connection:
+        cursor = connection.execute(
+            f"""
+            UPDATE ai_jobs SET
+                status = ?,
+                result_json = ?,
+                error = ?,
+                status_code = ?,
+                lease_expires_at = NULL,
+                updated_at = strftime('%Y-%m-%dT%H:%M:%fZ', 'now')
+            WHERE id = ? AND status = 'running' {owner_clause}
+            """,
+            (status, json.dumps(result) if result is not None else None, error, status_code, job_id, *owner_params),
+        )
+        return cursor.rowcount > 0
+
+
+def cancel_ai_job(job_id: str, user_id: int) -> dict | None:
+    with get_connection() as connection:
+        connection.execute(
+            """
+            UPDATE ai_jobs SET status = 'cancelled', updated_at = strftime('%Y-%m-%dT%H:%M:%fZ', 'now')
+            WHERE id = ? AND user_id = ? AND status IN ('pending', 'running')
+            """,
+            (job_id, user_id),
+        )
+        row = connection.execute(
+            f"SELECT {_AI_JOB_COLUMNS} FROM ai_jobs WHERE id = ? AND user_id = ?",
+            (job_id, user_id),
+        ).fetchone()
+        return _ai_job_from_row(row) if row else None
+
+
+def is_ai_job_cancelled(job_id: str) -> bool:
+    with get_connection() as connection:
+        row = connection.execute("SELECT status FROM ai_jobs WHERE id = ?", (job_id,)).fetchone()
+        return row is None or row["status"] == "cancelled"
+
+
+def requeue_running_ai_jobs() -> int:
+    """Put running jobs whose lease has lapsed (their worker died) back in the queue.
+
+    Jobs another live process is working on keep renewing their lease and
+    are left alone. Rows from before leases existed have none and count as
+    lapsed.
+    """
+    with get_connection() as connection:
+        cursor = connection.execute(
+            """
+            UPDATE ai_jobs SET
+                status = 'pending',
+                worker_id = NULL,
+                lease_expires_at = NULL,
+                updated_at = strftime('%Y-%m-%dT%H:%M:%fZ', 'now')
+            WHERE status = 'running'
+              AND (lease_expires_at IS NULL OR lease_expires_at <= strftime('%Y-%m-%dT%H:%M:%fZ', 'now'))
+            """
+        )
+        return cursor.rowcount
+
+
+def count_pending_ai_jobs() -> int:
+    with get_connection() as connection:
+        return connection.execute(
+            "SELECT COUNT(*) AS cnt FROM ai_jobs WHERE status = 'pending'"
+        ).fetchone()["cnt"]
+
+
+# ── AI conversations ─────────────────────────────────────────────────────
+
+
+def create_ai_conversation(
+    user_id: int, board_id: str, turns: list[tuple[str, str]] | None = None
+) -> dict:
+    """Create a conversation, together with its first ``turns`` if given."""
+    conversation_id = f"conv-{uuid.uuid4()}"
+    with get_board_connection(user_id) as connection:
+        connection.execute(
+            "INSERT INTO ai_conversations (id, user_id, board_id) VALUES (?, ?, ?)",
+            (conversation_id, user_id, board_id),
+        )
+        connection.executemany(
+            "INSERT INTO ai_conversation_turns (conversation_id, seq, role, content) VALUES (?, ?, ?, ?)",
+            [(conversation_id, seq, role, content) for seq, (role, content) in enumerate(turns or (), start=1)],
+        )
+        row = connection.execute(
+            "SELECT id, board_id, summary, summarized_through, created_at, updated_at FROM ai_conversations WHERE id = ?",
+            (conversation_id,),
+        ).fetchone()
+        return dict(row)
+
+
+def get_ai_conversation(conversation_id: str, user_id: int) -> dict | None:
+    with get_board_connection(user_id) as connection:
+        row = connection.execute(
+            """
+            SELECT id, board_id, summary, summarized_through, created_at, updated_at
+            FROM ai_conversations WHERE id = ? AND user_id = ?
+            """,
+            (conversation_id, user_id),
+        ).fetchone()
+        return dict(row) if row else None
+
+
+def get_ai_conversation_turns(conversation_id: str, user_id: int, after_seq: int = 0) -> list[dict]:
+    with get_board_connection(user_id) as connection:
+        rows = connection.execute(
+            """
+            SELECT seq, role, content, created_at FROM ai_conversation_turns
+            WHERE conversation_id = ? AND seq > ? ORDER BY seq
+            """,
+            (conversation_id, after_seq),
+        ).fetchall()
+        return [dict(row) for row in rows]
+
+
+def append_ai_conversation_turns(
+    conversation_id: str, user_id: int, turns: list[tuple[str, str]]
+) -> None:
+    with get_board_connection(user_id) as connection:
+        connection.execute("BEGIN IMMEDIATE")
+        last = connection.execute(
+            "SELECT COALESCE(MAX(seq), 0) AS seq FROM ai_conversation_turns WHERE conversation_id = ?",
+            (conversation_id,),
+        ).fetchone()["seq"]
+        connection.executemany(
+            "INSERT INTO ai_conversation_turns (conversation_id, seq, role, content) VALUES (?, ?, ?, ?)",
+            [
+                (conversation_id, last + offset, role, content)
+                for offset, (role, content) in enumerate(turns, start=1)
+            ],
+        )
+        connection.execute(
+            "UPDATE ai_conversations SET updated_at = strftime('%Y-%m-%dT%H:%M:%fZ', 'now') WHERE id = ?",
+            (conversation_id,),
+        )
+
+
+def update_ai_conversation_summary(
+    conversation_id: str, user_id: int, summary: str, summarized_through: int
+) -> None:
+    with get_board_connection(user_id) as connection:
+        # Never move the watermark backwards if two turns raced to summarize.
+        connection.execute(
+            """
+            UPDATE ai_conversations SET summary = ?, summarized_through = ?
+            WHERE id = ? AND summarized_through < ?
+            """,
+            (summary, summarized_through, conversation_id, summarized_through),
+        )
+
+
 # ── Legacy compatibility ─────────────────────────────────────────────────
 
 
@@ -0,0 +1,191 @@
+import asyncio
+import os
+import threading
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from typing import ParamSpec, TypeVar
+
+from app import db
+from app.metrics import metrics
+
+P = ParamSpec("P")
+T = TypeVar("T")
+
+
+def _db_threads() -> int:
+    return int(os.getenv("PM_DB_THREADS", "8"))
+
+
+# SQLite allows one writer at a time per file, so a handful of threads
+# keeps the database busy; extra requests wait here rather than tying up
+# Starlette's shared threadpool.
+_threads = _db_threads()
+_executor = ThreadPoolExecutor(max_workers=_threads, thread_name_prefix="db")
+
+# Call counters. ``run`` is awaited from the app loop and from the AI job
+# threads' own loops, so they are only touched under the lock.
+_stats_lock = threading.Lock()
+_submitted = 0
+_started = 0
+_finished = 0
+_abandoned = 0
+
+
+async def run(fn: Callable[P, T], *args: P.args, **kwargs: P.kwargs) -> T:
+    """Run a blocking ``app.db`` call on the dedicated DB executor."""
+    global _submitted, _abandoned
+    state = {"started": False, "abandoned": False}
+
+    def call() -> T:
+        global _started, _finished, _abandoned
+        with _stats_lock:
+            state["started"] = True
+            _started += 1
+            if state["abandoned"]:
+                # The caller gave up just as a thread picked the call up.
+                _abandoned -= 1
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            with _stats_lock:
+                _finished += 1
+
+    loop = asyncio.get_running_loop()
+    with _stats_lock:
+        _submitted += 1
+    try:
+        return await loop.run_in_executor(_executor, call)
+    finally:
+        with _stats_lock:
+            if not state["started"]:
+                # Cancelled while still queued: the executor drops it.
+                state["abandoned"] = True
+                _abandoned += 1
+
+
+def executor_stats() -> dict:
+    with _stats_lock:
+        running = _started - _finished
+        queued = _submitted - _started - _abandoned
+        return {
+            "threads": _threads,
+            "submitted": _submitted,
+            "finished": _finished,
+            "running": running,
+            "queued": queued,
+            "in_flight": running + queued,
+        }
+
+
+metrics.register("db_executor", executor_stats)
+
+
+async def get_board(board_id: str, user_id: int) -> dict | None:
+    return await run(db.get_board, board_id, user_id)
+
+
+async def get_board_outline(board_id: str, user_id: int) -> dict | None:
+    return await run(db.get_board_outline, board_id, user_id)
+
+
+async def get_card_headers(board_id: str, user_id: int, card_ids: list[str]) -> dict[str, dict]:
+    return await run(db.get_card_headers, board_id, user_id, card_ids)
+
+
+async def get_card(board_id: str, user_id: int, card_id: str) -> dict | None:
+    return await run(db.get_card, board_id, user_id, card_id)
+
+
+async def get_boards_for_user(user_id: int) -> list[dict]:
+    return await run(db.get_boards_for_user, user_id)
+
+
+async def get_default_board_for_user(user_id: int) -> dict:
+    return await run(db.get_default_board_for_user, user_id)
+
+
+async def create_board(
+    user_id: int, name: str, board_json: dict | None = None, template_id: str | None = None
+) -> dict:
+    return await run(db.create_board, user_id, name, board_json, template_id)
+
+
+async def update_board(board_id: str, user_id: int, board_json: dict) -> dict:
+    return await run(db.update_board, board_id, user_id, board_json)
+
+
+async def modify_board(board_id: str, user_id: int, change: Callable[[dict], dict]) -> dict:
+    return await run(db.modify_board, board_id, user_id, change)
+
+
+async def rename_board(board_id: str, user_id: int, name: str) -> dict:
+    return await run(db.rename_board, board_id, user_id, name)
+
+
+async def delete_board(board_id: str, user_id: int) -> bool:
+    return await run(db.delete_board, board_id, user_id)
+
+
+async def import_boards(user_id: int, boards: list[tuple[str, dict]]) -> list[str]:
+    return await run(db.import_boards, user_id, boards)
+
+
+async def get_board_history(
+    board_id: str, user_id: int, limit: int = 50, before: int | None = None
+) -> list[dict] | None:
+    return await run(db.get_board_history, board_id, user_id, limit, before)
+
+
+async def get_board_version(board_id: str, user_id: int, version: int) -> dict | None:
+    return await run(db.get_board_version, board_id, user_id, version)
+
+
+async def get_due_cards(
+    user_id: int, before: str | None = None, priorities: list[str] | None = None, limit: int = 100
+) -> list[dict]:
+    return await run(db.get_due_cards, user_id, before, priorities, limit)
+
+
+async def get_dashboard(user_id: int) -> dict:
+    return await run(db.get_dashboard, user_id)
+
+
+async def archive_cards(board_id: str, user_id: int, card_ids: list[str]) -> list[str]:
+    return await run(db.archive_cards, board_id, user_id, card_ids)
+
+
+async def restore_archived_card(board_id: str, user_id: int, card_id: str) -> dict | None:
+    return await run(db.restore_archived_card, board_id, user_id, card_id)
+
+
+async def move_card(
+    board_id: str,
+    user_id: int,
+    card_id: str,
+    column_id: str,
+    before_id: str | None = None,
+    after_id: str | None = None,
+) -> dict:
+    return await run(db.move_card, board_id, user_id, card_id, column_id, before_id, after_id)
+
+
+async def search_archived_cards(
+    user_id: int,
+    query: str | None = None,
+    board_id: str | None = None,
+    limit: int = 50,
+    before: str | None = None,
+) -> list[dict]:
+    return await run(db.search_archived_cards, user_id, query, board_id, limit, before)
+
+
+async def list_templates(user_id: int) -> list[dict]:
+    return await run(db.list_templates, user_id)
+
+
+async def create_template(user_id: int, name: str, board_json: dict) -> dict:
+    return await run(db.create_template, user_id, name, board_json)
+
+
+async def delete_template(template_id: str, user_id: int) -> bool:
+    return await run(db.delete_template, template_id, user_id)
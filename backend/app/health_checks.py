@@ -0,0 +1,220 @@
+import asyncio
+import os
+import shutil
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+import anyio.to_thread
+
+from app import db_async
+from app.db import get_db_path, get_shard_count, get_shard_path
+from app.write_behind import write_buffer
+
+OPENROUTER_MODELS_URL = "https://openrouter.ai/api/v1/models"
+
+SQLITE_PROBE_TIMEOUT_SECONDS = 0.25
+SQLITE_PROBE_TTL_SECONDS = 1.0
+LOOP_LAG_INTERVAL_SECONDS = 0.5
+OPENROUTER_PROBE_INTERVAL_SECONDS = 60.0
+OPENROUTER_PROBE_TIMEOUT_SECONDS = 3.0
+
+
+def _min_free_disk_bytes() -> int:
+    return int(os.getenv("PM_HEALTH_MIN_FREE_BYTES", str(50 * 1024 * 1024)))
+
+
+def _max_pending_writes() -> int:
+    return int(os.getenv("PM_HEALTH_MAX_PENDING_WRITES", "1000"))
+
+
+def _max_db_in_flight() -> int:
+    return int(os.getenv("PM_HEALTH_MAX_DB_IN_FLIGHT", "256"))
+
+
+def _openrouter_probe_enabled() -> bool:
+    return os.getenv("PM_HEALTH_PROBE_OPENROUTER", "").lower() in {"1", "true", "yes"}
+
+
+# ── SQLite probe ─────────────────────────────────────────────────────────
+
+
+class SQLiteProbe:
+    """Checks every database file on reused connections and caches the result.
+
+    With ``PM_DB_SHARDS`` set, boards live in the shard files, so each shard
+    that exists is probed alongside the central database.
+
+    Concurrent callers never queue behind a slow probe: whoever loses the race
+    for the lock gets the last cached result instead.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._connections: dict[Path, sqlite3.Connection] = {}
+        self._result: dict | None = None
+        self._checked_at = 0.0
+
+    def check(self) -> dict:
+        now = time.monotonic()
+        if self._result is not None and now - self._checked_at < SQLITE_PROBE_TTL_SECONDS:
+            return self._result
+
+        if not self._lock.acquire(blocking=False):
+            return self._result or {"ok": False, "error": "probe in progress"}
+        try:
+            self._result = self._probe()
+            self._checked_at = time.monotonic()
+            return self._result
+        finally:
+            self._lock.release()
+
+    def close(self) -> None:
+        with self._lock:
+            for path in list(self._connections):
+                self._reset_connection(path)
+            self._result = None
+
+    def _probe(self) -> dict:
+        db_path = get_db_path()
+        started = time.perf_counter()
+        result: dict = {"ok": True}
+
+        try:
+            disk = shutil.disk_usage(db_path.parent)
+        except OSError as exc:
+            return {"ok": False, "error": f"disk check failed: {exc}"}
+        result["disk_free_bytes"] = disk.free
+        if disk.free < _min_free_disk_bytes():
+            result["ok"] = False
+            result["error"] = "insufficient free disk space"
+
+        paths = [db_path, *(get_shard_path(index) for index in range(get_shard_count()))]
+        for path in paths:
+            if path != db_path and not path.exists():
+                continue
+            try:
+                connection = self._get_connection(path)
+                # Reading the schema takes a shared lock on the file, unlike a
+                # bare SELECT 1, so an exclusively locked database is reported
+                # as such.
+                connection.execute("SELECT count(*) FROM sqlite_master").fetchone()
+            except sqlite3.Error as exc:
+                self._reset_connection(path)
+                result["ok"] = False
+                result["error"] = f"{path.name}: {exc}"
+                break
+        for stale in set(self._connections) - set(paths):
+            self._reset_connection(stale)
+
+        result["latency_ms"] = round((time.perf_counter() - started) * 1000, 2)
+        return result
+
+    def _get_connection(self, path: Path) -> sqlite3.Connection:
+        connection = self._connections.get(path)
+        if connection is None:
+            connection = sqlite3.connect(
+                path,
+                timeout=SQLITE_PROBE_TIMEOUT_SECONDS,
+                check_same_thread=False,
+            )
+            self._connections[path] = connection
+        return connection
+
+    def _reset_connection(self, path: Path) -> None:
+        connection = self._connections.pop(path, None)
+        if connection is not None:
+            connection.close()
+
+
+# ── Background monitors ──────────────────────────────────────────────────
+
+
+class HealthMonitor:
+    """Owns the background tasks that feed the readiness report."""
+
+    def __init__(self) -> None:
+        self.sqlite_probe = SQLiteProbe()
+        self.loop_lag_ms = 0.0
+        self.max_loop_lag_ms = 0.0
+        self.openrouter: dict = {"enabled": _openrouter_probe_enabled()}
+        self._tasks: list[asyncio.Task] = []
+
+    async def start(self) -> None:
+        self._tasks.append(asyncio.create_task(self._watch_loop_lag()))
+        if self.openrouter["enabled"]:
+            self._tasks.append(asyncio.create_task(self._watch_openrouter()))
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks.clear()
+        self.sqlite_probe.close()
+
+    async def _watch_loop_lag(self) -> None:
+        while True:
+            started = time.monotonic()
+            await asyncio.sleep(LOOP_LAG_INTERVAL_SECONDS)
+            lag = max(0.0, time.monotonic() - started - LOOP_LAG_INTERVAL_SECONDS)
+            self.loop_lag_ms = round(lag * 1000, 2)
+            # Decay slowly so a single stall stays visible for a few probes.
+            self.max_loop_lag_ms = round(max(self.loop_lag_ms, self.max_loop_lag_ms * 0.9), 2)
+
+    async def _watch_openrouter(self) -> None:
+        while True:
+            self.openrouter = await asyncio.to_thread(_probe_openrouter)
+            await asyncio.sleep(OPENROUTER_PROBE_INTERVAL_SECONDS)
+
+    async def readiness(self) -> dict:
+        # The default executor is separate from Starlette's request threadpool,
+        # so a saturated app can still answer its readiness probe.
+        database = await asyncio.to_thread(self.sqlite_probe.check)
+        limiter = anyio.to_thread.current_default_thread_limiter()
+        stats = limiter.statistics()
+        # Saves held in memory and calls waiting on the DB executor both grow
+        # when SQLite cannot keep up with writes.
+        pending = write_buffer.pending_count()
+        write_buffer_check = {"pending": pending, "max": _max_pending_writes()}
+        write_buffer_check["ok"] = pending <= write_buffer_check["max"]
+        in_flight = db_async.executor_stats()["in_flight"]
+        executor_check = {"in_flight": in_flight, "max": _max_db_in_flight()}
+        executor_check["ok"] = in_flight <= executor_check["max"]
+        ready = database["ok"] and write_buffer_check["ok"] and executor_check["ok"]
+        return {
+            "status": "ready" if ready else "not_ready",
+            "checks": {
+                "database": database,
+                "write_buffer": write_buffer_check,
+                "db_executor": executor_check,
+                "threadpool": {
+                    "in_use": stats.borrowed_tokens,
+                    "size": int(stats.total_tokens),
+                    "waiting": stats.tasks_waiting,
+                },
+                "event_loop": {
+                    "lag_ms": self.loop_lag_ms,
+                    "max_lag_ms": self.max_loop_lag_ms,
+                },
+                "openrouter": self.openrouter,
+            },
+        }
+
+
+def _probe_openrouter() -> dict:
+    import httpx  # only needed once an API key is configured
+
+    started = time.perf_counter()
+    try:
+        response = httpx.get(OPENROUTER_MODELS_URL, timeout=OPENROUTER_PROBE_TIMEOUT_SECONDS)
+    except httpx.HTTPError as exc:
+        return {"enabled": True, "reachable": False, "error": str(exc), "checked_at": time.time()}
+
+    return {
+        "enabled": True,
+        "reachable": response.status_code < 500,
+        "status_code": response.status_code,
+        "latency_ms": round((time.perf_counter() - started) * 1000, 2),
+        "checked_at": time.time(),
+    }
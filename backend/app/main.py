@@ -1,15 +1,54 @@
+from contextlib import asynccontextmanager
 from pathlib import Path
 
 from fastapi import FastAPI
-from fastapi.staticfiles import StaticFiles
 
-from app.db import init_db
-from app.routers import api_router
+
+@asynccontextmanager
+async def lifespan(application: FastAPI):
+    await application.state.health_monitor.start()
+    await application.state.backup_scheduler.start()
+    await application.state.ai_job_worker.start()
+    await application.state.write_flusher.start()
+    await application.state.archive_sweeper.start()
+    await application.state.maintenance_scheduler.start()
+    try:
+        yield
+    finally:
+        await application.state.maintenance_scheduler.stop()
+        await application.state.archive_sweeper.stop()
+        await application.state.write_flusher.stop()
+        await application.state.ai_job_worker.stop()
+        await application.state.backup_scheduler.stop()
+        await application.state.health_monitor.stop()
 
 
 def create_app() -> FastAPI:
-    application = FastAPI(title="Project Management MVP")
+    # Feature modules (and bcrypt, via the auth router) are imported here, not
+    # at module level, so ``import app.main`` stays cheap.
+    from app.ai_jobs import AIJobWorker
+    from app.archive import ArchiveSweeper
+    from app.backup import BackupScheduler
+    from app.compression import CompressionMiddleware
+    from app.db import init_db
+    from app.health_checks import HealthMonitor
+    from app.maintenance import MaintenanceScheduler
+    from app.metrics import MetricsMiddleware
+    from app.routers import api_router
+    from app.routers.ai import run_board_action_job
+    from app.static_files import PrecompressedStaticFiles
+    from app.write_behind import WriteBehindFlusher
+
+    application = FastAPI(title="Project Management MVP", lifespan=lifespan)
     init_db()
+    application.state.health_monitor = HealthMonitor()
+    application.state.backup_scheduler = BackupScheduler()
+    application.state.ai_job_worker = AIJobWorker(run_board_action_job)
+    application.state.write_flusher = WriteBehindFlusher()
+    application.state.archive_sweeper = ArchiveSweeper()
+    application.state.maintenance_scheduler = MaintenanceScheduler()
+    application.add_middleware(CompressionMiddleware)
+    application.add_middleware(MetricsMiddleware)
     application.include_router(api_router, prefix="/api")
 
     app_dir = Path(__file__).parent
@@ -17,9 +56,16 @@ def create_app() -> FastAPI:
     fallback_static_dir = app_dir / "static"
     site_dir = frontend_static_dir if frontend_static_dir.exists() else fallback_static_dir
 
-    application.mount("/", StaticFiles(directory=site_dir, html=True), name="frontend")
+    application.mount("/", PrecompressedStaticFiles(directory=site_dir, html=True), name="frontend")
 
     return application
 
 
-app = create_app()
+def __getattr__(name: str) -> FastAPI:
+    # ``app`` is built on first access (``uvicorn app.main:app`` does this at
+    # startup) so that importing the module neither opens the database nor
+    # hashes the seed password.
+    if name == "app":
+        application = globals()["app"] = create_app()
+        return application
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,230 @@
+"""Background storage maintenance: incremental vacuum, optimize, checkpoint.
+
+Board saves rewrite whole rows, so the database files collect free pages
+and never shrink on their own. ``run_maintenance`` returns free pages to
+the filesystem a few at a time, refreshes the query planner statistics
+and truncates the WAL. ``MaintenanceScheduler`` runs it every
+``PM_MAINTENANCE_INTERVAL_SECONDS`` once no request has been seen for
+``PM_MAINTENANCE_QUIET_SECONDS``, and stops between steps as soon as
+traffic returns.
+
+Every step is its own short transaction on a connection that gives up
+after ``MAINTENANCE_BUSY_TIMEOUT_MS`` rather than queue behind requests,
+so a request never waits on maintenance for longer than one step.
+
+Run from backend/:
+
+    python -m app.maintenance            # one full pass now
+    python -m app.maintenance --convert  # also convert large databases
+    python -m app.maintenance --stats
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import sqlite3
+import time
+from collections.abc import Callable
+from pathlib import Path
+
+from app.db import connect, get_db_path, get_shard_count, get_shard_path
+from app.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+AUTO_VACUUM_INCREMENTAL = 2
+MAINTENANCE_BUSY_TIMEOUT_MS = 5
+
+
+def _env_float(name: str, default: float) -> float:
+    return float(os.getenv(name, str(default)))
+
+
+def _pages_per_step() -> int:
+    # 256 pages (1 MiB at the default page size) take about 2 ms to free.
+    return int(os.getenv("PM_VACUUM_PAGES_PER_STEP", "256"))
+
+
+def _step_sleep_seconds() -> float:
+    return _env_float("PM_VACUUM_STEP_SLEEP_MS", 5) / 1000
+
+
+def _convert_max_bytes() -> int:
+    # A full VACUUM holds the write lock for its whole run; only do it
+    # unattended while the file is small enough for that to be brief.
+    return int(os.getenv("PM_VACUUM_CONVERT_MAX_BYTES", str(8 * 1024 * 1024)))
+
+
+def database_paths() -> list[Path]:
+    paths = [get_db_path(), *(get_shard_path(index) for index in range(get_shard_count()))]
+    return [path for path in paths if path.exists()]
+
+
+def _connect(path: Path) -> sqlite3.Connection:
+    connection = connect(path)
+    # Autocommit: each PRAGMA below is its own short transaction.
+    connection.isolation_level = None
+    connection.execute(f"PRAGMA busy_timeout = {MAINTENANCE_BUSY_TIMEOUT_MS}")
+    return connection
+
+
+def storage_stats(path: Path) -> dict:
+    with _connect(path) as connection:
+        page_size = connection.execute("PRAGMA page_size").fetchone()[0]
+        page_count = connection.execute("PRAGMA page_count").fetchone()[0]
+        free_pages = connection.execute("PRAGMA freelist_count").fetchone()[0]
+        auto_vacuum = connection.execute("PRAGMA auto_vacuum").fetchone()[0]
+    wal_path = path.with_name(path.name + "-wal")
+    return {
+        "size_bytes": page_size * page_count,
+        "wal_bytes": wal_path.stat().st_size if wal_path.exists() else 0,
+        "page_count": page_count,
+        "free_pages": free_pages,
+        "free_page_ratio": round(free_pages / page_count, 4) if page_count else 0.0,
+        "incremental_vacuum": auto_vacuum == AUTO_VACUUM_INCREMENTAL,
+    }
+
+
+def _all_storage_stats() -> dict:
+    return {path.name: storage_stats(path) for path in database_paths()}
+
+
+metrics.register("db_storage", _all_storage_stats)
+
+
+def convert_to_incremental(path: Path, force: bool = False) -> bool:
+    """Switch an existing database to auto_vacuum=INCREMENTAL.
+
+    That needs one full VACUUM, which is skipped (returning False) for
+    files over ``PM_VACUUM_CONVERT_MAX_BYTES`` unless ``force`` is set.
+    """
+    with _connect(path) as connection:
+        if connection.execute("PRAGMA auto_vacuum").fetchone()[0] == AUTO_VACUUM_INCREMENTAL:
+            return True
+        if not force and path.stat().st_size > _convert_max_bytes():
+            logger.warning(
+                "%s is not using incremental vacuum; run `python -m app.maintenance --convert` "
+                "during a maintenance window",
+                path,
+            )
+            return False
+        connection.execute("PRAGMA auto_vacuum = INCREMENTAL")
+        connection.execute("VACUUM")
+    metrics.inc("maintenance_conversions_total")
+    return True
+
+
+def vacuum_incrementally(path: Path, keep_going: Callable[[], bool] = lambda: True) -> int:
+    """Free pages ``PM_VACUUM_PAGES_PER_STEP`` at a time while ``keep_going()``.
+
+    Returns the number of pages returned to the filesystem.
+    """
+    freed = 0
+    with _connect(path) as connection:
+        while keep_going():
+            before = connection.execute("PRAGMA freelist_count").fetchone()[0]
+            if not before:
+                break
+            started = time.perf_counter()
+            try:
+                # Run through sqlite3_exec: stepping it via execute() frees
+                # only one page per call.
+                connection.executescript(f"PRAGMA incremental_vacuum({_pages_per_step()});")
+            except sqlite3.OperationalError:
+                # Locked by a request: leave the rest for the next quiet spell.
+                metrics.inc("maintenance_busy_skips_total")
+                break
+            metrics.observe("maintenance_step_seconds", time.perf_counter() - started)
+            freed += before - connection.execute("PRAGMA freelist_count").fetchone()[0]
+            time.sleep(_step_sleep_seconds())
+    metrics.inc("maintenance_pages_vacuumed_total", freed)
+    return freed
+
+
+def _optimize_and_checkpoint(path: Path) -> None:
+    with _connect(path) as connection:
+        try:
+            connection.execute("PRAGMA optimize").fetchall()
+            # A passive checkpoint copies the WAL back without blocking
+            # anyone, so the truncating one that follows has little to do.
+            connection.execute("PRAGMA wal_checkpoint(PASSIVE)").fetchall()
+            connection.execute("PRAGMA wal_checkpoint(TRUNCATE)").fetchall()
+        except sqlite3.OperationalError:
+            metrics.inc("maintenance_busy_skips_total")
+
+
+def run_maintenance(keep_going: Callable[[], bool] = lambda: True, convert: bool = False) -> dict:
+    """One maintenance pass over the central database and every shard.
+
+    ``keep_going`` is polled between steps; the pass stops early once it
+    returns False. Returns the pages freed per database file.
+    """
+    freed = {}
+    with metrics.activity("maintenance"):
+        for path in database_paths():
+            if not keep_going():
+                break
+            if convert_to_incremental(path, force=convert) and keep_going():
+                freed[path.name] = vacuum_incrementally(path, keep_going)
+            if keep_going():
+                _optimize_and_checkpoint(path)
+    metrics.inc("maintenance_runs_total")
+    metrics.set("maintenance_last_run_timestamp", time.time())
+    return freed
+
+
+class MaintenanceScheduler:
+    """Runs ``run_maintenance`` in quiet periods."""
+
+    def __init__(self) -> None:
+        self.interval = _env_float("PM_MAINTENANCE_INTERVAL_SECONDS", 300)
+        self.quiet_seconds = _env_float("PM_MAINTENANCE_QUIET_SECONDS", 5)
+        self._task: asyncio.Task | None = None
+
+    def is_quiet(self) -> bool:
+        if metrics.gauge("http_requests_in_flight"):
+            return False
+        last_request = metrics.gauge("http_last_request_timestamp")
+        return last_request is None or time.time() - last_request >= self.quiet_seconds
+
+    async def start(self) -> None:
+        if self.interval > 0:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            while not self.is_quiet():
+                await asyncio.sleep(self.quiet_seconds)
+            try:
+                await asyncio.to_thread(run_maintenance, self.is_quiet)
+            except Exception:
+                logger.exception("Storage maintenance failed")
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m app.maintenance")
+    parser.add_argument("--convert", action="store_true", help="convert databases of any size")
+    parser.add_argument("--stats", action="store_true", help="only print storage statistics")
+    args = parser.parse_args(argv)
+
+    if not args.stats:
+        for name, pages in run_maintenance(convert=args.convert).items():
+            print(f"{name}: freed {pages} pages")
+    for name, stats in _all_storage_stats().items():
+        print(
+            f"{name}: {stats['size_bytes']} bytes, {stats['free_pages']} free pages "
+            f"({stats['free_page_ratio']:.1%}), wal {stats['wal_bytes']} bytes, "
+            f"incremental vacuum {'on' if stats['incremental_vacuum'] else 'off'}"
+        )
+
+
+if __name__ == "__main__":
+    main()
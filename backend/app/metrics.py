@@ -0,0 +1,128 @@
+import threading
+import time
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+
+class Metrics:
+    """Process-local counters, gauges and summaries exposed at /api/metrics."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._counters: dict[str, float] = {}
+        self._gauges: dict[str, float] = {}
+        self._summaries: dict[str, dict[str, float]] = {}
+        self._callbacks: dict[str, Callable[[], object]] = {}
+        self._activities: dict[str, int] = {}
+
+    def inc(self, name: str, value: float = 1.0) -> None:
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0.0) + value
+
+    def set(self, name: str, value: float) -> None:
+        with self._lock:
+            self._gauges[name] = value
+
+    def observe(self, name: str, value: float) -> None:
+        with self._lock:
+            summary = self._summaries.setdefault(name, {"count": 0, "sum": 0.0, "max": 0.0})
+            summary["count"] += 1
+            summary["sum"] += value
+            summary["max"] = max(summary["max"], value)
+
+    def register(self, name: str, callback: Callable[[], object]) -> None:
+        """Register a gauge whose value is computed when metrics are read."""
+        with self._lock:
+            self._callbacks[name] = callback
+
+    def gauge(self, name: str) -> object:
+        """Current value of one gauge, without computing the others."""
+        with self._lock:
+            callback = self._callbacks.get(name)
+            if callback is None:
+                return self._gauges.get(name)
+        return callback()
+
+    @contextmanager
+    def activity(self, name: str) -> Iterator[None]:
+        """Mark a background activity as running.
+
+        Requests served while it runs are also recorded under
+        ``http_request_seconds_during_<name>`` so its impact on live traffic
+        can be compared with the overall request latency.
+        """
+        with self._lock:
+            self._activities[name] = self._activities.get(name, 0) + 1
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._activities[name] -= 1
+                if not self._activities[name]:
+                    del self._activities[name]
+
+    def active_activities(self) -> list[str]:
+        with self._lock:
+            return list(self._activities)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            counters = dict(self._counters)
+            gauges = dict(self._gauges)
+            summaries = {name: dict(summary) for name, summary in self._summaries.items()}
+            callbacks = dict(self._callbacks)
+
+        for name, callback in callbacks.items():
+            try:
+                gauges[name] = callback()
+            except Exception:  # a broken gauge must not break the endpoint
+                gauges[name] = None
+        for summary in summaries.values():
+            summary["avg"] = summary["sum"] / summary["count"] if summary["count"] else 0.0
+        return {"counters": counters, "gauges": gauges, "summaries": summaries}
+
+    def reset(self) -> None:
+        with self._lock:
+            self._counters.clear()
+            self._gauges.clear()
+            self._summaries.clear()
+
+
+metrics = Metrics()
+
+
+class MetricsMiddleware:
+    """Records request latency and the number of requests in flight."""
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+        self.in_flight = 0
+        metrics.register("http_requests_in_flight", lambda: self.in_flight)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status_code = 500
+        self.in_flight += 1
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            self.in_flight -= 1
+            elapsed = time.perf_counter() - started
+            metrics.observe("http_request_seconds", elapsed)
+            for activity in metrics.active_activities():
+                metrics.observe(f"http_request_seconds_during_{activity}", elapsed)
+            metrics.inc(f"http_responses_{status_code // 100}xx_total")
+            metrics.set("http_last_request_timestamp", time.time())
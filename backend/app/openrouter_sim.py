@@ -0,0 +1,291 @@
+"""A deterministic stand-in for the OpenRouter chat completions API.
+
+Use it in-process through ``OpenRouterSimulator.transport()`` together with
+``ai_client.set_transport``, or run it as a server and point
+``OPENROUTER_BASE_URL`` at it::
+
+    python -m app.openrouter_sim --port 8010 --latency lognormal --latency-ms 800
+    OPENROUTER_BASE_URL=http://localhost:8010/api/v1 OPENROUTER_API_KEY=sim ...
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import random
+import threading
+import time
+from collections import Counter
+from collections.abc import Iterator
+from dataclasses import dataclass, field
+
+import httpx
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+
+BOARD_MARKER = "Current board JSON:\n"
+
+
+@dataclass
+class SimulatorConfig:
+    # Latency distribution: "fixed" (latency_ms), "uniform" (latency_ms to
+    # latency_max_ms) or "lognormal" (median latency_ms, shape latency_sigma).
+    latency: str = "fixed"
+    latency_ms: float = 0.0
+    latency_max_ms: float = 0.0
+    latency_sigma: float = 0.5
+    # Fractions of requests answered with 429 and with 500.
+    rate_limit_rate: float = 0.0
+    error_rate: float = 0.0
+    retry_after_seconds: float = 1.0
+    stream_chunks: int = 8
+    chunk_interval_ms: float = 0.0
+    seed: int = 0
+    # Canned assistant messages, used in turn; when empty a board action
+    # reply is derived from the prompt.
+    responses: list[str] = field(default_factory=list)
+
+    @classmethod
+    def from_env(cls) -> "SimulatorConfig":
+        def number(name: str, default: float) -> float:
+            return float(os.getenv(f"OPENROUTER_SIM_{name}", str(default)))
+
+        return cls(
+            latency=os.getenv("OPENROUTER_SIM_LATENCY", "fixed"),
+            latency_ms=number("LATENCY_MS", 0.0),
+            latency_max_ms=number("LATENCY_MAX_MS", 0.0),
+            latency_sigma=number("LATENCY_SIGMA", 0.5),
+            rate_limit_rate=number("RATE_LIMIT_RATE", 0.0),
+            error_rate=number("ERROR_RATE", 0.0),
+            retry_after_seconds=number("RETRY_AFTER_SECONDS", 1.0),
+            stream_chunks=int(number("STREAM_CHUNKS", 8)),
+            chunk_interval_ms=number("CHUNK_INTERVAL_MS", 0.0),
+            seed=int(number("SEED", 0)),
+        )
+
+
+@dataclass
+class SimulatedReply:
+    index: int
+    status_code: int
+    delay: float
+    content: str = ""
+    headers: dict[str, str] = field(default_factory=dict)
+
+
+def board_action_reply(prompt: str) -> str:
+    """Return a valid structured board action for the board in ``prompt``.
+
+    The first card of the first non-empty column is moved to the next
+    column, so every successful call produces a small, real board write.
+    """
+    board = None
+    start = prompt.find(BOARD_MARKER)
+    if start != -1:
+        line = prompt[start + len(BOARD_MARKER) :].split("\n", 1)[0]
+        try:
+            board = json.loads(line)
+        except json.JSONDecodeError:
+            board = None
+    if not isinstance(board, dict):
+        return "Simulated response."
+
+    columns = board.get("columns", [])
+    for index, column in enumerate(columns[:-1]):
+        if column.get("cardIds"):
+            operation = {
+                "op": "move_card",
+                "card_id": column["cardIds"][0],
+                "column_id": columns[index + 1]["id"],
+                "position": 0,
+            }
+            return json.dumps(
+                {"assistant_response": "Moved one card forward.", "operations": [operation]}
+            )
+    return json.dumps({"assistant_response": "Nothing to move.", "operations": []})
+
+
+class OpenRouterSimulator:
+    """Decides status, latency and content for each simulated request.
+
+    Request ``n`` draws from ``random.Random(f"{seed}:{n}")``, so a given seed
+    always produces the same sequence of outcomes.
+    """
+
+    def __init__(self, config: SimulatorConfig | None = None) -> None:
+        self.config = config or SimulatorConfig()
+        self.stats: Counter[str] = Counter()
+        self._lock = threading.Lock()
+        self._count = 0
+
+    def _latency(self, rng: random.Random) -> float:
+        config = self.config
+        if config.latency == "uniform":
+            millis = rng.uniform(config.latency_ms, max(config.latency_ms, config.latency_max_ms))
+        elif config.latency == "lognormal":
+            millis = rng.lognormvariate(math.log(max(config.latency_ms, 1e-3)), config.latency_sigma)
+        else:
+            millis = config.latency_ms
+        return millis / 1000
+
+    def plan(self, body: dict) -> SimulatedReply:
+        with self._lock:
+            index = self._count
+            self._count += 1
+        rng = random.Random(f"{self.config.seed}:{index}")
+        delay = self._latency(rng)
+        roll = rng.random()
+
+        if roll < self.config.rate_limit_rate:
+            reply = SimulatedReply(
+                index,
+                429,
+                delay,
+                json.dumps({"error": {"code": 429, "message": "Rate limited (simulated)"}}),
+                {"Retry-After": f"{self.config.retry_after_seconds:g}"},
+            )
+        elif roll < self.config.rate_limit_rate + self.config.error_rate:
+            reply = SimulatedReply(
+                index,
+                500,
+                delay,
+                json.dumps({"error": {"code": 500, "message": "Upstream error (simulated)"}}),
+            )
+        else:
+            if self.config.responses:
+                content = self.config.responses[index % len(self.config.responses)]
+            else:
+                messages = body.get("messages") or [{}]
+                content = board_action_reply(str(messages[-1].get("content", "")))
+            reply = SimulatedReply(index, 200, delay, content)
+
+        with self._lock:
+            self.stats[str(reply.status_code)] += 1
+        return reply
+
+    def _completion(self, body: dict, reply: SimulatedReply) -> dict:
+        content = reply.content
+        prompt = "".join(str(message.get("content", "")) for message in body.get("messages", []))
+        return {
+            "id": f"sim-{reply.index}",
+            "object": "chat.completion",
+            "model": body.get("model", ""),
+            "choices": [
+                {"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}
+            ],
+            "usage": {
+                "prompt_tokens": len(prompt) // 4,
+                "completion_tokens": len(content) // 4,
+                "total_tokens": (len(prompt) + len(content)) // 4,
+            },
+        }
+
+    def _chunks(self, content: str) -> list[bytes]:
+        count = max(1, self.config.stream_chunks)
+        size = max(1, math.ceil(len(content) / count))
+        events = [
+            {"choices": [{"index": 0, "delta": {"content": content[offset : offset + size]}}]}
+            for offset in range(0, len(content), size)
+        ]
+        events.append({"choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}]})
+        return [f"data: {json.dumps(event)}\n\n".encode() for event in events] + [b"data: [DONE]\n\n"]
+
+    # ── In-process transport ─────────────────────────────────────────────
+
+    def handle(self, request: httpx.Request) -> httpx.Response:
+        body = json.loads(request.content or b"{}")
+        reply = self.plan(body)
+        time.sleep(reply.delay)
+        if reply.status_code != 200:
+            return httpx.Response(reply.status_code, headers=reply.headers, text=reply.content)
+        if body.get("stream"):
+            return httpx.Response(
+                200,
+                headers={"content-type": "text/event-stream"},
+                content=self._paced(self._chunks(reply.content)),
+            )
+        return httpx.Response(200, json=self._completion(body, reply))
+
+    def _paced(self, chunks: list[bytes]) -> Iterator[bytes]:
+        for index, chunk in enumerate(chunks):
+            if index and self.config.chunk_interval_ms:
+                time.sleep(self.config.chunk_interval_ms / 1000)
+            yield chunk
+
+    def transport(self) -> httpx.MockTransport:
+        return httpx.MockTransport(self.handle)
+
+    # ── HTTP server ──────────────────────────────────────────────────────
+
+    def create_app(self) -> FastAPI:
+        application = FastAPI(title="OpenRouter simulator")
+
+        @application.post("/api/v1/chat/completions")
+        async def chat_completions(request: Request) -> Response:
+            body = await request.json()
+            reply = self.plan(body)
+            await asyncio.sleep(reply.delay)
+            if reply.status_code != 200:
+                return Response(
+                    reply.content,
+                    status_code=reply.status_code,
+                    headers=reply.headers,
+                    media_type="application/json",
+                )
+            if body.get("stream"):
+                return StreamingResponse(
+                    self._paced_async(self._chunks(reply.content)),
+                    media_type="text/event-stream",
+                )
+            return JSONResponse(self._completion(body, reply))
+
+        @application.get("/stats")
+        def stats() -> dict:
+            return dict(self.stats)
+
+        return application
+
+    async def _paced_async(self, chunks: list[bytes]):
+        for index, chunk in enumerate(chunks):
+            if index and self.config.chunk_interval_ms:
+                await asyncio.sleep(self.config.chunk_interval_ms / 1000)
+            yield chunk
+
+
+def main(argv: list[str] | None = None) -> None:
+    defaults = SimulatorConfig.from_env()
+    parser = argparse.ArgumentParser(prog="python -m app.openrouter_sim")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8010)
+    parser.add_argument("--latency", choices=["fixed", "uniform", "lognormal"], default=defaults.latency)
+    parser.add_argument("--latency-ms", type=float, default=defaults.latency_ms)
+    parser.add_argument("--latency-max-ms", type=float, default=defaults.latency_max_ms)
+    parser.add_argument("--latency-sigma", type=float, default=defaults.latency_sigma)
+    parser.add_argument("--rate-limit-rate", type=float, default=defaults.rate_limit_rate)
+    parser.add_argument("--error-rate", type=float, default=defaults.error_rate)
+    parser.add_argument("--retry-after", type=float, default=defaults.retry_after_seconds)
+    parser.add_argument("--stream-chunks", type=int, default=defaults.stream_chunks)
+    parser.add_argument("--chunk-interval-ms", type=float, default=defaults.chunk_interval_ms)
+    parser.add_argument("--seed", type=int, default=defaults.seed)
+    args = parser.parse_args(argv)
+
+    import uvicorn
+
+    config = SimulatorConfig(
+        latency=args.latency,
+        latency_ms=args.latency_ms,
+        latency_max_ms=args.latency_max_ms,
+        latency_sigma=args.latency_sigma,
+        rate_limit_rate=args.rate_limit_rate,
+        error_rate=args.error_rate,
+        retry_after_seconds=args.retry_after,
+        stream_chunks=args.stream_chunks,
+        chunk_interval_ms=args.chunk_interval_ms,
+        seed=args.seed,
+    )
+    uvicorn.run(OpenRouterSimulator(config).create_app(), host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""Fractional rank keys for ordering cards within a column.
+
+Ranks are base-62 strings that sort correctly byte by byte (so SQLite's
+default collation orders them), and never end in the lowest digit, so a
+key strictly between any two ranks always exists. Inserting between two
+neighbours only ever creates one new key; when repeated inserts at the
+same spot make keys longer than ``MAX_RANK_LENGTH`` the column is
+respread with ``spread_ranks``.
+"""
+
+from bisect import bisect_left
+
+DIGITS = "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz"
+BASE = len(DIGITS)
+MAX_RANK_LENGTH = 12
+
+_VALUES = {digit: value for value, digit in enumerate(DIGITS)}
+
+
+def rank_between(low: str | None, high: str | None) -> str:
+    """A rank sorting after ``low`` and before ``high`` (None = unbounded)."""
+    if low is not None and high is not None and low >= high:
+        raise ValueError(f"Rank {low!r} is not below {high!r}")
+    low = low or ""
+    prefix = ""
+    index = 0
+    while True:
+        lower = _VALUES[low[index]] if index < len(low) else 0
+        upper = _VALUES[high[index]] if high is not None and index < len(high) else BASE
+        if upper - lower > 1:
+            return prefix + DIGITS[(lower + upper) // 2]
+        prefix += DIGITS[lower]
+        if upper - lower == 1:
+            # Anything longer than ``prefix`` now sorts below ``high``.
+            high = None
+        index += 1
+
+
+def ranks_between(low: str | None, high: str | None, count: int) -> list[str]:
+    """``count`` ascending ranks between ``low`` and ``high``, kept short by
+    bisecting rather than appending one after another."""
+    if count <= 0:
+        return []
+    middle = rank_between(low, high)
+    half = count // 2
+    return [*ranks_between(low, middle, half), middle, *ranks_between(middle, high, count - half - 1)]
+
+
+def spread_ranks(count: int) -> list[str]:
+    """``count`` evenly spaced ranks of equal length."""
+    width = 1
+    while BASE**width < 2 * (count + 1):
+        width += 1
+    step = BASE**width // (count + 1)
+    ranks = []
+    for position in range(1, count + 1):
+        value = position * step
+        if value % BASE == 0:
+            value += 1  # steps are at least 2 apart, so this stays ordered
+        digits = []
+        for _ in range(width):
+            value, digit = divmod(value, BASE)
+            digits.append(DIGITS[digit])
+        ranks.append("".join(reversed(digits)))
+    return ranks
+
+
+def longest_increasing(ranks: list[str | None]) -> set[int]:
+    """Indices of a longest strictly increasing run of non-None ``ranks``.
+
+    Those cards can keep their rank when a column is reordered; only the
+    rest need new keys.
+    """
+    tails: list[str] = []
+    tail_indices: list[int] = []
+    parents: dict[int, int | None] = {}
+    for index, rank in enumerate(ranks):
+        if rank is None:
+            continue
+        position = bisect_left(tails, rank)
+        parents[index] = tail_indices[position - 1] if position else None
+        if position == len(tails):
+            tails.append(rank)
+            tail_indices.append(index)
+        else:
+            tails[position] = rank
+            tail_indices[position] = index
+    kept: set[int] = set()
+    index = tail_indices[-1] if tail_indices else None
+    while index is not None:
+        kept.add(index)
+        index = parents[index]
+    return kept
+
+
+def rerank(ranks: list[str | None]) -> list[str]:
+    """Ranks for a column in its new order, given each card's previous rank
+    (None for cards new to the column). Keeps as many previous ranks as
+    possible and respreads the column if keys would grow too long."""
+    kept = longest_increasing(ranks)
+    result: list[str] = []
+    low: str | None = None
+    pending = 0
+    for index, rank in enumerate([*ranks, None]):
+        if index == len(ranks) or index in kept:
+            high = rank if index < len(ranks) else None
+            result.extend(ranks_between(low, high, pending))
+            if index < len(ranks):
+                result.append(rank)
+            low, pending = high, 0
+        else:
+            pending += 1
+    if any(len(rank) > MAX_RANK_LENGTH for rank in result):
+        return spread_ranks(len(ranks))
+    return result
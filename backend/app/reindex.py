@@ -0,0 +1,58 @@
+"""Rebuild the tables derived from board_json.
+
+board_outlines, card_index and board_aggregates are maintained on every
+board write; run ``python -m app.reindex`` to recompute them if they ever
+drift (for example after editing board rows by hand).
+"""
+
+import argparse
+
+from app.db import (
+    connect,
+    get_board_connection,
+    get_connection,
+    get_shard_count,
+    get_shard_path,
+    get_user_by_username,
+    init_db,
+    rebuild_board_indexes,
+)
+
+
+def reindex(username: str | None = None) -> dict[str, int]:
+    """Rebuild derived tables everywhere, or only for one user's boards.
+
+    Returns the number of boards reindexed per database.
+    """
+    init_db()
+    if username is not None:
+        user = get_user_by_username(username)
+        if user is None:
+            raise ValueError(f"Unknown user {username!r}")
+        with get_board_connection(user["id"]) as connection:
+            return {username: rebuild_board_indexes(connection, user["id"])}
+
+    results = {}
+    with get_connection() as connection:
+        results["central"] = rebuild_board_indexes(connection)
+    for index in range(get_shard_count()):
+        with connect(get_shard_path(index)) as connection:
+            results[f"shard {index}"] = rebuild_board_indexes(connection)
+    return results
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m app.reindex")
+    parser.add_argument("--user", help="only rebuild this username's boards")
+    args = parser.parse_args(argv)
+
+    try:
+        results = reindex(args.user)
+    except ValueError as exc:
+        parser.error(str(exc))
+    for name, boards in results.items():
+        print(f"{name:>10}  reindexed {boards} boards")
+
+
+if __name__ == "__main__":
+    main()
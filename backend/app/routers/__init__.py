@@ -1,11 +1,13 @@
 from fastapi import APIRouter
 
+from .admin import router as admin_router
 from .ai import router as ai_router
 from .auth import router as auth_router
 from .board import router as board_router
 from .health import router as health_router
 
 api_router = APIRouter()
+api_router.include_router(admin_router, prefix="/admin")
 api_router.include_router(auth_router, prefix="/auth")
 api_router.include_router(ai_router)
 api_router.include_router(board_router)
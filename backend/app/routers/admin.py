@@ -0,0 +1,23 @@
+from pathlib import Path
+
+from fastapi import APIRouter, Depends, status
+
+from app.backup import create_snapshot, list_snapshots, snapshot_bytes
+from app.routers.auth import SessionUser, require_admin_user
+
+router = APIRouter()
+
+
+@router.get("/backups")
+def list_backups(user: SessionUser = Depends(require_admin_user)) -> list[dict]:
+    return [
+        {"name": path.name, "bytes": snapshot_bytes(path)}
+        for path in reversed(list_snapshots())
+    ]
+
+
+@router.post("/backups", status_code=status.HTTP_201_CREATED)
+def create_backup(user: SessionUser = Depends(require_admin_user)) -> dict:
+    result = create_snapshot()
+    result["name"] = Path(result.pop("path")).name
+    return result
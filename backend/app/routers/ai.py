@@ -1,21 +1,49 @@
+import asyncio
+import hashlib
 import json
+import time
+from collections.abc import AsyncIterator, Awaitable, Callable
+from contextlib import asynccontextmanager
+from typing import Annotated, Literal
 
-from fastapi import APIRouter, Depends, HTTPException, status
-from pydantic import BaseModel
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field, ValidationError, model_validator
 
+from app import db_async
+from app.ai_admission import AdmissionRejected, AdmissionSuperseded, admission
+from app.ai_jobs import FINISHED_STATUSES, JobCancelled
 from app.ai_client import (
     MODEL_NAME,
     OpenRouterConfigurationError,
     OpenRouterRequestError,
     OpenRouterTimeoutError,
+    OpenRouterUnavailableError,
     query_openrouter,
 )
-from app.db import get_board, get_default_board_for_user, update_board
+from app.board_ops import BoardOperationError, apply_operations
+from app.conversations import load_context, record_exchange, seed_context, start_conversation
+from app.db import (
+    cancel_ai_job,
+    create_ai_job,
+    get_ai_conversation,
+    get_ai_conversation_turns,
+    get_ai_job,
+    is_ai_job_cancelled,
+)
 from app.routers.auth import SessionUser, require_authenticated_user
-from app.routers.board import BoardPayload
+from app.routers.board import BoardPayload, CardLabelPayload, CardPayload
+from app.write_behind import write_buffer
 
 router = APIRouter()
 
+# Boards up to this many cards may still be replaced wholesale by the model;
+# larger boards must be edited through operations so output stays small.
+FULL_REPLACEMENT_MAX_CARDS = 20
+
+JOB_EVENTS_POLL_SECONDS = 0.5
+JOB_EVENTS_KEEPALIVE_SECONDS = 15.0
+
 
 class ConnectivityRequest(BaseModel):
     prompt: str = "2+2"
@@ -28,13 +56,76 @@ class ConversationTurn(BaseModel):
 
 class BoardActionRequest(BaseModel):
     question: str
+    # Only used to seed a new conversation; once a conversation_id is sent
+    # the server-side history is authoritative.
     conversation_history: list[ConversationTurn] = []
+    conversation_id: str | None = None
     board_id: str | None = None
 
 
+class CardChanges(BaseModel):
+    title: str | None = Field(default=None, max_length=200)
+    details: str | None = Field(default=None, max_length=5000)
+    labels: list[CardLabelPayload] | None = None
+    due_date: str | None = Field(default=None, pattern=r"^\d{4}-\d{2}-\d{2}$")
+    priority: Literal["none", "low", "medium", "high", "urgent"] | None = None
+
+    @model_validator(mode="before")
+    @classmethod
+    def drop_null_fields(cls, data: object) -> object:
+        # Models often send every field with null for "unchanged". Only a
+        # card's due date can be null, so that null means "clear it"; the
+        # rest are dropped so they stay unset and leave the card alone.
+        if isinstance(data, dict):
+            return {key: value for key, value in data.items() if value is not None or key == "due_date"}
+        return data
+
+
+class MoveCardOperation(BaseModel):
+    op: Literal["move_card"]
+    card_id: str
+    column_id: str
+    position: int | None = None
+
+
+class AddCardOperation(BaseModel):
+    op: Literal["add_card"]
+    column_id: str
+    card: CardPayload
+    position: int | None = None
+
+
+class EditCardOperation(BaseModel):
+    op: Literal["edit_card"]
+    card_id: str
+    changes: CardChanges
+
+
+class DeleteCardOperation(BaseModel):
+    op: Literal["delete_card"]
+    card_id: str
+
+
+class RenameColumnOperation(BaseModel):
+    op: Literal["rename_column"]
+    column_id: str
+    title: str
+
+
+BoardOperation = Annotated[
+    MoveCardOperation
+    | AddCardOperation
+    | EditCardOperation
+    | DeleteCardOperation
+    | RenameColumnOperation,
+    Field(discriminator="op"),
+]
+
+
 class StructuredBoardAction(BaseModel):
     assistant_response: str
-    board_update: BoardPayload | None
+    operations: list[BoardOperation] = []
+    board_update: BoardPayload | None = None
 
 
 def _extract_json_block(text: str) -> str:
@@ -45,16 +136,42 @@ def _extract_json_block(text: str) -> str:
     return stripped
 
 
+def _allows_full_replacement(board: dict) -> bool:
+    return len(board.get("cards", {})) <= FULL_REPLACEMENT_MAX_CARDS
+
+
 def _build_board_action_prompt(
     board: dict,
     question: str,
     conversation_history: list[ConversationTurn],
+    summary: str = "",
 ) -> str:
     history_lines = []
     for turn in conversation_history:
         history_lines.append(f"{turn.role}: {turn.content}")
 
     history_block = "\n".join(history_lines) if history_lines else "(none)"
+    summary_block = f"Summary of earlier conversation:\n{summary}\n\n" if summary else ""
+
+    card_schema = (
+        '{"id": string, "title": string, "details": string, '
+        '"labels": [{"id": string, "text": string, "color": string}], '
+        '"due_date": string|null, "priority": "none"|"low"|"medium"|"high"|"urgent"}'
+    )
+    if _allows_full_replacement(board):
+        board_update_schema = (
+            '  "board_update": null | {\n'
+            '    "columns": [{"id": string, "title": string, "cardIds": [string]}],\n'
+            f'    "cards": {{"card-id": {card_schema}}}\n'
+            "  }\n"
+        )
+        replacement_rule = (
+            "Prefer operations. Only use board_update (the complete new board) "
+            "when restructuring most of the board; otherwise set it to null.\n"
+        )
+    else:
+        board_update_schema = '  "board_update": null\n'
+        replacement_rule = "This board is large: express every change as operations.\n"
 
     return (
         "You are a project management assistant for a Kanban board.\n"
@@ -62,28 +179,59 @@ def _build_board_action_prompt(
         "Required JSON schema:\n"
         "{\n"
         '  "assistant_response": string,\n'
-        '  "board_update": null | {\n'
-        '    "columns": [{"id": string, "title": string, "cardIds": [string]}],\n'
-        '    "cards": {"card-id": {"id": string, "title": string, "details": string, '
-        '"labels": [{"id": string, "text": string, "color": string}], '
-        '"due_date": string|null, "priority": "none"|"low"|"medium"|"high"|"urgent"}}\n'
-        "  }\n"
+        '  "operations": [\n'
+        '    {"op": "move_card", "card_id": string, "column_id": string, "position": int|null}\n'
+        f'    | {{"op": "add_card", "column_id": string, "position": int|null, "card": {card_schema}}}\n'
+        '    | {"op": "edit_card", "card_id": string, "changes": {only the fields to change}}\n'
+        '    | {"op": "delete_card", "card_id": string}\n'
+        '    | {"op": "rename_column", "column_id": string, "title": string}\n'
+        "  ],\n"
+        f"{board_update_schema}"
         "}\n\n"
-        "If no board changes are needed, set board_update to null.\n"
-        "Labels, due_date, and priority are optional on cards.\n\n"
+        "If no board changes are needed, return an empty operations list.\n"
+        f"{replacement_rule}"
+        "Labels, due_date, and priority are optional on cards. "
+        "A null position appends to the end of the column.\n\n"
         f"Current board JSON:\n{json.dumps(board, ensure_ascii=False)}\n\n"
+        f"{summary_block}"
         f"Conversation history:\n{history_block}\n\n"
         f"User question:\n{question}\n"
     )
 
 
-@router.post("/ai/connectivity")
-def ai_connectivity(
-    payload: ConnectivityRequest,
-    user: SessionUser = Depends(require_authenticated_user),
-) -> dict:
+def _apply_operations_validated(operations: list[dict]) -> Callable[[dict], dict]:
+    def change(current: dict) -> dict:
+        return BoardPayload.model_validate(apply_operations(current, operations)).model_dump()
+
+    return change
+
+
+@asynccontextmanager
+async def _ai_slot(user_id: int, key: str) -> AsyncIterator[None]:
     try:
-        answer = query_openrouter(payload.prompt)
+        async with admission.admit(user_id, key):
+            yield
+    except AdmissionRejected as exc:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=str(exc),
+            headers={"Retry-After": str(round(exc.retry_after))},
+        ) from exc
+    except AdmissionSuperseded as exc:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=str(exc),
+        ) from exc
+
+
+async def _query_model(prompt: str) -> str:
+    """Call OpenRouter on a worker thread, mapping its errors to HTTP errors.
+
+    Only this call leaves the event loop; waiting for an admission slot
+    does not, so a long AI queue holds no threads.
+    """
+    try:
+        return await asyncio.to_thread(query_openrouter, prompt)
     except OpenRouterConfigurationError as exc:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -94,12 +242,27 @@ def ai_connectivity(
             status_code=status.HTTP_504_GATEWAY_TIMEOUT,
             detail=str(exc),
         ) from exc
+    except OpenRouterUnavailableError as exc:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=str(exc),
+            headers={"Retry-After": str(max(1, round(exc.retry_after)))},
+        ) from exc
     except OpenRouterRequestError as exc:
         raise HTTPException(
             status_code=status.HTTP_502_BAD_GATEWAY,
             detail=str(exc),
         ) from exc
 
+
+@router.post("/ai/connectivity")
+async def ai_connectivity(
+    payload: ConnectivityRequest,
+    user: SessionUser = Depends(require_authenticated_user),
+) -> dict:
+    async with _ai_slot(user.user_id, "connectivity"):
+        answer = await _query_model(payload.prompt)
+
     return {
         "model": MODEL_NAME,
         "prompt": payload.prompt,
@@ -109,12 +272,139 @@ def ai_connectivity(
 
 
 @router.post("/ai/board-action")
-def ai_board_action(
+async def ai_board_action(
     payload: BoardActionRequest,
+    request: Request,
+    response: Response,
+    run_async: bool = Query(default=False, alias="async"),
     user: SessionUser = Depends(require_authenticated_user),
 ) -> dict:
+    if run_async:
+        job, created = await db_async.run(
+            create_ai_job, user.user_id, _dedupe_key(payload), payload.model_dump()
+        )
+        if created:
+            request.app.state.ai_job_worker.notify()
+        response.status_code = status.HTTP_202_ACCEPTED
+        response.headers["Location"] = f"/api/ai/jobs/{job['id']}"
+        return {**job, "deduplicated": not created}
+
+    async with _ai_slot(user.user_id, payload.board_id or "default"):
+        return await _run_board_action(payload, user)
+
+
+def _dedupe_key(payload: BoardActionRequest) -> str:
+    canonical = json.dumps(payload.model_dump(), sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+async def run_board_action_job(job: dict) -> dict:
+    """Job handler for ``AIJobWorker``: runs a queued board action."""
+    payload = BoardActionRequest.model_validate(job["request"])
+    user = SessionUser(user_id=job["user_id"], username="")
+
+    async def cancelled() -> bool:
+        return await db_async.run(is_ai_job_cancelled, job["id"])
+
+    # Each job gets its own admission key so a background job never
+    # supersedes, or is superseded by, an interactive request.
+    async with _ai_slot(user.user_id, job["id"]):
+        if await cancelled():
+            raise JobCancelled(job["id"])
+        return await _run_board_action(payload, user, cancelled)
+
+
+@router.get("/ai/conversations/{conversation_id}")
+def get_conversation(
+    conversation_id: str,
+    user: SessionUser = Depends(require_authenticated_user),
+) -> dict:
+    conversation = get_ai_conversation(conversation_id, user.user_id)
+    if not conversation:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Conversation not found")
+    return {**conversation, "turns": get_ai_conversation_turns(conversation_id, user.user_id)}
+
+
+def _resolve_conversation(payload: BoardActionRequest, user_id: int, board_id: str) -> dict | None:
+    """The stored conversation, or None for a new one (stored after a reply)."""
+    if not payload.conversation_id:
+        return None
+    conversation = get_ai_conversation(payload.conversation_id, user_id)
+    if not conversation or conversation["board_id"] != board_id:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Conversation not found",
+        )
+    return conversation
+
+
+@router.get("/ai/jobs/{job_id}")
+def get_job(
+    job_id: str,
+    user: SessionUser = Depends(require_authenticated_user),
+) -> dict:
+    job = get_ai_job(job_id, user.user_id)
+    if not job:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Job not found")
+    return job
+
+
+@router.post("/ai/jobs/{job_id}/cancel")
+def cancel_job(
+    job_id: str,
+    user: SessionUser = Depends(require_authenticated_user),
+) -> dict:
+    job = cancel_ai_job(job_id, user.user_id)
+    if not job:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Job not found")
+    return job
+
+
+@router.get("/ai/jobs/{job_id}/events")
+async def job_events(
+    job_id: str,
+    request: Request,
+    user: SessionUser = Depends(require_authenticated_user),
+) -> StreamingResponse:
+    """Server-sent events: one ``status`` event per change, ending when the job finishes."""
+    job = await db_async.run(get_ai_job, job_id, user.user_id)
+    if not job:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Job not found")
+
+    async def events() -> AsyncIterator[str]:
+        current = job
+        last_status = None
+        last_sent = time.monotonic()
+        while current is not None:
+            if current["status"] != last_status:
+                last_status = current["status"]
+                last_sent = time.monotonic()
+                yield f"event: status\ndata: {json.dumps(current)}\n\n"
+            elif time.monotonic() - last_sent >= JOB_EVENTS_KEEPALIVE_SECONDS:
+                last_sent = time.monotonic()
+                yield ": keepalive\n\n"
+            if current["status"] in FINISHED_STATUSES or await request.is_disconnected():
+                return
+            await asyncio.sleep(JOB_EVENTS_POLL_SECONDS)
+            current = await db_async.run(get_ai_job, job_id, user.user_id)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+async def _run_board_action(
+    payload: BoardActionRequest,
+    user: SessionUser,
+    cancelled: Callable[[], Awaitable[bool]] | None = None,
+) -> dict:
+    # Buffered saves must land first, or the model would see (and the
+    # operations would be applied to) a stale board.
+    await db_async.run(write_buffer.flush_user, user.user_id)
     if payload.board_id:
-        board_record = get_board(payload.board_id, user.user_id)
+        board_record = await db_async.get_board(payload.board_id, user.user_id)
         if not board_record:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -123,33 +413,26 @@ def ai_board_action(
         current_board = board_record["board_json"]
         board_id = payload.board_id
     else:
-        board_record = get_default_board_for_user(user.user_id)
+        board_record = await db_async.get_default_board_for_user(user.user_id)
         current_board = board_record["board_json"]
         board_id = board_record["id"]
 
+    seed_history = [(turn.role, turn.content) for turn in payload.conversation_history]
+    conversation = await db_async.run(_resolve_conversation, payload, user.user_id, board_id)
+    if conversation is None:
+        context = seed_context(seed_history)
+    else:
+        context = await db_async.run(load_context, conversation, user.user_id)
     prompt = _build_board_action_prompt(
         board=current_board,
         question=payload.question,
-        conversation_history=payload.conversation_history,
+        conversation_history=[
+            ConversationTurn(role=turn["role"], content=turn["content"]) for turn in context.turns
+        ],
+        summary=context.summary,
     )
 
-    try:
-        raw_response = query_openrouter(prompt)
-    except OpenRouterConfigurationError as exc:
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=str(exc),
-        ) from exc
-    except OpenRouterTimeoutError as exc:
-        raise HTTPException(
-            status_code=status.HTTP_504_GATEWAY_TIMEOUT,
-            detail=str(exc),
-        ) from exc
-    except OpenRouterRequestError as exc:
-        raise HTTPException(
-            status_code=status.HTTP_502_BAD_GATEWAY,
-            detail=str(exc),
-        ) from exc
+    raw_response = await _query_model(prompt)
 
     try:
         parsed = json.loads(_extract_json_block(raw_response))
@@ -167,17 +450,66 @@ def ai_board_action(
             detail="AI structured output validation failed",
         ) from exc
 
-    if structured.board_update is not None:
-        result = update_board(board_id, user.user_id, structured.board_update.model_dump())
+    if cancelled is not None and await cancelled():
+        raise JobCancelled("Job was cancelled before its changes were applied")
+
+    if structured.operations:
+        operations = [operation.model_dump(exclude_unset=True) for operation in structured.operations]
+        try:
+            result = await db_async.modify_board(
+                board_id, user.user_id, _apply_operations_validated(operations)
+            )
+        except (BoardOperationError, ValidationError) as exc:
+            raise HTTPException(
+                status_code=status.HTTP_502_BAD_GATEWAY,
+                detail=f"AI operations could not be applied: {exc}",
+            ) from exc
+        except ValueError as exc:
+            # The board was deleted while the model was answering.
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Board not found",
+            ) from exc
+        next_board = result["board_json"]
+        board_updated = True
+    elif structured.board_update is not None:
+        if not _allows_full_replacement(current_board):
+            raise HTTPException(
+                status_code=status.HTTP_502_BAD_GATEWAY,
+                detail="AI returned a full board replacement for a large board",
+            )
+        try:
+            result = await db_async.update_board(board_id, user.user_id, structured.board_update.model_dump())
+        except ValueError as exc:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Board not found",
+            ) from exc
         next_board = result["board_json"]
         board_updated = True
     else:
         next_board = current_board
         board_updated = False
 
+    if conversation is None:
+        conversation = await db_async.run(
+            start_conversation,
+            user.user_id,
+            board_id,
+            seed_history,
+            payload.question,
+            structured.assistant_response,
+        )
+    else:
+        await db_async.run(
+            record_exchange, conversation["id"], user.user_id, payload.question, structured.assistant_response
+        )
+
     return {
         "model": MODEL_NAME,
         "assistant_response": structured.assistant_response,
         "board": next_board,
         "board_updated": board_updated,
+        "operations_applied": len(structured.operations),
+        "conversation_id": conversation["id"],
     }
@@ -1,3 +1,7 @@
+import os
+import sqlite3
+import sys
+from dataclasses import dataclass, replace
 from secrets import token_urlsafe
 
 import bcrypt
@@ -8,6 +12,7 @@ from app.db import (
     create_board,
     create_user,
     get_user_by_username,
+    get_user_password_hash,
     update_user_display_name,
     update_user_password,
 )
@@ -16,16 +21,21 @@ router = APIRouter()
 
 SESSION_COOKIE_NAME = "pm_session"
 
-# token -> {user_id, username, display_name}
-sessions: dict[str, dict] = {}
 
+@dataclass(frozen=True, slots=True)
+class SessionUser:
+    """The signed-in user, stored once per session and handed as-is to
+    every request, so authenticating does no per-request construction."""
 
-class SessionUser(BaseModel):
     user_id: int
     username: str
     display_name: str = ""
 
 
+# token -> SessionUser
+sessions: dict[str, SessionUser] = {}
+
+
 class LoginRequest(BaseModel):
     username: str
     password: str
@@ -50,13 +60,10 @@ def get_session_user(request: Request) -> SessionUser | None:
     session_token = request.cookies.get(SESSION_COOKIE_NAME)
     if not session_token:
         return None
-    session_data = sessions.get(session_token)
-    if not session_data:
-        return None
-    return SessionUser(**session_data)
+    return sessions.get(session_token)
 
 
-def require_authenticated_user(request: Request) -> SessionUser:
+def get_authenticated_user(request: Request) -> SessionUser:
     user = get_session_user(request)
     if not user:
         raise HTTPException(
@@ -66,13 +73,33 @@ def require_authenticated_user(request: Request) -> SessionUser:
     return user
 
 
+async def require_authenticated_user(request: Request) -> SessionUser:
+    # Declared async so FastAPI resolves it on the event loop instead of
+    # borrowing a threadpool slot for a dict lookup.
+    return get_authenticated_user(request)
+
+
+def _admin_usernames() -> set[str]:
+    configured = os.getenv("PM_ADMIN_USERNAMES", "")
+    return {name.strip() for name in configured.split(",") if name.strip()}
+
+
+async def require_admin_user(request: Request) -> SessionUser:
+    user = get_authenticated_user(request)
+    if user.username not in _admin_usernames():
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Admin access required",
+        )
+    return user
+
+
 def _set_session_cookie(response: Response, user: dict) -> str:
     session_token = token_urlsafe(32)
-    sessions[session_token] = {
-        "user_id": user["id"],
-        "username": user["username"],
-        "display_name": user.get("display_name", ""),
-    }
+    # Interned so many sessions of one user share a single username string.
+    sessions[session_token] = SessionUser(
+        user["id"], sys.intern(user["username"]), user.get("display_name", "")
+    )
     response.set_cookie(
         key=SESSION_COOKIE_NAME,
         value=session_token,
@@ -96,7 +123,14 @@ def register(payload: RegisterRequest, response: Response) -> dict:
     password_hash = bcrypt.hashpw(
         payload.password.encode(), bcrypt.gensalt()
     ).decode()
-    user = create_user(payload.username, password_hash, payload.display_name)
+    try:
+        user = create_user(payload.username, password_hash, payload.display_name)
+    except sqlite3.IntegrityError:
+        # Registered by a concurrent request since the check above.
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Username already taken",
+        ) from None
 
     # Create a default board for the new user
     create_board(user["id"], "My Board")
@@ -132,30 +166,30 @@ def logout(request: Request, response: Response) -> dict[str, str]:
 
 @router.get("/me")
 def me(request: Request) -> dict:
-    user = require_authenticated_user(request)
+    user = get_authenticated_user(request)
     return {"username": user.username, "display_name": user.display_name}
 
 
 @router.put("/me")
 def update_profile(payload: UpdateProfileRequest, request: Request) -> dict:
-    user = require_authenticated_user(request)
+    user = get_authenticated_user(request)
     updated = update_user_display_name(user.user_id, payload.display_name)
 
     # Update session cache
     session_token = request.cookies.get(SESSION_COOKIE_NAME)
     if session_token and session_token in sessions:
-        sessions[session_token]["display_name"] = payload.display_name
+        sessions[session_token] = replace(user, display_name=payload.display_name)
 
     return {"username": updated["username"], "display_name": updated["display_name"]}
 
 
 @router.put("/password")
 def change_password(payload: ChangePasswordRequest, request: Request) -> dict:
-    user = require_authenticated_user(request)
-    db_user = get_user_by_username(user.username)
+    user = get_authenticated_user(request)
+    password_hash = get_user_password_hash(user.user_id)
 
-    if not db_user or not bcrypt.checkpw(
-        payload.current_password.encode(), db_user["password_hash"].encode()
+    if not password_hash or not bcrypt.checkpw(
+        payload.current_password.encode(), password_hash.encode()
     ):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -1,21 +1,28 @@
+import json
+from collections.abc import Iterator
 from typing import Literal
 
-from fastapi import APIRouter, Depends, HTTPException, status
-from pydantic import BaseModel, Field, model_validator
-
-from app.db import (
-    create_board,
-    delete_board,
-    get_board,
-    get_boards_for_user,
-    get_default_board_for_user,
-    rename_board,
-    update_board,
-)
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field, ValidationError, model_validator
+
+from app import db_async
+from app.board_ops import BoardOperationError
+from app.board_records import BoardRecord
+from app.db import iter_board_rows_for_user
+from app.metrics import metrics
 from app.routers.auth import SessionUser, require_authenticated_user
+from app.write_behind import write_buffer
 
 router = APIRouter()
 
+IMPORT_BATCH_SIZE = 500
+MAX_IMPORT_LINE_BYTES = 16 * 1024 * 1024
+MAX_IMPORT_BYTES = 512 * 1024 * 1024
+CARD_PAGE_SIZE = 50
+MAX_CARD_PAGE_SIZE = 500
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
 
 class CardLabelPayload(BaseModel):
     id: str
@@ -58,22 +65,43 @@ class BoardPayload(BaseModel):
         return self
 
 
+async def _pending_board(board_id: str) -> dict | None:
+    """A buffered save of ``board_id`` as JSON, rebuilt off the event loop."""
+    record = write_buffer.pending_record(board_id)
+    return None if record is None else await db_async.run(record.to_json)
+
+
+async def _with_pending(board: dict) -> dict:
+    """Overlay a buffered, not yet written save so reads see their own writes."""
+    pending = await _pending_board(board["id"])
+    return board if pending is None else {**board, "board_json": pending}
+
+
+async def _save_board(board: dict, user_id: int, board_json: dict, durable: bool) -> dict:
+    if durable or not write_buffer.enabled():
+        return await db_async.run(write_buffer.write_through, board["id"], user_id, board_json)
+    record = await db_async.run(BoardRecord.from_json, board_json)
+    write_buffer.stage(board["id"], user_id, record)
+    return {**board, "board_json": board_json, "pending": True}
+
+
 # ── Legacy single-board endpoints (backward compatibility) ───────────────
 
 
 @router.get("/board")
-def read_board(user: SessionUser = Depends(require_authenticated_user)) -> dict:
-    board = get_default_board_for_user(user.user_id)
-    return board["board_json"]
+async def read_board(user: SessionUser = Depends(require_authenticated_user)) -> dict:
+    board = await db_async.get_default_board_for_user(user.user_id)
+    return (await _with_pending(board))["board_json"]
 
 
 @router.put("/board")
-def write_board(
+async def write_board(
     payload: BoardPayload,
+    durable: bool = Query(default=False),
     user: SessionUser = Depends(require_authenticated_user),
 ) -> dict:
-    board = get_default_board_for_user(user.user_id)
-    result = update_board(board["id"], user.user_id, payload.model_dump())
+    board = await db_async.get_default_board_for_user(user.user_id)
+    result = await _save_board(board, user.user_id, payload.model_dump(), durable)
     return result["board_json"]
 
 
@@ -81,8 +109,8 @@ def write_board(
 
 
 @router.get("/boards")
-def list_boards(user: SessionUser = Depends(require_authenticated_user)) -> list[dict]:
-    return get_boards_for_user(user.user_id)
+async def list_boards(user: SessionUser = Depends(require_authenticated_user)) -> list[dict]:
+    return await db_async.get_boards_for_user(user.user_id)
 
 
 class CreateBoardRequest(BaseModel):
@@ -90,40 +118,194 @@ class CreateBoardRequest(BaseModel):
 
 
 @router.post("/boards", status_code=status.HTTP_201_CREATED)
-def create_board_endpoint(
+async def create_board_endpoint(
     payload: CreateBoardRequest,
+    template: str | None = Query(default=None),
+    user: SessionUser = Depends(require_authenticated_user),
+) -> dict:
+    try:
+        return await db_async.create_board(user.user_id, payload.name, template_id=template)
+    except ValueError as exc:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=str(exc),
+        ) from exc
+
+
+# ── Board templates ──────────────────────────────────────────────────────
+
+
+class CreateTemplateRequest(BaseModel):
+    name: str = Field(min_length=1, max_length=100)
+    board_id: str | None = None
+    board_json: BoardPayload | None = None
+
+    @model_validator(mode="after")
+    def validate_source(self) -> "CreateTemplateRequest":
+        if (self.board_id is None) == (self.board_json is None):
+            raise ValueError("Provide exactly one of board_id or board_json")
+        return self
+
+
+@router.get("/templates")
+async def list_templates_endpoint(user: SessionUser = Depends(require_authenticated_user)) -> list[dict]:
+    return await db_async.list_templates(user.user_id)
+
+
+@router.post("/templates", status_code=status.HTTP_201_CREATED)
+async def create_template_endpoint(
+    payload: CreateTemplateRequest,
+    user: SessionUser = Depends(require_authenticated_user),
+) -> dict:
+    if payload.board_json is not None:
+        board_json = payload.board_json.model_dump()
+    else:
+        board = await db_async.get_board(payload.board_id, user.user_id)
+        if not board:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Board not found",
+            )
+        board_json = (await _with_pending(board))["board_json"]
+    return await db_async.create_template(user.user_id, payload.name, board_json)
+
+
+@router.delete("/templates/{template_id}")
+async def delete_template_endpoint(
+    template_id: str,
+    user: SessionUser = Depends(require_authenticated_user),
+) -> dict:
+    if not await db_async.delete_template(template_id, user.user_id):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Template not found",
+        )
+    return {"status": "ok"}
+
+
+# ── Bulk NDJSON import/export ────────────────────────────────────────────
+
+
+class BoardImportLine(BaseModel):
+    name: str = Field(min_length=1, max_length=100)
+    board_json: BoardPayload
+
+
+def _export_lines(user_id: int) -> Iterator[bytes]:
+    for row in iter_board_rows_for_user(user_id):
+        # board_json is spliced in as stored to avoid re-serializing it.
+        head = json.dumps({"id": row["id"], "name": row["name"]})[:-1]
+        tail = json.dumps({"created_at": row["created_at"], "updated_at": row["updated_at"]})[1:]
+        yield f'{head}, "board_json": {row["board_json"]}, {tail}\n'.encode()
+
+
+@router.get("/boards/export")
+async def export_boards_endpoint(
+    user: SessionUser = Depends(require_authenticated_user),
+) -> StreamingResponse:
+    await db_async.run(write_buffer.flush_user, user.user_id)
+    return StreamingResponse(_export_lines(user.user_id), media_type=NDJSON_MEDIA_TYPE)
+
+
+@router.post("/boards/import", status_code=status.HTTP_201_CREATED)
+async def import_boards_endpoint(
+    request: Request,
     user: SessionUser = Depends(require_authenticated_user),
 ) -> dict:
-    return create_board(user.user_id, payload.name)
+    batch: list[tuple[str, dict]] = []
+    board_ids: list[str] = []
+    line_number = 0
+    received = 0
+    pending = bytearray()
+
+    async def flush() -> None:
+        if batch:
+            board_ids.extend(await db_async.import_boards(user.user_id, list(batch)))
+            batch.clear()
+
+    async def too_large(message: str) -> HTTPException:
+        await flush()
+        return HTTPException(
+            status_code=status.HTTP_413_CONTENT_TOO_LARGE,
+            detail={"line": line_number + 1, "error": message, "imported": len(board_ids)},
+        )
+
+    async def parse(line: bytes) -> None:
+        nonlocal line_number
+        line_number += 1
+        if not line.strip():
+            return
+        try:
+            item = BoardImportLine.model_validate_json(line)
+        except ValidationError as exc:
+            await flush()
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_CONTENT,
+                detail={
+                    "line": line_number,
+                    "errors": exc.errors(include_url=False, include_context=False),
+                    "imported": len(board_ids),
+                },
+            ) from exc
+        batch.append((item.name, item.board_json.model_dump()))
+        if len(batch) >= IMPORT_BATCH_SIZE:
+            await flush()
+
+    async for chunk in request.stream():
+        received += len(chunk)
+        if received > MAX_IMPORT_BYTES:
+            raise await too_large(f"Import exceeds {MAX_IMPORT_BYTES} bytes")
+        # Only the new chunk is searched for newlines; a line arriving in
+        # many pieces is never rescanned.
+        start = 0
+        while (end := chunk.find(b"\n", start)) != -1:
+            pending += chunk[start:end]
+            if len(pending) > MAX_IMPORT_LINE_BYTES:
+                raise await too_large(f"Line exceeds {MAX_IMPORT_LINE_BYTES} bytes")
+            await parse(bytes(pending))
+            pending.clear()
+            start = end + 1
+        pending += chunk[start:]
+        if len(pending) > MAX_IMPORT_LINE_BYTES:
+            raise await too_large(f"Line exceeds {MAX_IMPORT_LINE_BYTES} bytes")
+    await parse(bytes(pending))
+    await flush()
+
+    return {"imported": len(board_ids), "board_ids": board_ids}
 
 
 @router.get("/boards/{board_id}")
-def get_board_endpoint(
+async def get_board_endpoint(
     board_id: str,
+    shallow: bool = Query(default=False),
+    limit: int = Query(default=CARD_PAGE_SIZE, ge=1, le=MAX_CARD_PAGE_SIZE),
     user: SessionUser = Depends(require_authenticated_user),
 ) -> dict:
-    board = get_board(board_id, user.user_id)
+    if shallow:
+        return await _shallow_board(board_id, user.user_id, limit)
+    board = await db_async.get_board(board_id, user.user_id)
     if not board:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Board not found",
         )
-    return board
+    return await _with_pending(board)
 
 
 @router.put("/boards/{board_id}")
-def update_board_endpoint(
+async def update_board_endpoint(
     board_id: str,
     payload: BoardPayload,
+    durable: bool = Query(default=False),
     user: SessionUser = Depends(require_authenticated_user),
 ) -> dict:
-    board = get_board(board_id, user.user_id)
+    board = await db_async.get_board(board_id, user.user_id)
     if not board:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Board not found",
         )
-    return update_board(board_id, user.user_id, payload.model_dump())
+    return await _save_board(board, user.user_id, payload.model_dump(), durable)
 
 
 class RenameBoardRequest(BaseModel):
@@ -131,36 +313,318 @@ class RenameBoardRequest(BaseModel):
 
 
 @router.patch("/boards/{board_id}")
-def rename_board_endpoint(
+async def rename_board_endpoint(
     board_id: str,
     payload: RenameBoardRequest,
     user: SessionUser = Depends(require_authenticated_user),
 ) -> dict:
-    board = get_board(board_id, user.user_id)
+    board = await db_async.get_board(board_id, user.user_id)
     if not board:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Board not found",
         )
-    return rename_board(board_id, user.user_id, payload.name)
+    return await db_async.rename_board(board_id, user.user_id, payload.name)
 
 
 @router.delete("/boards/{board_id}")
-def delete_board_endpoint(
+async def delete_board_endpoint(
     board_id: str,
     user: SessionUser = Depends(require_authenticated_user),
 ) -> dict:
-    board = get_board(board_id, user.user_id)
+    board = await db_async.get_board(board_id, user.user_id)
     if not board:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Board not found",
         )
     try:
-        delete_board(board_id, user.user_id)
+        await db_async.delete_board(board_id, user.user_id)
+        write_buffer.discard(board_id)
     except ValueError as exc:
         raise HTTPException(
             status_code=status.HTTP_409_CONFLICT,
             detail=str(exc),
         ) from exc
     return {"status": "ok"}
+
+
+# ── Shallow board loading ────────────────────────────────────────────────
+#
+# Large boards can be opened as columns plus one page of card headers per
+# column; the rest of each column and full card details load on demand.
+
+
+def _card_header(card: dict) -> dict:
+    return {
+        "id": card["id"],
+        "title": card["title"],
+        "labels": card.get("labels", []),
+        "priority": card.get("priority") or "none",
+        "due_date": card.get("due_date"),
+    }
+
+
+def _page(card_ids: list[str], cursor: str | None, limit: int) -> tuple[list[str], str | None]:
+    start = 0
+    if cursor is not None:
+        try:
+            start = card_ids.index(cursor) + 1
+        except ValueError:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="Cursor card is no longer in this column",
+            ) from None
+    page = card_ids[start : start + limit]
+    return page, page[-1] if start + limit < len(card_ids) else None
+
+
+async def _board_outline(board_id: str, user_id: int) -> tuple[dict, list[dict], dict | None]:
+    outline = await db_async.get_board_outline(board_id, user_id)
+    if not outline:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Board not found",
+        )
+    columns = outline.pop("columns")
+    pending = await _pending_board(board_id)
+    return outline, pending["columns"] if pending else columns, pending
+
+
+async def _card_headers(
+    board_id: str, user_id: int, card_ids: list[str], pending: dict | None
+) -> dict[str, dict]:
+    if pending is not None:
+        return {card_id: _card_header(pending["cards"][card_id]) for card_id in card_ids}
+    return await db_async.get_card_headers(board_id, user_id, card_ids)
+
+
+async def _shallow_board(board_id: str, user_id: int, limit: int) -> dict:
+    outline, columns, pending = await _board_outline(board_id, user_id)
+    shallow_columns = []
+    for column in columns:
+        page, next_cursor = _page(column["cardIds"], None, limit)
+        shallow_columns.append(
+            {
+                "id": column["id"],
+                "title": column["title"],
+                "cardIds": page,
+                "total": len(column["cardIds"]),
+                "next_cursor": next_cursor,
+            }
+        )
+    card_ids = [card_id for column in shallow_columns for card_id in column["cardIds"]]
+    cards = await _card_headers(board_id, user_id, card_ids, pending)
+    return {**outline, "shallow": True, "board_json": {"columns": shallow_columns, "cards": cards}}
+
+
+@router.get("/boards/{board_id}/columns/{column_id}/cards")
+async def column_cards_endpoint(
+    board_id: str,
+    column_id: str,
+    cursor: str | None = Query(default=None),
+    limit: int = Query(default=CARD_PAGE_SIZE, ge=1, le=MAX_CARD_PAGE_SIZE),
+    user: SessionUser = Depends(require_authenticated_user),
+) -> dict:
+    _outline, columns, pending = await _board_outline(board_id, user.user_id)
+    column = next((column for column in columns if column["id"] == column_id), None)
+    if column is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Column not found",
+        )
+    page, next_cursor = _page(column["cardIds"], cursor, limit)
+    cards = await _card_headers(board_id, user.user_id, page, pending)
+    return {"cardIds": page, "cards": cards, "total": len(column["cardIds"]), "next_cursor": next_cursor}
+
+
+@router.get("/boards/{board_id}/cards/{card_id}")
+async def get_card_endpoint(
+    board_id: str,
+    card_id: str,
+    user: SessionUser = Depends(require_authenticated_user),
+) -> dict:
+    pending = None
+    if write_buffer.pending_record(board_id) is not None:
+        # Confirms ownership before serving the buffered state.
+        _outline, _columns, pending = await _board_outline(board_id, user.user_id)
+    if pending is not None:
+        card = pending["cards"].get(card_id)
+    else:
+        card = await db_async.get_card(board_id, user.user_id, card_id)
+    if card is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Card not found",
+        )
+    return card
+
+
+# ── Card moves ───────────────────────────────────────────────────────────
+
+
+class MoveCardRequest(BaseModel):
+    column_id: str
+    before_card_id: str | None = None
+    after_card_id: str | None = None
+
+    @model_validator(mode="after")
+    def validate_anchor(self) -> "MoveCardRequest":
+        if self.before_card_id is not None and self.after_card_id is not None:
+            raise ValueError("Give at most one of before_card_id and after_card_id")
+        return self
+
+
+@router.post("/boards/{board_id}/cards/{card_id}/move")
+async def move_card_endpoint(
+    board_id: str,
+    card_id: str,
+    payload: MoveCardRequest,
+    user: SessionUser = Depends(require_authenticated_user),
+) -> dict:
+    await db_async.run(write_buffer.flush_board, board_id, user.user_id)
+    try:
+        return await db_async.move_card(
+            board_id,
+            user.user_id,
+            card_id,
+            payload.column_id,
+            before_id=payload.before_card_id,
+            after_id=payload.after_card_id,
+        )
+    except BoardOperationError as exc:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=str(exc),
+        ) from exc
+    except ValueError as exc:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=str(exc),
+        ) from exc
+
+
+# ── Archive ──────────────────────────────────────────────────────────────
+
+
+class ArchiveCardsRequest(BaseModel):
+    card_ids: list[str] = Field(min_length=1, max_length=1000)
+
+
+@router.post("/boards/{board_id}/archive")
+async def archive_cards_endpoint(
+    board_id: str,
+    payload: ArchiveCardsRequest,
+    user: SessionUser = Depends(require_authenticated_user),
+) -> dict:
+    await db_async.run(write_buffer.flush_board, board_id, user.user_id)
+    try:
+        archived = await db_async.archive_cards(board_id, user.user_id, payload.card_ids)
+    except ValueError as exc:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=str(exc),
+        ) from exc
+    metrics.inc("cards_archived_total", len(archived))
+    return {"archived": archived}
+
+
+@router.get("/archive")
+async def search_archive_endpoint(
+    q: str | None = Query(default=None, max_length=200),
+    board_id: str | None = Query(default=None),
+    before: str | None = Query(default=None),
+    limit: int = Query(default=50, ge=1, le=500),
+    user: SessionUser = Depends(require_authenticated_user),
+) -> list[dict]:
+    return await db_async.search_archived_cards(
+        user.user_id, query=q, board_id=board_id, limit=limit, before=before
+    )
+
+
+@router.post("/boards/{board_id}/archive/{card_id}/restore")
+async def restore_card_endpoint(
+    board_id: str,
+    card_id: str,
+    user: SessionUser = Depends(require_authenticated_user),
+) -> dict:
+    await db_async.run(write_buffer.flush_board, board_id, user.user_id)
+    try:
+        board = await db_async.restore_archived_card(board_id, user.user_id, card_id)
+    except ValueError as exc:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=str(exc),
+        ) from exc
+    if board is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Archived card not found",
+        )
+    metrics.inc("cards_restored_total")
+    return board
+
+
+# ── History and revert ───────────────────────────────────────────────────
+
+
+@router.get("/boards/{board_id}/history")
+async def board_history_endpoint(
+    board_id: str,
+    limit: int = Query(default=50, ge=1, le=500),
+    before: int | None = Query(default=None, ge=1),
+    user: SessionUser = Depends(require_authenticated_user),
+) -> list[dict]:
+    await db_async.run(write_buffer.flush_board, board_id, user.user_id)
+    history = await db_async.get_board_history(board_id, user.user_id, limit=limit, before=before)
+    if history is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Board not found",
+        )
+    return history
+
+
+@router.post("/boards/{board_id}/revert/{version}")
+async def revert_board_endpoint(
+    board_id: str,
+    version: int,
+    user: SessionUser = Depends(require_authenticated_user),
+) -> dict:
+    board = await db_async.get_board(board_id, user.user_id)
+    if not board:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Board not found",
+        )
+    await db_async.run(write_buffer.flush_board, board_id, user.user_id)
+    previous = await db_async.get_board_version(board_id, user.user_id, version)
+    if previous is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Board version not found",
+        )
+    return await db_async.update_board(board_id, user.user_id, previous)
+
+
+# ── Cross-board queries ──────────────────────────────────────────────────
+
+
+Priority = Literal["none", "low", "medium", "high", "urgent"]
+
+
+@router.get("/cards/due")
+async def due_cards_endpoint(
+    before: str | None = Query(default=None, pattern=r"^\d{4}-\d{2}-\d{2}$"),
+    priority: list[Priority] | None = Query(default=None),
+    limit: int = Query(default=100, ge=1, le=1000),
+    user: SessionUser = Depends(require_authenticated_user),
+) -> list[dict]:
+    await db_async.run(write_buffer.flush_user, user.user_id)
+    return await db_async.get_due_cards(user.user_id, before=before, priorities=priority, limit=limit)
+
+
+@router.get("/dashboard")
+async def dashboard_endpoint(user: SessionUser = Depends(require_authenticated_user)) -> dict:
+    await db_async.run(write_buffer.flush_user, user.user_id)
+    return await db_async.get_dashboard(user.user_id)
@@ -1,4 +1,10 @@
-from fastapi import APIRouter
+import os
+import secrets
+
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from fastapi.responses import JSONResponse
+
+from app.metrics import metrics
 
 router = APIRouter()
 
@@ -8,6 +14,42 @@ def health() -> dict[str, str]:
     return {"status": "ok"}
 
 
+@router.get("/health/live")
+async def health_live() -> dict[str, str]:
+    return {"status": "ok"}
+
+
+@router.get("/health/ready")
+async def health_ready(request: Request) -> JSONResponse:
+    report = await request.app.state.health_monitor.readiness()
+    status_code = 200 if report["status"] == "ready" else 503
+    return JSONResponse(report, status_code=status_code)
+
+
+def _require_metrics_token(request: Request) -> None:
+    """With PM_METRICS_TOKEN set, /metrics needs ``Authorization: Bearer <token>``.
+
+    Without it the endpoint is open, which is only safe when the API is not
+    reachable from outside: it exposes per-route traffic, backup timings,
+    AI circuit state and queue depths.
+    """
+    expected = os.getenv("PM_METRICS_TOKEN")
+    if not expected:
+        return
+    scheme, _, token = request.headers.get("authorization", "").partition(" ")
+    if scheme.lower() != "bearer" or not secrets.compare_digest(token.encode(), expected.encode()):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Metrics token required",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+
+
+@router.get("/metrics", dependencies=[Depends(_require_metrics_token)])
+def read_metrics() -> dict:
+    return metrics.snapshot()
+
+
 @router.get("/hello")
 def hello() -> dict[str, str]:
     return {"message": "Hello from FastAPI"}
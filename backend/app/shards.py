@@ -0,0 +1,184 @@
+import argparse
+import sqlite3
+from pathlib import Path
+
+from app.db import (
+    clear_shard_cache,
+    connect,
+    ensure_shadow_user,
+    get_connection,
+    get_db_path,
+    get_shard_count,
+    get_shard_path,
+    init_db,
+    shard_for_user,
+)
+
+# Per-user tables, parents first. Each entry selects the user's rows; ``{db}``
+# is the schema the rows are read from (``source`` when copying, ``main``
+# when clearing them out).
+USER_TABLES = [
+    ("board_templates", "user_id = :user_id"),
+    ("boards", "user_id = :user_id"),
+    ("board_events", "board_id IN (SELECT id FROM {db}.boards WHERE user_id = :user_id)"),
+    ("board_outlines", "board_id IN (SELECT id FROM {db}.boards WHERE user_id = :user_id)"),
+    ("card_index", "user_id = :user_id"),
+    ("board_aggregates", "user_id = :user_id"),
+    ("archived_cards", "user_id = :user_id"),
+    ("ai_conversations", "user_id = :user_id"),
+    (
+        "ai_conversation_turns",
+        "conversation_id IN (SELECT id FROM {db}.ai_conversations WHERE user_id = :user_id)",
+    ),
+]
+
+
+def _delete_user_rows(connection: sqlite3.Connection, user_id: int) -> None:
+    """Delete every ``USER_TABLES`` row of ``user_id`` from ``main``, children first."""
+    for table, condition in reversed(USER_TABLES):
+        connection.execute(
+            f"DELETE FROM main.{table} WHERE {condition.format(db='main')}", {"user_id": user_id}
+        )
+
+
+def _location_path(shard: int | None) -> Path:
+    return get_db_path() if shard is None else get_shard_path(shard)
+
+
+def _columns(connection: sqlite3.Connection, table: str) -> str:
+    return ", ".join(row["name"] for row in connection.execute(f"PRAGMA main.table_info({table})"))
+
+
+def plan_moves() -> list[tuple[int, int | None, int | None]]:
+    """Return ``(user_id, from_shard, to_shard)`` for every misplaced user.
+
+    ``None`` stands for the central database.
+    """
+    shard_count = get_shard_count()
+    with get_connection() as connection:
+        rows = connection.execute(
+            """
+            SELECT u.id, s.shard FROM users u
+            LEFT JOIN user_shards s ON s.user_id = u.id
+            ORDER BY u.id
+            """
+        ).fetchall()
+    moves = []
+    for row in rows:
+        target = shard_for_user(row["id"], shard_count) if shard_count > 0 else None
+        if row["shard"] != target:
+            moves.append((row["id"], row["shard"], target))
+    return moves
+
+
+def move_user(user_id: int, source: int | None, target: int | None) -> int:
+    """Copy a user's rows to ``target``, repoint the map, then delete the source rows.
+
+    Each step commits on its own, so an interrupted move leaves at worst a
+    stale copy behind, and re-running the rebalance finishes the job.
+    Returns the number of boards moved.
+    """
+    source_path = _location_path(source)
+    with connect(_location_path(target)) as connection:
+        connection.execute("ATTACH DATABASE ? AS source", (str(source_path),))
+        if target is not None:
+            ensure_shadow_user(connection, user_id)
+        connection.execute("BEGIN IMMEDIATE")
+        # Clear leftovers from an earlier interrupted move.
+        _delete_user_rows(connection, user_id)
+        for table, condition in USER_TABLES:
+            columns = _columns(connection, table)
+            connection.execute(
+                f"INSERT INTO main.{table} ({columns}) SELECT {columns} FROM source.{table} "
+                f"WHERE {condition.format(db='source')}",
+                {"user_id": user_id},
+            )
+        moved = connection.execute(
+            "SELECT COUNT(*) AS cnt FROM main.boards WHERE user_id = ?", (user_id,)
+        ).fetchone()["cnt"]
+        connection.commit()
+        connection.execute("DETACH DATABASE source")
+
+    with get_connection() as connection:
+        if target is None:
+            connection.execute("DELETE FROM user_shards WHERE user_id = ?", (user_id,))
+        else:
+            connection.execute(
+                "INSERT OR REPLACE INTO user_shards (user_id, shard) VALUES (?, ?)",
+                (user_id, target),
+            )
+
+    with connect(source_path) as connection:
+        _delete_user_rows(connection, user_id)
+        if source is not None:
+            connection.execute("DELETE FROM users WHERE id = ?", (user_id,))
+
+    clear_shard_cache()
+    return moved
+
+
+def rebalance(dry_run: bool = False) -> list[dict]:
+    """Move every user to the shard the current PM_DB_SHARDS assigns them.
+
+    Run it with the app stopped: writes that land on the old location during
+    a move would be lost.
+    """
+    init_db()
+    results = []
+    for user_id, source, target in plan_moves():
+        boards = 0 if dry_run else move_user(user_id, source, target)
+        results.append({"user_id": user_id, "from": source, "to": target, "boards": boards})
+    return results
+
+
+def shard_status() -> list[dict]:
+    locations: list[int | None] = [None, *range(get_shard_count())]
+    with get_connection() as connection:
+        mapped = {
+            row["shard"]: row["cnt"]
+            for row in connection.execute(
+                "SELECT shard, COUNT(*) AS cnt FROM user_shards GROUP BY shard"
+            )
+        }
+    locations += sorted(shard for shard in mapped if shard not in locations)
+
+    status = []
+    for shard in locations:
+        path = _location_path(shard)
+        boards = 0
+        if path.exists():
+            with connect(path) as connection:
+                boards = connection.execute("SELECT COUNT(*) AS cnt FROM boards").fetchone()["cnt"]
+        status.append(
+            {"shard": shard, "path": str(path), "users": mapped.get(shard), "boards": boards}
+        )
+    return status
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m app.shards")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("status", help="show users and boards per shard")
+    rebalance_parser = commands.add_parser(
+        "rebalance", help="move users to the shards PM_DB_SHARDS assigns (stop the app first)"
+    )
+    rebalance_parser.add_argument("--dry-run", action="store_true")
+
+    args = parser.parse_args(argv)
+    if args.command == "status":
+        for entry in shard_status():
+            name = "central" if entry["shard"] is None else f"shard {entry['shard']}"
+            users = "-" if entry["users"] is None else entry["users"]
+            print(f"{name:>10}  users={users}  boards={entry['boards']}  {entry['path']}")
+    elif args.command == "rebalance":
+        moves = rebalance(dry_run=args.dry_run)
+        for move in moves:
+            source = "central" if move["from"] is None else move["from"]
+            target = "central" if move["to"] is None else move["to"]
+            print(f"user {move['user_id']}: {source} -> {target} ({move['boards']} boards)")
+        verb = "would move" if args.dry_run else "moved"
+        print(f"{verb} {len(moves)} users")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,200 @@
+import hashlib
+import mimetypes
+import os
+import sys
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from fastapi.staticfiles import StaticFiles
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse, Response
+from starlette.types import Scope
+
+from app.compression import available_encodings, compress, negotiate_encoding
+
+COMPRESSIBLE_SUFFIXES = {
+    ".css",
+    ".html",
+    ".js",
+    ".json",
+    ".map",
+    ".mjs",
+    ".svg",
+    ".txt",
+    ".webmanifest",
+    ".xml",
+}
+PRECOMPRESSED_SUFFIXES = {"gzip": ".gz", "br": ".br"}
+MIN_COMPRESS_BYTES = 512
+MAX_PRECOMPRESS_BYTES = 8 * 1024 * 1024
+MEMORY_RESIDENT_MAX_BYTES = 64 * 1024
+IMMUTABLE_PREFIX = "_next/static/"
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+REVALIDATE_CACHE_CONTROL = "no-cache"
+
+
+def _static_encodings() -> list[str]:
+    return [encoding for encoding in available_encodings() if encoding in PRECOMPRESSED_SUFFIXES]
+
+
+@dataclass
+class StaticAsset:
+    mtime_ns: int
+    size: int
+    digest: str
+    media_type: str
+    body: bytes | None = None
+    variants: dict[str, bytes] = field(default_factory=dict)
+
+    def etag(self, encoding: str | None) -> str:
+        return f'"{self.digest}-{encoding}"' if encoding else f'"{self.digest}"'
+
+
+def _is_compressible(path: Path) -> bool:
+    return path.suffix.lower() in COMPRESSIBLE_SUFFIXES
+
+
+def _is_precompressed_sibling(path: Path) -> bool:
+    return path.suffix in PRECOMPRESSED_SUFFIXES.values() and _is_compressible(
+        path.with_suffix("")
+    )
+
+
+def _load_asset(path: Path, stat_result: os.stat_result) -> StaticAsset | None:
+    if stat_result.st_size > MAX_PRECOMPRESS_BYTES:
+        return None
+
+    data = path.read_bytes()
+    asset = StaticAsset(
+        mtime_ns=stat_result.st_mtime_ns,
+        size=stat_result.st_size,
+        digest=hashlib.sha256(data).hexdigest()[:32],
+        media_type=mimetypes.guess_type(path.name)[0] or "application/octet-stream",
+    )
+    if len(data) <= MEMORY_RESIDENT_MAX_BYTES:
+        asset.body = data
+
+    if _is_compressible(path) and len(data) >= MIN_COMPRESS_BYTES:
+        for encoding in _static_encodings():
+            sibling = path.with_name(path.name + PRECOMPRESSED_SUFFIXES[encoding])
+            if sibling.exists() and sibling.stat().st_mtime_ns >= stat_result.st_mtime_ns:
+                compressed = sibling.read_bytes()
+            else:
+                compressed = compress(data, encoding)
+            # Only keep variants that actually save bytes on the wire.
+            if len(compressed) < len(data):
+                asset.variants[encoding] = compressed
+    return asset
+
+
+class PrecompressedStaticFiles(StaticFiles):
+    """StaticFiles that serves precompressed, content-addressed assets.
+
+    Compressible files are compressed once (or picked up from ``.gz``/``.br``
+    siblings written at build time) and kept in memory together with small
+    files. Every asset gets a strong ETag derived from its content; hashed
+    Next.js build output is marked immutable.
+    """
+
+    def __init__(self, *, directory: str | os.PathLike[str], html: bool = False) -> None:
+        super().__init__(directory=directory, html=html)
+        self._root = Path(directory).resolve()
+        self._assets: dict[str, StaticAsset | None] = {}
+        self._preload()
+
+    def _preload(self) -> None:
+        for path in self._root.rglob("*"):
+            if path.is_file() and not _is_precompressed_sibling(path):
+                self._asset_for(path, path.stat())
+
+    def _asset_for(self, path: Path, stat_result: os.stat_result) -> StaticAsset | None:
+        key = str(path)
+        if key in self._assets:
+            asset = self._assets[key]
+            if asset is None or (
+                asset.mtime_ns == stat_result.st_mtime_ns and asset.size == stat_result.st_size
+            ):
+                return asset
+
+        loaded = _load_asset(path, stat_result)
+        self._assets[key] = loaded
+        return loaded
+
+    def _cache_control(self, path: Path) -> str:
+        try:
+            relative = path.resolve().relative_to(self._root).as_posix()
+        except ValueError:
+            return REVALIDATE_CACHE_CONTROL
+        if relative.startswith(IMMUTABLE_PREFIX):
+            return IMMUTABLE_CACHE_CONTROL
+        return REVALIDATE_CACHE_CONTROL
+
+    def file_response(
+        self,
+        full_path: os.PathLike[str] | str,
+        stat_result: os.stat_result,
+        scope: Scope,
+        status_code: int = 200,
+    ) -> Response:
+        path = Path(full_path)
+        headers = {"Cache-Control": self._cache_control(path)}
+        asset = self._asset_for(path, stat_result)
+        if asset is None:
+            return FileResponse(path, status_code=status_code, stat_result=stat_result, headers=headers)
+
+        request_headers = Headers(scope=scope)
+        encoding = negotiate_encoding(
+            request_headers.get("accept-encoding"), list(asset.variants)
+        )
+        etag = asset.etag(encoding)
+        headers["ETag"] = etag
+        if asset.variants:
+            headers["Vary"] = "Accept-Encoding"
+
+        if_none_match = request_headers.get("if-none-match")
+        if if_none_match and (
+            if_none_match.strip() == "*"
+            or etag in [tag.strip() for tag in if_none_match.split(",")]
+        ):
+            return Response(status_code=304, headers=headers)
+
+        if encoding is not None:
+            headers["Content-Encoding"] = encoding
+            return Response(
+                asset.variants[encoding],
+                status_code=status_code,
+                media_type=asset.media_type,
+                headers=headers,
+            )
+        if asset.body is not None:
+            return Response(
+                asset.body,
+                status_code=status_code,
+                media_type=asset.media_type,
+                headers=headers,
+            )
+        return FileResponse(path, status_code=status_code, stat_result=stat_result, headers=headers)
+
+
+def precompress_directory(directory: Path) -> int:
+    """Write ``.gz``/``.br`` siblings for every compressible file at build time."""
+    written = 0
+    for path in directory.rglob("*"):
+        if not path.is_file() or _is_precompressed_sibling(path) or not _is_compressible(path):
+            continue
+        data = path.read_bytes()
+        if len(data) < MIN_COMPRESS_BYTES or len(data) > MAX_PRECOMPRESS_BYTES:
+            continue
+        for encoding in _static_encodings():
+            compressed = compress(data, encoding, best=True)
+            if len(compressed) < len(data):
+                path.with_name(path.name + PRECOMPRESSED_SUFFIXES[encoding]).write_bytes(compressed)
+                written += 1
+    return written
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 2:
+        sys.exit("usage: python -m app.static_files <directory>")
+    count = precompress_directory(Path(sys.argv[1]))
+    print(f"Wrote {count} precompressed files")
@@ -0,0 +1,177 @@
+import asyncio
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass
+
+from app import db_async
+from app.board_records import BoardRecord
+from app.db import update_board
+from app.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# Flushes of one board are serialized on one of a fixed set of locks, picked
+# by hashing the board id, so the set never grows with the number of boards.
+BOARD_LOCK_STRIPES = 64
+
+
+def _coalesce_seconds() -> float:
+    return float(os.getenv("PM_WRITE_COALESCE_MS", "0")) / 1000
+
+
+def _strict_durability() -> bool:
+    return os.getenv("PM_WRITE_DURABILITY", "buffered").lower() == "strict"
+
+
+@dataclass(slots=True)
+class _PendingWrite:
+    user_id: int
+    board: BoardRecord
+    staged_at: float
+    seq: int
+
+
+class WriteBehindBuffer:
+    """Holds the latest unsaved state of recently PUT boards.
+
+    Successive full-board saves within ``PM_WRITE_COALESCE_MS`` replace each
+    other in memory and only the last one is written. Reads of a board with
+    a pending write see the pending state, and anything else that writes or
+    replays a board must call ``flush_board`` first so it never works from
+    (or overwrites) a stale row. Pending boards are held as compact
+    ``BoardRecord``s; on a large board building one or turning it back into
+    JSON takes milliseconds, so request handlers do both on the DB executor.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._pending: dict[str, _PendingWrite] = {}
+        self._board_locks = [threading.Lock() for _ in range(BOARD_LOCK_STRIPES)]
+        self._seq = 0
+
+    @property
+    def window(self) -> float:
+        return _coalesce_seconds()
+
+    def enabled(self) -> bool:
+        return self.window > 0 and not _strict_durability()
+
+    def stage(self, board_id: str, user_id: int, board: BoardRecord) -> None:
+        with self._lock:
+            self._seq += 1
+            existing = self._pending.get(board_id)
+            staged_at = existing.staged_at if existing else time.monotonic()
+            self._pending[board_id] = _PendingWrite(user_id, board, staged_at, self._seq)
+        metrics.inc("board_writes_coalesced_total" if existing else "board_writes_buffered_total")
+
+    def pending_record(self, board_id: str) -> BoardRecord | None:
+        with self._lock:
+            pending = self._pending.get(board_id)
+        return pending.board if pending else None
+
+    def pending_board(self, board_id: str) -> dict | None:
+        board = self.pending_record(board_id)
+        return board.to_json() if board else None
+
+    def pending_count(self) -> int:
+        return len(self._pending)
+
+    def due(self, now: float | None = None) -> list[str]:
+        now = time.monotonic() if now is None else now
+        window = self.window
+        with self._lock:
+            return [board_id for board_id, pending in self._pending.items() if now - pending.staged_at >= window]
+
+    def next_due_in(self) -> float | None:
+        with self._lock:
+            if not self._pending:
+                return None
+            oldest = min(pending.staged_at for pending in self._pending.values())
+        return max(0.0, oldest + self.window - time.monotonic())
+
+    def _board_lock(self, board_id: str) -> threading.Lock:
+        return self._board_locks[hash(board_id) % len(self._board_locks)]
+
+    def flush_board(self, board_id: str, user_id: int | None = None) -> dict | None:
+        """Write the pending state of ``board_id``, if any. Blocking.
+
+        With ``user_id`` the flush only happens when that user owns the
+        pending write, so a request for someone else's board never triggers
+        the owner's write.
+        """
+        # The board lock keeps two flushes of one board in order; the entry
+        # stays visible to readers until its row is committed.
+        with self._board_lock(board_id):
+            with self._lock:
+                pending = self._pending.get(board_id)
+            if pending is None or (user_id is not None and pending.user_id != user_id):
+                return None
+            try:
+                result = update_board(board_id, pending.user_id, pending.board.to_json())
+            except ValueError:
+                # The board was deleted meanwhile.
+                result = None
+            with self._lock:
+                current = self._pending.get(board_id)
+                if current is not None and current.seq == pending.seq:
+                    del self._pending[board_id]
+        metrics.inc("board_write_flushes_total")
+        return result
+
+    def write_through(self, board_id: str, user_id: int, board_json: dict) -> dict:
+        """Write ``board_json`` now, superseding any pending state. Blocking."""
+        with self._board_lock(board_id):
+            self.discard(board_id)
+            return update_board(board_id, user_id, board_json)
+
+    def flush_user(self, user_id: int) -> None:
+        with self._lock:
+            board_ids = [board_id for board_id, pending in self._pending.items() if pending.user_id == user_id]
+        for board_id in board_ids:
+            self.flush_board(board_id)
+
+    def flush_all(self) -> None:
+        with self._lock:
+            board_ids = list(self._pending)
+        for board_id in board_ids:
+            self.flush_board(board_id)
+
+    def discard(self, board_id: str) -> None:
+        with self._lock:
+            self._pending.pop(board_id, None)
+
+
+write_buffer = WriteBehindBuffer()
+metrics.register("board_writes_pending", write_buffer.pending_count)
+
+
+class WriteBehindFlusher:
+    """Background task that writes buffered boards once their window passes."""
+
+    def __init__(self, buffer: WriteBehindBuffer | None = None) -> None:
+        self.buffer = buffer or write_buffer
+        self._task: asyncio.Task | None = None
+
+    async def start(self) -> None:
+        if self.buffer.window > 0:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        # Flush on shutdown so a clean stop never loses buffered saves.
+        await asyncio.to_thread(self.buffer.flush_all)
+
+    async def _run(self) -> None:
+        while True:
+            delay = self.buffer.next_due_in()
+            await asyncio.sleep(self.buffer.window if delay is None else min(delay, self.buffer.window))
+            for board_id in self.buffer.due():
+                try:
+                    await db_async.run(self.buffer.flush_board, board_id)
+                except Exception:
+                    logger.exception("Flushing buffered board %s failed", board_id)
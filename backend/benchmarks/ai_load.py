@@ -0,0 +1,108 @@
+"""Load-test the AI board-action path offline against the OpenRouter simulator.
+
+Run from backend/:
+
+    python -m benchmarks.ai_load --requests 200 --concurrency 32 --latency-ms 300 --rate-limit-rate 0.05
+
+Every request is a real board action against a throwaway database; only
+the upstream model is simulated.
+"""
+
+import argparse
+import os
+import statistics
+import tempfile
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+
+def _percentile(values: list[float], fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.ai_load")
+    parser.add_argument("--requests", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--users", type=int, default=8)
+    parser.add_argument("--latency", choices=["fixed", "uniform", "lognormal"], default="lognormal")
+    parser.add_argument("--latency-ms", type=float, default=200.0)
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--retry-after", type=float, default=0.2)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    scratch = tempfile.TemporaryDirectory()
+    os.environ["PM_DB_PATH"] = str(Path(scratch.name) / "pm.db")
+    os.environ.setdefault("OPENROUTER_API_KEY", "sim")
+
+    from fastapi.testclient import TestClient
+
+    from app import ai_client
+    from app.main import create_app
+    from app.metrics import metrics
+    from app.openrouter_sim import OpenRouterSimulator, SimulatorConfig
+
+    simulator = OpenRouterSimulator(
+        SimulatorConfig(
+            latency=args.latency,
+            latency_ms=args.latency_ms,
+            rate_limit_rate=args.rate_limit_rate,
+            error_rate=args.error_rate,
+            retry_after_seconds=args.retry_after,
+            seed=args.seed,
+        )
+    )
+    ai_client.set_transport(simulator.transport())
+
+    with TestClient(create_app()) as setup:
+        for index in range(args.users):
+            setup.post(
+                "/api/auth/register",
+                json={"username": f"load{index}", "password": "loadtest123"},
+            )
+
+    clients = []
+    for index in range(args.users):
+        client = TestClient(create_app())
+        client.__enter__()
+        client.post("/api/auth/login", json={"username": f"load{index}", "password": "loadtest123"})
+        clients.append(client)
+
+    def one(index: int) -> tuple[int, float]:
+        client = clients[index % len(clients)]
+        started = time.perf_counter()
+        resp = client.post("/api/ai/board-action", json={"question": f"Move something ({index})"})
+        return resp.status_code, time.perf_counter() - started
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        results = list(pool.map(one, range(args.requests)))
+    elapsed = time.perf_counter() - started
+
+    for client in clients:
+        client.__exit__(None, None, None)
+    ai_client.set_transport(None)
+    scratch.cleanup()
+
+    latencies = [latency for _, latency in results]
+    counters = metrics.snapshot()["counters"]
+    print(f"requests:       {args.requests} in {elapsed:.2f}s ({args.requests / elapsed:.1f} req/s)")
+    print(f"statuses:       {dict(sorted(Counter(status for status, _ in results).items()))}")
+    print(f"upstream:       {dict(sorted(simulator.stats.items()))}")
+    print(f"retries:        {int(counters.get('openrouter_retries_total', 0))}")
+    print(
+        "latency (s):    "
+        f"p50={statistics.median(latencies):.3f} "
+        f"p95={_percentile(latencies, 0.95):.3f} "
+        f"p99={_percentile(latencies, 0.99):.3f} "
+        f"max={max(latencies):.3f}"
+    )
+
+
+if __name__ == "__main__":
+    main()
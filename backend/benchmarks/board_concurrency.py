@@ -0,0 +1,106 @@
+"""Hammer the board routes with many simultaneous in-process clients.
+
+Run from backend/:
+
+    python -m benchmarks.board_concurrency --clients 500 --rounds 4
+
+Each client logs in as its own user and alternates GET and PUT of its
+board. Pass --threadpool-tokens to shrink Starlette's shared threadpool
+and check that the async board routes keep flowing while it is saturated.
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+
+def _percentile(values: list[float], fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+async def _run(args: argparse.Namespace) -> None:
+    import anyio
+    import httpx
+
+    from app.db import create_user
+    from app.db_async import executor_stats
+    from app.main import create_app
+    from app.routers.auth import SESSION_COOKIE_NAME, SessionUser, sessions
+
+    app = create_app()
+    # Seed users and sessions directly; bcrypt on login would dominate.
+    tokens = []
+    for index in range(args.clients):
+        user = create_user(f"bench{index}", "!", "")
+        token = f"bench-token-{index}"
+        sessions[token] = SessionUser(user["id"], user["username"])
+        tokens.append(token)
+
+    if args.threadpool_tokens:
+        anyio.to_thread.current_default_thread_limiter().total_tokens = args.threadpool_tokens
+
+    latencies: list[float] = []
+    statuses: dict[int, int] = {}
+    peak_queue = 0
+    transport = httpx.ASGITransport(app=app)
+
+    async def client_loop(token: str) -> None:
+        nonlocal peak_queue
+        async with httpx.AsyncClient(
+            transport=transport,
+            base_url="http://bench",
+            cookies={SESSION_COOKIE_NAME: token},
+            timeout=120,
+        ) as client:
+            for _ in range(args.rounds):
+                started = time.perf_counter()
+                resp = await client.get("/api/board")
+                latencies.append(time.perf_counter() - started)
+                statuses[resp.status_code] = statuses.get(resp.status_code, 0) + 1
+
+                started = time.perf_counter()
+                resp = await client.put("/api/board", json=resp.json())
+                latencies.append(time.perf_counter() - started)
+                statuses[resp.status_code] = statuses.get(resp.status_code, 0) + 1
+                peak_queue = max(peak_queue, executor_stats()["queued"])
+
+    started = time.perf_counter()
+    await asyncio.gather(*(client_loop(token) for token in tokens))
+    elapsed = time.perf_counter() - started
+
+    total = len(latencies)
+    print(f"clients:        {args.clients} x {args.rounds} rounds (GET + PUT)")
+    print(f"requests:       {total} in {elapsed:.2f}s ({total / elapsed:.1f} req/s)")
+    print(f"statuses:       {dict(sorted(statuses.items()))}")
+    print(f"db executor:    {executor_stats()['threads']} threads, peak queue {peak_queue}")
+    print(
+        "latency (s):    "
+        f"p50={statistics.median(latencies):.3f} "
+        f"p95={_percentile(latencies, 0.95):.3f} "
+        f"p99={_percentile(latencies, 0.99):.3f} "
+        f"max={max(latencies):.3f}"
+    )
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.board_concurrency")
+    parser.add_argument("--clients", type=int, default=500)
+    parser.add_argument("--rounds", type=int, default=4)
+    parser.add_argument("--threadpool-tokens", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    scratch = tempfile.TemporaryDirectory()
+    os.environ["PM_DB_PATH"] = str(Path(scratch.name) / "pm.db")
+    try:
+        asyncio.run(_run(args))
+    finally:
+        scratch.cleanup()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""Compare full and shallow fetches of one very large board.
+
+Run from backend/:
+
+    python -m benchmarks.large_board --cards 10000 --columns 5
+
+Prints response size and server time for ``GET /api/boards/{id}`` and for
+the shallow fetch (column outline plus the first page of card headers).
+"""
+
+import argparse
+import os
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+
+def _board(cards: int, columns: int, details_size: int) -> dict:
+    board_columns = [
+        {"id": f"col-{index}", "title": f"Column {index}", "cardIds": []} for index in range(columns)
+    ]
+    board_cards = {}
+    for index in range(cards):
+        card_id = f"card-{index}"
+        board_columns[index % columns]["cardIds"].append(card_id)
+        board_cards[card_id] = {
+            "id": card_id,
+            "title": f"Card {index}",
+            "details": "d" * details_size,
+            "labels": [],
+            "due_date": None,
+            "priority": "none",
+        }
+    return {"columns": board_columns, "cards": board_cards}
+
+
+def _measure(client, url: str, repeat: int) -> tuple[int, list[float]]:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        resp = client.get(url)
+        timings.append(time.perf_counter() - started)
+        resp.raise_for_status()
+    return len(resp.content), timings
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.large_board")
+    parser.add_argument("--cards", type=int, default=10_000)
+    parser.add_argument("--columns", type=int, default=5)
+    parser.add_argument("--details-size", type=int, default=400)
+    parser.add_argument("--page-size", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args(argv)
+
+    scratch = tempfile.TemporaryDirectory()
+    os.environ["PM_DB_PATH"] = str(Path(scratch.name) / "pm.db")
+    try:
+        from fastapi.testclient import TestClient
+
+        from app.main import create_app
+
+        with TestClient(create_app()) as client:
+            client.post("/api/auth/login", json={"username": "user", "password": "password"})
+            board_id = client.get("/api/boards").json()[0]["id"]
+            client.put(
+                f"/api/boards/{board_id}?durable=true",
+                json=_board(args.cards, args.columns, args.details_size),
+            ).raise_for_status()
+
+            urls = {
+                "full": f"/api/boards/{board_id}",
+                "shallow": f"/api/boards/{board_id}?shallow=true&limit={args.page_size}",
+            }
+            print(f"board: {args.cards} cards in {args.columns} columns")
+            for name, url in urls.items():
+                size, timings = _measure(client, url, args.repeat)
+                print(
+                    f"{name:>8}: {size / 1024:9.1f} KiB  "
+                    f"median {statistics.median(timings) * 1000:7.1f} ms  "
+                    f"min {min(timings) * 1000:7.1f} ms"
+                )
+    finally:
+        scratch.cleanup()
+
+
+if __name__ == "__main__":
+    main()
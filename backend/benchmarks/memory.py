@@ -0,0 +1,118 @@
+"""Compare the memory held per session and per buffered card, before and after
+the switch from dicts to slotted records.
+
+Run from backend/:
+
+    python -m benchmarks.memory --sessions 100000 --cards 10000
+
+"Before" rebuilds the old shapes (a dict per session, a JSON dict per
+card); "after" uses ``SessionUser`` and ``BoardRecord``. Sizes come from
+tracemalloc, so they include every object each representation keeps alive.
+The per-request cost of building a Pydantic ``SessionUser`` (which the old
+auth dependency did on every request) is shown alongside, as is the time a
+buffered save spends staging a board of ``--cards`` cards and a read spends
+turning it back into JSON (work the board routes run on the DB executor).
+"""
+
+import argparse
+import sys
+import timeit
+import tracemalloc
+from collections.abc import Callable
+
+
+def _retained_bytes(build: Callable[[], object]) -> int:
+    tracemalloc.start()
+    try:
+        baseline = tracemalloc.get_traced_memory()[0]
+        kept = build()
+        size = tracemalloc.get_traced_memory()[0] - baseline
+    finally:
+        tracemalloc.stop()
+    del kept
+    return size
+
+
+def _username(index: int, users: int) -> str:
+    # A fresh string per session, as read from a database row.
+    return "".join(["user", str(index % users)])
+
+
+def _board(cards: int, columns: int) -> dict:
+    board_columns = [{"id": f"col-{index}", "title": f"Column {index}", "cardIds": []} for index in range(columns)]
+    board_cards = {}
+    for index in range(cards):
+        card_id = f"card-{index}"
+        board_columns[index % columns]["cardIds"].append(card_id)
+        board_cards[card_id] = {
+            "id": card_id,
+            "title": f"Card {index}",
+            "details": "",
+            "labels": [{"id": f"label-{index}", "text": "bug", "color": "".join(["#ff", "0000"])}],
+            "due_date": None,
+            "priority": "".join(["med", "ium"]),
+        }
+    return {"columns": board_columns, "cards": board_cards}
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.memory")
+    parser.add_argument("--sessions", type=int, default=100_000)
+    parser.add_argument("--users", type=int, default=1_000)
+    parser.add_argument("--cards", type=int, default=10_000)
+    parser.add_argument("--columns", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    from pydantic import BaseModel
+
+    from app.board_records import BoardRecord
+    from app.routers.auth import SessionUser
+    from app.write_behind import WriteBehindBuffer
+
+    class PydanticSessionUser(BaseModel):
+        user_id: int
+        username: str
+        display_name: str = ""
+
+    def dict_sessions() -> dict:
+        return {
+            f"token-{index}": {"user_id": index, "username": _username(index, args.users), "display_name": ""}
+            for index in range(args.sessions)
+        }
+
+    def record_sessions() -> dict:
+        return {
+            f"token-{index}": SessionUser(index, sys.intern(_username(index, args.users)))
+            for index in range(args.sessions)
+        }
+
+    tokens = _retained_bytes(lambda: {f"token-{index}": None for index in range(args.sessions)})
+    before = (_retained_bytes(dict_sessions) - tokens) / args.sessions
+    after = (_retained_bytes(record_sessions) - tokens) / args.sessions
+    print(f"per session:    before={before:.0f} B  after={after:.0f} B  ({before / after:.1f}x)")
+
+    session = {"user_id": 1, "username": "user", "display_name": ""}
+    record = SessionUser(1, "user")
+    pydantic_us = min(timeit.repeat(lambda: PydanticSessionUser(**session), number=10_000, repeat=5)) / 10_000 * 1e6
+    lookup_us = min(timeit.repeat(lambda: record, number=10_000, repeat=5)) / 10_000 * 1e6
+    print(f"auth per request: before={pydantic_us:.2f} us (Pydantic model)  after={lookup_us:.2f} us (stored record)")
+
+    # The JSON board built inside the second lambda is dropped once the
+    # records are made, so only what the records keep alive is counted.
+    before = _retained_bytes(lambda: _board(args.cards, args.columns)) / args.cards
+    after = _retained_bytes(lambda: BoardRecord.from_json(_board(args.cards, args.columns))) / args.cards
+    print(f"per card:       before={before:.0f} B  after={after:.0f} B  ({before / after:.1f}x)")
+
+    buffer = WriteBehindBuffer()
+    board_json = _board(args.cards, args.columns)
+
+    def stage() -> None:
+        buffer.stage("board-1", 1, BoardRecord.from_json(board_json))
+
+    stage_ms = min(timeit.repeat(stage, number=5, repeat=3)) / 5 * 1000
+    read_ms = min(timeit.repeat(lambda: buffer.pending_board("board-1"), number=5, repeat=3)) / 5 * 1000
+    print(f"per request ({args.cards} cards): stage={stage_ms:.1f} ms  read={read_ms:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""Measure how long the backend takes to import and to answer its first request.
+
+Run from backend/:
+
+    python -m benchmarks.startup --runs 3
+
+Each run uses fresh interpreters: one under ``python -X importtime`` to
+time ``import app.main`` (and list the slowest modules), and one that
+builds the app against an empty database, runs its lifespan startup and
+is timed from process launch until ``GET /api/health`` returns 200.
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+
+def _env(data_dir: str) -> dict:
+    return {**os.environ, "PM_DB_PATH": str(Path(data_dir) / "pm.db")}
+
+
+def import_times(module: str = "app.main") -> dict[str, float]:
+    """Cumulative import time in seconds of every module ``module`` loads."""
+    with tempfile.TemporaryDirectory() as data_dir:
+        result = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+            cwd=BACKEND_DIR,
+            env=_env(data_dir),
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _self_us, cumulative_us, name = line.removeprefix("import time:").split("|")
+        times[name.strip()] = int(cumulative_us) / 1_000_000
+    return times
+
+
+# Runs in the child interpreter: the same steps a server takes before it can
+# answer (import, build the app, run lifespan startup), then one request.
+_FIRST_REQUEST = """
+from fastapi.testclient import TestClient
+from app.main import app
+with TestClient(app) as client:
+    assert client.get("/api/health").status_code == 200
+"""
+
+
+def cold_start() -> float:
+    """Seconds from launching a fresh interpreter to its first 200 from
+    /api/health, against an empty database."""
+    with tempfile.TemporaryDirectory() as data_dir:
+        started = time.perf_counter()
+        subprocess.run(
+            [sys.executable, "-W", "ignore", "-c", _FIRST_REQUEST],
+            cwd=BACKEND_DIR,
+            env=_env(data_dir),
+            check=True,
+        )
+        return time.perf_counter() - started
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.startup")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--top", type=int, default=10)
+    args = parser.parse_args(argv)
+
+    imports = [import_times() for _ in range(args.runs)]
+    starts = [cold_start() for _ in range(args.runs)]
+
+    print(f"import app.main (s):     median={statistics.median(run['app.main'] for run in imports):.3f}")
+    print(f"cold start to 200 (s):   median={statistics.median(starts):.3f} max={max(starts):.3f}")
+    print("slowest modules (cumulative s):")
+    slowest = sorted(imports[-1].items(), key=lambda item: item[1], reverse=True)
+    for name, seconds in slowest[: args.top]:
+        print(f"  {seconds:7.3f}  {name}")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,6 +2,7 @@ import pytest
 from fastapi.testclient import TestClient
 
 from app.main import create_app
+from app.metrics import metrics
 from app.routers.auth import sessions
 
 
@@ -9,6 +10,7 @@ from app.routers.auth import sessions
 def isolated_state(tmp_path, monkeypatch):
     monkeypatch.setenv("PM_DB_PATH", str(tmp_path / "pm.db"))
     sessions.clear()
+    metrics.reset()
     yield
     sessions.clear()
 
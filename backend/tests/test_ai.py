@@ -1,8 +1,13 @@
+import json
+
+import pytest
+
 from app.ai_client import (
     OpenRouterConfigurationError,
     OpenRouterRequestError,
     OpenRouterTimeoutError,
 )
+from app.db import delete_board, get_user_by_username
 from tests.conftest import login_default_user
 
 
@@ -186,3 +191,133 @@ def test_ai_board_action_with_invalid_board_id_returns_404(client, monkeypatch)
         },
     )
     assert resp.status_code == 404
+
+
+@pytest.mark.parametrize(
+    "answer",
+    [
+        {"assistant_response": "Done.", "operations": [{"op": "rename_column", "column_id": "col-review", "title": "QA"}]},
+        {"assistant_response": "Done.", "board_update": {"columns": [], "cards": {}}},
+    ],
+)
+def test_ai_board_action_on_board_deleted_mid_call_returns_404(client, monkeypatch, answer) -> None:
+    login_default_user(client)
+    board_id = client.post("/api/boards", json={"name": "Doomed"}).json()["id"]
+    user_id = get_user_by_username("user")["id"]
+
+    async def delete_then_answer(prompt: str) -> str:
+        delete_board(board_id, user_id)
+        return json.dumps(answer)
+
+    monkeypatch.setattr("app.routers.ai._query_model", delete_then_answer)
+    resp = client.post("/api/ai/board-action", json={"question": "Tidy up", "board_id": board_id})
+    assert resp.status_code == 404
+    assert resp.json()["detail"] == "Board not found"
+
+
+def test_ai_board_action_applies_operations(client, monkeypatch) -> None:
+    monkeypatch.setattr(
+        "app.routers.ai.query_openrouter",
+        lambda _: json.dumps(
+            {
+                "assistant_response": "Done.",
+                "operations": [
+                    {"op": "move_card", "card_id": "card-1", "column_id": "col-done", "position": 0},
+                    {"op": "edit_card", "card_id": "card-2", "changes": {"priority": "high"}},
+                    {"op": "delete_card", "card_id": "card-6"},
+                    {
+                        "op": "add_card",
+                        "column_id": "col-review",
+                        "card": {"id": "card-9", "title": "New", "details": "Added by AI"},
+                    },
+                    {"op": "rename_column", "column_id": "col-review", "title": "QA"},
+                ],
+            }
+        ),
+    )
+    login_default_user(client)
+
+    resp = client.post("/api/ai/board-action", json={"question": "Tidy up"})
+    assert resp.status_code == 200
+    assert resp.json()["operations_applied"] == 5
+
+    board = client.get("/api/board").json()
+    columns = {column["id"]: column for column in board["columns"]}
+    assert columns["col-done"]["cardIds"][0] == "card-1"
+    assert "card-1" not in columns["col-backlog"]["cardIds"]
+    assert board["cards"]["card-2"]["priority"] == "high"
+    assert board["cards"]["card-2"]["title"] == "Gather customer signals"
+    assert "card-6" not in board["cards"]
+    assert columns["col-review"] == {"id": "col-review", "title": "QA", "cardIds": ["card-9"]}
+    assert board["cards"]["card-9"]["labels"] == []
+
+
+def test_ai_board_action_edit_ignores_nulls_but_clears_due_date(client, monkeypatch) -> None:
+    login_default_user(client)
+    board = client.get("/api/board").json()
+    board["cards"]["card-1"]["due_date"] = "2026-01-01"
+    client.put("/api/board", json=board, params={"durable": True})
+    monkeypatch.setattr(
+        "app.routers.ai.query_openrouter",
+        lambda _: json.dumps(
+            {
+                "assistant_response": "Done.",
+                "operations": [
+                    {
+                        "op": "edit_card",
+                        "card_id": "card-1",
+                        "changes": {"title": None, "details": "New details", "labels": None, "due_date": None},
+                    }
+                ],
+            }
+        ),
+    )
+
+    resp = client.post("/api/ai/board-action", json={"question": "Clear the due date"})
+    assert resp.status_code == 200
+    card = client.get("/api/board").json()["cards"]["card-1"]
+    assert card["title"] == board["cards"]["card-1"]["title"]
+    assert card["details"] == "New details"
+    assert card["labels"] == board["cards"]["card-1"].get("labels", [])
+    assert card["due_date"] is None
+
+
+def test_ai_board_action_invalid_operation_leaves_board_untouched(client, monkeypatch) -> None:
+    monkeypatch.setattr(
+        "app.routers.ai.query_openrouter",
+        lambda _: json.dumps(
+            {
+                "assistant_response": "Done.",
+                "operations": [
+                    {"op": "edit_card", "card_id": "card-1", "changes": {"title": "Changed"}},
+                    {"op": "move_card", "card_id": "card-404", "column_id": "col-done"},
+                ],
+            }
+        ),
+    )
+    login_default_user(client)
+    before = client.get("/api/board").json()
+
+    resp = client.post("/api/ai/board-action", json={"question": "Move it"})
+    assert resp.status_code == 502
+    assert client.get("/api/board").json() == before
+
+
+def test_ai_board_action_rejects_full_replacement_of_large_board(client, monkeypatch) -> None:
+    login_default_user(client)
+    board = client.get("/api/board").json()
+    for i in range(10, 40):
+        board["cards"][f"card-{i}"] = {"id": f"card-{i}", "title": f"Task {i}", "details": ""}
+        board["columns"][0]["cardIds"].append(f"card-{i}")
+    client.put("/api/board", json=board)
+
+    prompts = []
+
+    def fake_query(prompt):
+        prompts.append(prompt)
+        return json.dumps({"assistant_response": "Replaced.", "board_update": board})
+
+    monkeypatch.setattr("app.routers.ai.query_openrouter", fake_query)
+    resp = client.post("/api/ai/board-action", json={"question": "Rewrite"})
+    assert resp.status_code == 502
+    assert "express every change as operations" in prompts[0]
@@ -0,0 +1,245 @@
+import asyncio
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from app.ai_admission import AdmissionController, AdmissionRejected, AdmissionSuperseded
+from app.metrics import metrics
+from tests.conftest import login_default_user
+
+
+async def hold_slot(controller, user_id, key, release: asyncio.Event) -> asyncio.Task:
+    admitted = asyncio.Event()
+
+    async def run():
+        async with controller.admit(user_id, key):
+            admitted.set()
+            await release.wait()
+
+    task = asyncio.create_task(run())
+    await asyncio.wait_for(admitted.wait(), 5)
+    return task
+
+
+def test_global_limit_queues_until_release() -> None:
+    async def scenario():
+        controller = AdmissionController(max_in_flight=1, max_per_user=5)
+        release = asyncio.Event()
+        holder = await hold_slot(controller, 1, "a", release)
+        order = []
+
+        async def waiter():
+            async with controller.admit(2, "b"):
+                order.append("second")
+
+        task = asyncio.create_task(waiter())
+        await asyncio.sleep(0.05)
+        assert controller.queue_depth == 1
+        assert order == []
+
+        release.set()
+        await asyncio.wait_for(asyncio.gather(holder, task), 5)
+        assert order == ["second"]
+        assert controller.in_flight == 0
+
+    asyncio.run(scenario())
+    assert metrics.snapshot()["summaries"]["ai_queue_wait_seconds"]["max"] >= 0.04
+
+
+def test_per_user_limit_lets_other_users_through() -> None:
+    async def scenario():
+        controller = AdmissionController(max_in_flight=4, max_per_user=1)
+        release = asyncio.Event()
+        holder = await hold_slot(controller, 1, "a", release)
+        admitted = asyncio.Event()
+
+        async def same_user():
+            async with controller.admit(1, "b"):
+                admitted.set()
+
+        task = asyncio.create_task(same_user())
+        await asyncio.sleep(0.05)
+        assert not admitted.is_set()
+
+        async with controller.admit(2, "c"):
+            assert controller.in_flight == 2
+
+        release.set()
+        await asyncio.wait_for(asyncio.gather(holder, task), 5)
+        assert admitted.is_set()
+
+    asyncio.run(scenario())
+
+
+def test_newer_request_supersedes_queued_one() -> None:
+    async def scenario():
+        controller = AdmissionController(max_in_flight=1, max_per_user=1)
+        release = asyncio.Event()
+        holder = await hold_slot(controller, 1, "board-a", release)
+        outcomes = {}
+
+        async def request(name):
+            try:
+                async with controller.admit(1, "board-b"):
+                    outcomes[name] = "ran"
+            except AdmissionSuperseded:
+                outcomes[name] = "superseded"
+
+        first = asyncio.create_task(request("first"))
+        await asyncio.sleep(0.05)
+        second = asyncio.create_task(request("second"))
+        await asyncio.wait_for(first, 5)
+        assert outcomes == {"first": "superseded"}
+
+        release.set()
+        await asyncio.wait_for(asyncio.gather(holder, second), 5)
+        assert outcomes == {"first": "superseded", "second": "ran"}
+
+    asyncio.run(scenario())
+
+
+def test_full_queue_is_rejected_with_retry_after() -> None:
+    async def scenario():
+        controller = AdmissionController(max_in_flight=1, max_per_user=1, max_queue=0)
+        release = asyncio.Event()
+        holder = await hold_slot(controller, 1, "a", release)
+
+        with pytest.raises(AdmissionRejected) as excinfo:
+            async with controller.admit(2, "b"):
+                pass
+        assert excinfo.value.retry_after >= 1
+
+        release.set()
+        await holder
+
+    asyncio.run(scenario())
+
+
+def test_queue_wait_times_out() -> None:
+    async def scenario():
+        controller = AdmissionController(max_in_flight=1, queue_timeout=0.05)
+        release = asyncio.Event()
+        holder = await hold_slot(controller, 1, "a", release)
+
+        with pytest.raises(AdmissionRejected, match="Timed out"):
+            async with controller.admit(2, "b"):
+                pass
+        assert controller.queue_depth == 0
+
+        release.set()
+        await holder
+        assert controller.in_flight == 0
+
+    asyncio.run(scenario())
+
+
+def test_cancelled_waiter_leaves_the_queue() -> None:
+    async def scenario():
+        controller = AdmissionController(max_in_flight=1)
+        release = asyncio.Event()
+        holder = await hold_slot(controller, 1, "a", release)
+
+        async def waiter():
+            async with controller.admit(2, "b"):
+                pass
+
+        task = asyncio.create_task(waiter())
+        await asyncio.sleep(0.01)
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+        assert controller.queue_depth == 0
+
+        release.set()
+        await holder
+        assert controller.in_flight == 0
+
+    asyncio.run(scenario())
+
+
+def test_waiters_on_other_event_loops_are_woken() -> None:
+    # Background jobs wait on their own thread's loop.
+    controller = AdmissionController(max_in_flight=1)
+    release = threading.Event()
+    admitted = threading.Event()
+
+    async def hold():
+        async with controller.admit(1, "a"):
+            admitted.set()
+            await asyncio.to_thread(release.wait, 5)
+
+    async def wait_turn():
+        async with controller.admit(2, "b"):
+            return "ran"
+
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        holder = pool.submit(asyncio.run, hold())
+        assert admitted.wait(5)
+        waiter = pool.submit(asyncio.run, wait_turn())
+        time.sleep(0.05)
+        assert controller.queue_depth == 1
+        release.set()
+        assert waiter.result(5) == "ran"
+        holder.result(5)
+    assert controller.in_flight == 0
+
+
+def test_board_action_returns_429_when_queue_full(client, monkeypatch) -> None:
+    monkeypatch.setattr(
+        "app.routers.ai.admission",
+        AdmissionController(max_in_flight=0, max_queue=0),
+    )
+    monkeypatch.setattr(
+        "app.routers.ai.query_openrouter",
+        lambda _: '{"assistant_response":"ok","board_update":null}',
+    )
+    login_default_user(client)
+
+    resp = client.post("/api/ai/board-action", json={"question": "Hi"})
+    assert resp.status_code == 429
+    assert int(resp.headers["retry-after"]) >= 1
+
+
+def test_queued_ai_requests_do_not_block_other_routes(client, monkeypatch) -> None:
+    """Queued AI requests wait on the event loop, not on threadpool threads."""
+    controller = AdmissionController(max_in_flight=1, max_per_user=100, max_queue=100)
+    monkeypatch.setattr("app.routers.ai.admission", controller)
+    upstream = threading.Event()
+
+    def slow_model(_prompt):
+        upstream.wait(10)
+        return json.dumps({"assistant_response": "ok", "board_update": None})
+
+    monkeypatch.setattr("app.routers.ai.query_openrouter", slow_model)
+    login_default_user(client)
+    # More queued requests than Starlette's 40 threadpool threads, each for
+    # its own board so none supersedes another.
+    count = 50
+    board_ids = [client.post("/api/boards", json={"name": f"B{index}"}).json()["id"] for index in range(count)]
+    with ThreadPoolExecutor(max_workers=count) as pool:
+        futures = [
+            pool.submit(client.post, "/api/ai/board-action", json={"question": "Hi", "board_id": queued_id})
+            for queued_id in board_ids
+        ]
+        deadline = time.monotonic() + 5
+        while controller.queue_depth < count - 1:
+            assert time.monotonic() < deadline
+            time.sleep(0.02)
+
+        started = time.perf_counter()
+        ready = client.get("/api/health/ready")
+        board = client.get(f"/api/boards/{board_ids[0]}")
+        profile = client.get("/api/auth/me")
+        elapsed = time.perf_counter() - started
+
+        upstream.set()
+        statuses = [future.result(30).status_code for future in futures]
+
+    assert ready.status_code == 200
+    assert ready.json()["checks"]["threadpool"]["in_use"] < 5
+    assert board.status_code == 200
+    assert profile.status_code == 200
+    assert elapsed < 2
+    assert statuses == [200] * count
@@ -0,0 +1,195 @@
+import threading
+import time
+
+import httpx
+import pytest
+
+from app import ai_client
+from app.ai_client import (
+    CircuitBreaker,
+    OpenRouterRequestError,
+    OpenRouterTimeoutError,
+    OpenRouterUnavailableError,
+    query_openrouter,
+)
+from app.metrics import metrics
+from tests.conftest import login_default_user
+
+
+def completion(content: str = "4") -> httpx.Response:
+    return httpx.Response(200, json={"choices": [{"message": {"content": content}}]})
+
+
+@pytest.fixture(autouse=True)
+def fake_upstream(monkeypatch):
+    monkeypatch.setenv("OPENROUTER_API_KEY", "test-key")
+    monkeypatch.setenv("OPENROUTER_BACKOFF_BASE_SECONDS", "0.001")
+    monkeypatch.setattr(ai_client, "circuit_breaker", CircuitBreaker(min_requests=3, cooldown=60))
+    yield
+    ai_client.set_transport(None)
+
+
+def use_handler(handler) -> list[httpx.Request]:
+    seen: list[httpx.Request] = []
+    lock = threading.Lock()
+
+    def recording(request: httpx.Request) -> httpx.Response:
+        with lock:
+            seen.append(request)
+            attempt = len(seen)
+        return handler(request, attempt)
+
+    ai_client.set_transport(httpx.MockTransport(recording))
+    return seen
+
+
+def test_success_uses_single_request() -> None:
+    seen = use_handler(lambda request, attempt: completion())
+    assert query_openrouter("2+2") == "4"
+    assert len(seen) == 1
+    assert seen[0].headers["authorization"] == "Bearer test-key"
+
+
+def test_retries_server_errors_then_succeeds() -> None:
+    seen = use_handler(
+        lambda request, attempt: httpx.Response(503) if attempt < 3 else completion()
+    )
+    assert query_openrouter("2+2") == "4"
+    assert len(seen) == 3
+    assert metrics.snapshot()["counters"]["openrouter_retries_total"] == 2
+
+
+def test_client_errors_are_not_retried() -> None:
+    seen = use_handler(lambda request, attempt: httpx.Response(400, text="bad request"))
+    with pytest.raises(OpenRouterRequestError, match="status 400"):
+        query_openrouter("2+2")
+    assert len(seen) == 1
+
+
+def test_retry_after_is_honored(monkeypatch) -> None:
+    delays = []
+    monkeypatch.setattr(ai_client.time, "sleep", delays.append)
+    use_handler(
+        lambda request, attempt: httpx.Response(429, headers={"Retry-After": "2"})
+        if attempt == 1
+        else completion()
+    )
+    assert query_openrouter("2+2") == "4"
+    assert delays == [2.0]
+
+
+def test_long_retry_after_fails_immediately(monkeypatch) -> None:
+    monkeypatch.setenv("OPENROUTER_MAX_RETRY_AFTER_SECONDS", "1")
+    seen = use_handler(
+        lambda request, attempt: httpx.Response(429, headers={"Retry-After": "120"})
+    )
+    with pytest.raises(OpenRouterRequestError, match="429"):
+        query_openrouter("2+2")
+    assert len(seen) == 1
+
+
+def test_timeouts_are_retried_and_reported(monkeypatch) -> None:
+    monkeypatch.setenv("OPENROUTER_MAX_RETRIES", "1")
+
+    def handler(request, attempt):
+        raise httpx.ReadTimeout("slow", request=request)
+
+    seen = use_handler(handler)
+    with pytest.raises(OpenRouterTimeoutError):
+        query_openrouter("2+2")
+    assert len(seen) == 2
+
+
+def test_circuit_opens_and_fails_fast(monkeypatch) -> None:
+    monkeypatch.setenv("OPENROUTER_MAX_RETRIES", "0")
+    seen = use_handler(lambda request, attempt: httpx.Response(502))
+    for _ in range(3):
+        with pytest.raises(OpenRouterRequestError):
+            query_openrouter("2+2")
+
+    with pytest.raises(OpenRouterUnavailableError) as excinfo:
+        query_openrouter("2+2")
+    assert len(seen) == 3
+    assert excinfo.value.retry_after > 0
+    snapshot = metrics.snapshot()
+    assert snapshot["gauges"]["openrouter_circuit_state"] == "open"
+    assert snapshot["counters"]["openrouter_short_circuited_total"] == 1
+
+
+def test_circuit_half_open_probe_closes_on_success() -> None:
+    now = {"value": 0.0}
+    breaker = CircuitBreaker(min_requests=2, cooldown=10, clock=lambda: now["value"])
+    breaker.record_failure()
+    breaker.record_failure()
+    assert breaker.state == "open"
+    assert not breaker.allow()
+
+    now["value"] = 11
+    assert breaker.state == "half_open"
+    assert breaker.allow()
+    assert not breaker.allow()  # only one probe at a time
+    breaker.record_success()
+    assert breaker.state == "closed"
+
+
+def test_circuit_half_open_probe_failure_reopens() -> None:
+    now = {"value": 0.0}
+    breaker = CircuitBreaker(min_requests=2, cooldown=10, clock=lambda: now["value"])
+    breaker.record_failure()
+    breaker.record_failure()
+    now["value"] = 11
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == "open"
+    assert breaker.retry_after() == 10
+
+
+def test_unexpected_transport_error_releases_half_open_probe(monkeypatch) -> None:
+    now = {"value": 0.0}
+    breaker = CircuitBreaker(min_requests=2, cooldown=10, clock=lambda: now["value"])
+    monkeypatch.setattr(ai_client, "circuit_breaker", breaker)
+    breaker.record_failure()
+    breaker.record_failure()
+    now["value"] = 11
+
+    def handler(request, attempt):
+        if attempt == 1:
+            raise ValueError("broken transport")
+        return completion()
+
+    use_handler(handler)
+    with pytest.raises(ValueError):
+        query_openrouter("2+2")
+    assert breaker.state == "open"
+
+    now["value"] = 22
+    assert query_openrouter("2+2") == "4"
+    assert breaker.state == "closed"
+
+
+def test_hedged_request_wins_when_primary_is_slow(monkeypatch) -> None:
+    monkeypatch.setenv("OPENROUTER_HEDGE_AFTER_SECONDS", "0.05")
+
+    def handler(request, attempt):
+        if attempt == 1:
+            time.sleep(0.5)
+            return completion("slow")
+        return completion("fast")
+
+    seen = use_handler(handler)
+    started = time.perf_counter()
+    assert query_openrouter("2+2") == "fast"
+    assert time.perf_counter() - started < 0.4
+    assert len(seen) == 2
+    assert metrics.snapshot()["counters"]["openrouter_hedged_requests_total"] == 1
+
+
+def test_circuit_open_maps_to_503(client, monkeypatch) -> None:
+    def unavailable(_):
+        raise OpenRouterUnavailableError("OpenRouter is temporarily unavailable", 12.4)
+
+    monkeypatch.setattr("app.routers.ai.query_openrouter", unavailable)
+    login_default_user(client)
+    resp = client.post("/api/ai/connectivity", json={"prompt": "2+2"})
+    assert resp.status_code == 503
+    assert resp.headers["retry-after"] == "12"
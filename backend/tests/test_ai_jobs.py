@@ -0,0 +1,188 @@
+import json
+import threading
+import time
+
+from fastapi.testclient import TestClient
+
+from app.ai_client import OpenRouterRequestError
+from app.db import claim_next_ai_job, finish_ai_job, get_ai_job, get_user_by_username
+from app.main import create_app
+from tests.conftest import login_default_user
+
+RENAME_RESPONSE = json.dumps(
+    {
+        "assistant_response": "Renamed.",
+        "operations": [{"op": "rename_column", "column_id": "col-backlog", "title": "Ideas"}],
+    }
+)
+
+
+def wait_for_job(client, job_id: str, timeout: float = 5.0) -> dict:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        job = client.get(f"/api/ai/jobs/{job_id}").json()
+        if job["status"] in {"succeeded", "failed", "cancelled"}:
+            return job
+        time.sleep(0.02)
+    raise AssertionError(f"job {job_id} did not finish")
+
+
+def test_async_board_action_returns_job_and_result(client, monkeypatch) -> None:
+    monkeypatch.setattr("app.routers.ai.query_openrouter", lambda _: RENAME_RESPONSE)
+    login_default_user(client)
+
+    resp = client.post("/api/ai/board-action?async=1", json={"question": "Rename backlog"})
+    assert resp.status_code == 202
+    job_id = resp.json()["id"]
+    assert resp.headers["location"] == f"/api/ai/jobs/{job_id}"
+
+    job = wait_for_job(client, job_id)
+    assert job["status"] == "succeeded"
+    assert job["result"]["assistant_response"] == "Renamed."
+    assert job["result"]["board_updated"] is True
+
+    board = client.get("/api/board").json()
+    assert board["columns"][0]["title"] == "Ideas"
+
+
+def test_failed_job_records_status_and_error(client, monkeypatch) -> None:
+    def raise_request_error(_):
+        raise OpenRouterRequestError("upstream error")
+
+    monkeypatch.setattr("app.routers.ai.query_openrouter", raise_request_error)
+    login_default_user(client)
+
+    job_id = client.post("/api/ai/board-action?async=1", json={"question": "Hi"}).json()["id"]
+    job = wait_for_job(client, job_id)
+    assert job["status"] == "failed"
+    assert job["status_code"] == 502
+    assert job["error"] == "upstream error"
+
+
+def test_identical_pending_requests_are_deduplicated(monkeypatch) -> None:
+    monkeypatch.setenv("PM_AI_JOB_WORKERS", "0")
+    with TestClient(create_app()) as idle_client:
+        login_default_user(idle_client)
+        first = idle_client.post("/api/ai/board-action?async=1", json={"question": "Hi"}).json()
+        second = idle_client.post("/api/ai/board-action?async=1", json={"question": "Hi"}).json()
+        other = idle_client.post("/api/ai/board-action?async=1", json={"question": "Bye"}).json()
+
+    assert second["id"] == first["id"]
+    assert second["deduplicated"] is True
+    assert other["id"] != first["id"]
+
+
+def test_pending_jobs_survive_restart(monkeypatch) -> None:
+    monkeypatch.setattr("app.routers.ai.query_openrouter", lambda _: RENAME_RESPONSE)
+    monkeypatch.setenv("PM_AI_JOB_WORKERS", "0")
+    with TestClient(create_app()) as first_process:
+        login_default_user(first_process)
+        queued = first_process.post("/api/ai/board-action?async=1", json={"question": "A"}).json()
+        interrupted = first_process.post("/api/ai/board-action?async=1", json={"question": "B"}).json()
+        # Simulate a worker that died mid-job: its lease has already lapsed.
+        assert claim_next_ai_job("dead-worker", 0)["id"] == queued["id"]
+
+    monkeypatch.setenv("PM_AI_JOB_WORKERS", "2")
+    with TestClient(create_app()) as second_process:
+        login_default_user(second_process)
+        assert wait_for_job(second_process, queued["id"])["status"] == "succeeded"
+        assert wait_for_job(second_process, interrupted["id"])["status"] == "succeeded"
+
+
+def test_restart_leaves_jobs_leased_to_live_workers(monkeypatch) -> None:
+    monkeypatch.setattr("app.routers.ai.query_openrouter", lambda _: RENAME_RESPONSE)
+    monkeypatch.setenv("PM_AI_JOB_WORKERS", "0")
+    with TestClient(create_app()) as other_replica:
+        login_default_user(other_replica)
+        job_id = other_replica.post("/api/ai/board-action?async=1", json={"question": "A"}).json()["id"]
+        assert claim_next_ai_job("other-replica", 60)["id"] == job_id
+
+    monkeypatch.setenv("PM_AI_JOB_WORKERS", "2")
+    monkeypatch.setenv("PM_AI_JOB_LEASE_SECONDS", "0.3")
+    with TestClient(create_app()) as restarted:
+        login_default_user(restarted)
+        time.sleep(0.5)
+        assert restarted.get(f"/api/ai/jobs/{job_id}").json()["status"] == "running"
+
+    user_id = get_user_by_username("user")["id"]
+    assert not finish_ai_job(job_id, "succeeded", result={}, worker_id="someone-else")
+    assert finish_ai_job(job_id, "succeeded", result={}, worker_id="other-replica")
+    assert get_ai_job(job_id, user_id)["status"] == "succeeded"
+
+
+def test_lapsed_leases_are_requeued_without_a_restart(monkeypatch) -> None:
+    monkeypatch.setattr("app.routers.ai.query_openrouter", lambda _: RENAME_RESPONSE)
+    monkeypatch.setenv("PM_AI_JOB_WORKERS", "0")
+    with TestClient(create_app()) as idle_client:
+        login_default_user(idle_client)
+        job_id = idle_client.post("/api/ai/board-action?async=1", json={"question": "A"}).json()["id"]
+        # Another replica claims the job and then dies.
+        assert claim_next_ai_job("crashed-replica", 1.0)["id"] == job_id
+
+    monkeypatch.setenv("PM_AI_JOB_WORKERS", "1")
+    monkeypatch.setenv("PM_AI_JOB_LEASE_SECONDS", "0.3")
+    with TestClient(create_app()) as running:
+        login_default_user(running)
+        # Still leased at startup; a later heartbeat finds the lapsed lease.
+        assert running.get(f"/api/ai/jobs/{job_id}").json()["status"] == "running"
+        assert wait_for_job(running, job_id)["status"] == "succeeded"
+
+
+def test_cancel_pending_job(monkeypatch) -> None:
+    monkeypatch.setenv("PM_AI_JOB_WORKERS", "0")
+    with TestClient(create_app()) as idle_client:
+        login_default_user(idle_client)
+        job_id = idle_client.post("/api/ai/board-action?async=1", json={"question": "Hi"}).json()["id"]
+
+        resp = idle_client.post(f"/api/ai/jobs/{job_id}/cancel")
+        assert resp.status_code == 200
+        assert resp.json()["status"] == "cancelled"
+        assert claim_next_ai_job("test-worker", 30) is None
+
+
+def test_cancel_running_job_discards_changes(client, monkeypatch) -> None:
+    started = threading.Event()
+    release = threading.Event()
+
+    def slow_rename(_):
+        started.set()
+        release.wait(5)
+        return RENAME_RESPONSE
+
+    monkeypatch.setattr("app.routers.ai.query_openrouter", slow_rename)
+    login_default_user(client)
+
+    job_id = client.post("/api/ai/board-action?async=1", json={"question": "Rename"}).json()["id"]
+    assert started.wait(5)
+    assert client.post(f"/api/ai/jobs/{job_id}/cancel").json()["status"] == "cancelled"
+    release.set()
+
+    time.sleep(0.2)
+    assert get_ai_job(job_id, 1)["status"] == "cancelled"
+    assert client.get("/api/board").json()["columns"][0]["title"] != "Ideas"
+
+
+def test_job_events_stream_until_finished(client, monkeypatch) -> None:
+    monkeypatch.setattr("app.routers.ai.query_openrouter", lambda _: RENAME_RESPONSE)
+    login_default_user(client)
+
+    job_id = client.post("/api/ai/board-action?async=1", json={"question": "Rename"}).json()["id"]
+    with client.stream("GET", f"/api/ai/jobs/{job_id}/events") as resp:
+        assert resp.headers["content-type"].startswith("text/event-stream")
+        statuses = [
+            json.loads(line.removeprefix("data: "))["status"]
+            for line in resp.iter_lines()
+            if line.startswith("data: ")
+        ]
+    assert statuses[-1] == "succeeded"
+
+
+def test_jobs_are_private(client) -> None:
+    login_default_user(client)
+    job_id = client.post("/api/ai/board-action?async=1", json={"question": "Hi"}).json()["id"]
+    client.post("/api/auth/logout")
+
+    client.post("/api/auth/register", json={"username": "other", "password": "otherpass123"})
+    assert client.get(f"/api/ai/jobs/{job_id}").status_code == 404
+    assert client.post(f"/api/ai/jobs/{job_id}/cancel").status_code == 404
+    assert client.get(f"/api/ai/jobs/{job_id}/events").status_code == 404
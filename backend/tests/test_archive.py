@@ -0,0 +1,95 @@
+from app.archive import sweep_once
+from app.db import get_board_connection, get_user_by_username
+from tests.conftest import login_default_user
+
+OLD = "2020-01-01T00:00:00.000Z"
+
+
+def backdate(card_ids: list[str]) -> None:
+    user_id = get_user_by_username("user")["id"]
+    with get_board_connection(user_id) as connection:
+        connection.executemany(
+            "UPDATE card_index SET column_since = ? WHERE card_id = ?",
+            [(OLD, card_id) for card_id in card_ids],
+        )
+
+
+def column_since(card_id: str) -> str:
+    user_id = get_user_by_username("user")["id"]
+    with get_board_connection(user_id) as connection:
+        return connection.execute(
+            "SELECT column_since FROM card_index WHERE card_id = ?", (card_id,)
+        ).fetchone()["column_since"]
+
+
+def test_archive_search_and_restore(client) -> None:
+    login_default_user(client)
+    board_id = client.get("/api/boards").json()[0]["id"]
+
+    resp = client.post(f"/api/boards/{board_id}/archive", json={"card_ids": ["card-7", "card-missing"]})
+    assert resp.json() == {"archived": ["card-7"]}
+    board = client.get("/api/board").json()
+    assert "card-7" not in board["cards"]
+    assert board["columns"][4]["cardIds"] == ["card-8"]
+    assert client.get("/api/dashboard").json()["columns"]["Done"] == 1
+
+    found = client.get("/api/archive?q=marketing").json()
+    assert [(card["card_id"], card["column_title"]) for card in found] == [("card-7", "Done")]
+    assert found[0]["card"]["details"] == "Final copy approved and asset pack delivered."
+    assert client.get("/api/archive?q=asset pack").json()[0]["card_id"] == "card-7"
+    assert client.get("/api/archive?q=100%").json() == []
+
+    restored = client.post(f"/api/boards/{board_id}/archive/card-7/restore")
+    assert restored.status_code == 200
+    assert restored.json()["board_json"]["columns"][4]["cardIds"] == ["card-8", "card-7"]
+    assert client.get("/api/archive").json() == []
+    assert client.post(f"/api/boards/{board_id}/archive/card-7/restore").status_code == 404
+    assert client.post("/api/boards/board-missing/archive", json={"card_ids": ["card-1"]}).status_code == 404
+
+
+def test_sweeper_archives_cards_that_sat_in_done(client, monkeypatch) -> None:
+    login_default_user(client)
+    assert sweep_once() == 0  # off unless PM_ARCHIVE_AFTER_DAYS is set
+
+    monkeypatch.setenv("PM_ARCHIVE_AFTER_DAYS", "14")
+    backdate(["card-1", "card-7"])
+    assert sweep_once() == 1
+
+    board = client.get("/api/board").json()
+    assert set(board["cards"]) == {f"card-{index}" for index in range(1, 9)} - {"card-7"}
+    assert [card["card_id"] for card in client.get("/api/archive").json()] == ["card-7"]
+
+    monkeypatch.setenv("PM_ARCHIVE_COLUMNS", "backlog, Done")
+    monkeypatch.setenv("PM_ARCHIVE_BATCH_SIZE", "1")
+    backdate(["card-1", "card-2", "card-8"])
+    assert sweep_once() == 1
+    assert sweep_once() == 1
+    assert sweep_once() == 1
+    assert sweep_once() == 0
+    assert len(client.get("/api/archive").json()) == 4
+
+
+def test_moving_a_card_restarts_its_column_clock(client) -> None:
+    login_default_user(client)
+    board = client.get("/api/board").json()
+    backdate(["card-1", "card-2"])
+
+    columns = [dict(column) for column in board["columns"]]
+    columns[0]["cardIds"] = ["card-2"]
+    columns[4]["cardIds"] = [*columns[4]["cardIds"], "card-1"]
+    cards = {**board["cards"], "card-2": {**board["cards"]["card-2"], "title": "Renamed"}}
+    client.put("/api/board", json={"columns": columns, "cards": cards})
+
+    assert column_since("card-1") > OLD
+    assert column_since("card-2") == OLD
+
+
+def test_saving_an_archived_card_back_unarchives_it(client) -> None:
+    login_default_user(client)
+    board_id = client.get("/api/boards").json()[0]["id"]
+    stale = client.get("/api/board").json()
+    client.post(f"/api/boards/{board_id}/archive", json={"card_ids": ["card-8"]})
+
+    client.put("/api/board", json=stale)
+    assert client.get("/api/archive").json() == []
+    assert "card-8" in client.get("/api/board").json()["cards"]
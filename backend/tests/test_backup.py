@@ -0,0 +1,193 @@
+import gzip
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.backup import create_snapshot, list_snapshots, main, restore_snapshot
+from app.db import (
+    clear_shard_cache,
+    get_board,
+    get_db_path,
+    get_default_board_for_user,
+    get_user_by_username,
+    update_board,
+)
+from app.main import create_app
+from tests.conftest import login_default_user, register_and_login
+
+
+@pytest.fixture
+def backup_dir(tmp_path, monkeypatch):
+    directory = tmp_path / "backups"
+    monkeypatch.setenv("PM_BACKUP_DIR", str(directory))
+    monkeypatch.setenv("PM_ADMIN_USERNAMES", "user")
+    return directory
+
+
+def test_backup_endpoint_requires_admin(client, backup_dir) -> None:
+    assert client.post("/api/admin/backups").status_code == 401
+
+    register_and_login(client, username="notadmin", password="pass1234")
+    assert client.post("/api/admin/backups").status_code == 403
+
+
+def test_admin_can_create_and_list_backups(client, backup_dir) -> None:
+    login_default_user(client)
+
+    resp = client.post("/api/admin/backups")
+    assert resp.status_code == 201
+    data = resp.json()
+    assert data["compressed"] is True
+    assert data["name"].endswith(".db.gz")
+
+    listing = client.get("/api/admin/backups").json()
+    assert [item["name"] for item in listing] == [data["name"]]
+
+
+def test_compressed_snapshot_is_a_valid_database(client, backup_dir, tmp_path) -> None:
+    result = create_snapshot()
+    restored = tmp_path / "check.db"
+    restored.write_bytes(gzip.decompress(Path(result["path"]).read_bytes()))
+
+    connection = sqlite3.connect(restored)
+    assert connection.execute("PRAGMA integrity_check").fetchone()[0] == "ok"
+    assert connection.execute("SELECT COUNT(*) FROM users").fetchone()[0] == 1
+    connection.close()
+
+
+def test_snapshots_are_rotated(client, backup_dir) -> None:
+    for _ in range(4):
+        create_snapshot(compress=False, keep=2)
+    snapshots = list_snapshots(backup_dir)
+    assert len(snapshots) == 2
+    assert all(path.suffix == ".db" for path in snapshots)
+
+
+def test_restore_snapshot_brings_back_old_state(client, backup_dir) -> None:
+    user = get_user_by_username("user")
+    board = get_default_board_for_user(user["id"])
+    snapshot = create_snapshot()
+
+    changed = board["board_json"]
+    changed["cards"]["card-1"]["title"] = "After backup"
+    update_board(board["id"], user["id"], changed)
+
+    main(["restore", snapshot["path"]])
+    restored = get_board(board["id"], user["id"])
+    assert restored["board_json"]["cards"]["card-1"]["title"] == "Align roadmap themes"
+
+
+def test_writers_progress_during_paced_backup(client, backup_dir, monkeypatch) -> None:
+    monkeypatch.setenv("PM_BACKUP_PAGES_PER_STEP", "1")
+    monkeypatch.setenv("PM_BACKUP_STEP_SLEEP_SECONDS", "0.05")
+    user = get_user_by_username("user")
+    board = get_default_board_for_user(user["id"])
+
+    worker = threading.Thread(target=create_snapshot)
+    worker.start()
+    time.sleep(0.05)
+    started = time.perf_counter()
+    update_board(board["id"], user["id"], board["board_json"])
+    write_seconds = time.perf_counter() - started
+    worker.join()
+
+    assert write_seconds < 0.5
+    assert len(list_snapshots(backup_dir)) == 1
+
+
+def test_backup_finishes_under_continuous_writes(client, backup_dir, monkeypatch) -> None:
+    monkeypatch.setenv("PM_BACKUP_PAGES_PER_STEP", "1")
+    monkeypatch.setenv("PM_BACKUP_STEP_SLEEP_SECONDS", "0.01")
+    user = get_user_by_username("user")
+    board = get_default_board_for_user(user["id"])
+    done = threading.Event()
+    writes = 0
+
+    def keep_writing() -> None:
+        nonlocal writes
+        while not done.is_set():
+            board["board_json"]["cards"]["card-1"]["title"] = f"Write {writes}"
+            update_board(board["id"], user["id"], board["board_json"])
+            writes += 1
+
+    writer = threading.Thread(target=keep_writing)
+    writer.start()
+    try:
+        result = create_snapshot(compress=False)
+    finally:
+        done.set()
+        writer.join()
+
+    assert writes > 0
+    assert result["seconds"] < 5
+    connection = sqlite3.connect(result["path"])
+    assert connection.execute("PRAGMA integrity_check").fetchone()[0] == "ok"
+    connection.close()
+    counters = client.get("/api/metrics").json()["counters"]
+    assert counters["backup_restarts_total"] > 3
+    assert counters["backup_unpaced_fallbacks_total"] == 1
+
+
+def test_backup_metrics_are_exposed(client, backup_dir) -> None:
+    login_default_user(client)
+    client.post("/api/admin/backups")
+
+    data = client.get("/api/metrics").json()
+    assert data["counters"]["backups_total"] >= 1
+    assert data["counters"]["backup_bytes_total"] > 0
+    assert "backup_last_bytes_per_second" in data["gauges"]
+    assert data["summaries"]["http_request_seconds"]["count"] >= 1
+
+
+def test_cli_create_and_list(client, backup_dir, capsys) -> None:
+    main(["create", "--no-compress"])
+    main(["list"])
+    output = capsys.readouterr().out
+    assert "Wrote" in output
+    assert str(get_db_path().parent / "backups") in output
+
+
+def test_sharded_snapshot_covers_every_shard(backup_dir, monkeypatch, tmp_path) -> None:
+    monkeypatch.setenv("PM_DB_SHARDS", "3")
+    clear_shard_cache()
+    with TestClient(create_app()) as client:
+        for index in range(4):
+            register_and_login(client, username=f"tenant{index}", password="tenantpass123")
+            client.post("/api/auth/logout")
+        user = get_user_by_username("tenant0")
+        board = get_default_board_for_user(user["id"])
+        shards = sorted(path.name for path in (get_db_path().parent / "shards").iterdir() if path.suffix == ".db")
+
+        login_default_user(client)
+        created = client.post("/api/admin/backups").json()
+        listing = client.get("/api/admin/backups").json()
+        assert listing == [{"name": created["name"], "bytes": created["bytes"]}]
+
+        snapshot = backup_dir / created["name"]
+        manifest = json.loads((snapshot / "manifest.json").read_text())
+        assert [entry["shard"] for entry in manifest["files"]] == [None, *range(len(shards))]
+
+        changed = board["board_json"]
+        changed["cards"]["card-1"]["title"] = "After backup"
+        update_board(board["id"], user["id"], changed)
+
+    main(["restore", str(snapshot)])
+    restored = get_board(board["id"], user["id"])
+    assert restored["board_json"]["cards"]["card-1"]["title"] == "Align roadmap themes"
+
+    for _ in range(2):
+        create_snapshot(keep=1)
+    assert [path.is_dir() for path in list_snapshots(backup_dir)] == [True]
+    clear_shard_cache()
+
+
+def test_single_file_snapshot_is_not_restored_over_shards(client, backup_dir, monkeypatch) -> None:
+    snapshot = create_snapshot()
+    monkeypatch.setenv("PM_DB_SHARDS", "2")
+    with pytest.raises(SystemExit, match="PM_DB_SHARDS"):
+        main(["restore", snapshot["path"]])
@@ -0,0 +1,37 @@
+from app.board_defaults import DEFAULT_BOARD
+from app.board_records import BoardRecord
+from app.routers.auth import SessionUser, sessions
+from app.routers.board import BoardPayload
+from tests.conftest import login_default_user
+
+
+def test_board_record_round_trips() -> None:
+    board = {
+        "columns": [{"id": "col-a", "title": "A", "cardIds": ["card-1"]}],
+        "cards": {
+            "card-1": {
+                "id": "card-1",
+                "title": "One",
+                "details": "",
+                "labels": [{"id": "label-1", "text": "bug", "color": "#ff0000"}],
+                "due_date": "2026-01-31",
+                "priority": "high",
+            }
+        },
+    }
+    assert BoardRecord.from_json(board).to_json() == board
+    # Buffered boards have been through BoardPayload, which fills defaults.
+    validated = BoardPayload.model_validate(DEFAULT_BOARD).model_dump()
+    assert BoardRecord.from_json(validated).to_json() == validated
+
+
+def test_sessions_hold_one_record_per_login(client) -> None:
+    login_default_user(client)
+    [session] = sessions.values()
+    assert isinstance(session, SessionUser)
+    assert not hasattr(session, "__dict__")
+
+    client.put("/api/auth/me", json={"display_name": "Renamed"})
+    [session] = sessions.values()
+    assert session.display_name == "Renamed"
+    assert client.get("/api/auth/me").json()["display_name"] == "Renamed"
@@ -1,3 +1,5 @@
+import json
+
 from fastapi.testclient import TestClient
 
 from app.main import create_app
@@ -227,3 +229,94 @@ def test_board_rejects_invalid_priority(client) -> None:
     board["cards"]["card-1"]["priority"] = "critical"  # invalid value
     resp = client.put(f"/api/boards/{board_id}", json=board)
     assert resp.status_code == 422
+
+
+def test_export_boards_streams_ndjson(client) -> None:
+    login_default_user(client)
+    client.post("/api/boards", json={"name": "Sprint 1"})
+
+    resp = client.get("/api/boards/export")
+    assert resp.status_code == 200
+    assert resp.headers["content-type"].startswith("application/x-ndjson")
+    lines = [json.loads(line) for line in resp.text.splitlines()]
+    assert [line["name"] for line in lines] == ["My Board", "Sprint 1"]
+    assert "columns" in lines[0]["board_json"]
+
+
+def test_import_boards_from_ndjson(client) -> None:
+    login_default_user(client)
+    exported = client.get("/api/boards/export").text.splitlines()
+    source = json.loads(exported[0])
+    source["board_json"]["cards"]["card-1"]["title"] = "Imported"
+
+    body = "\n".join(
+        json.dumps({"name": f"Team board {i}", "board_json": source["board_json"]})
+        for i in range(1, 1201)
+    )
+    resp = client.post(
+        "/api/boards/import",
+        content=body,
+        headers={"Content-Type": "application/x-ndjson"},
+    )
+    assert resp.status_code == 201
+    assert resp.json()["imported"] == 1200
+
+    boards = client.get("/api/boards").json()
+    assert len(boards) == 1201
+    imported = client.get(f"/api/boards/{resp.json()['board_ids'][0]}").json()
+    assert imported["name"] == "Team board 1"
+    assert imported["board_json"]["cards"]["card-1"]["title"] == "Imported"
+
+
+def test_import_round_trips_export(client) -> None:
+    login_default_user(client)
+    exported = client.get("/api/boards/export").text
+
+    resp = client.post("/api/boards/import", content=exported)
+    assert resp.status_code == 201
+    assert resp.json()["imported"] == 1
+    assert len(client.get("/api/boards").json()) == 2
+
+
+def test_import_reports_invalid_line(client) -> None:
+    login_default_user(client)
+    board = client.get("/api/board").json()
+    good = json.dumps({"name": "Good", "board_json": board})
+    bad = json.dumps({"name": "Bad", "board_json": {"columns": []}})
+
+    resp = client.post("/api/boards/import", content=f"{good}\n{bad}\n")
+    assert resp.status_code == 422
+    assert resp.json()["detail"]["line"] == 2
+    assert resp.json()["detail"]["imported"] == 1
+
+
+def test_import_handles_lines_split_across_many_chunks(client) -> None:
+    login_default_user(client)
+    board = client.get("/api/board").json()
+    body = "\n".join(json.dumps({"name": f"Chunked {i}", "board_json": board}) for i in range(3)).encode()
+
+    resp = client.post("/api/boards/import", content=(body[i : i + 7] for i in range(0, len(body), 7)))
+    assert resp.status_code == 201
+    assert resp.json()["imported"] == 3
+
+
+def test_import_rejects_oversized_lines_and_bodies(client, monkeypatch) -> None:
+    from app.routers import board as board_router
+
+    login_default_user(client)
+    good = json.dumps({"name": "Good", "board_json": client.get("/api/board").json()})
+    monkeypatch.setattr(board_router, "MAX_IMPORT_LINE_BYTES", len(good))
+
+    resp = client.post("/api/boards/import", content=f"{good}\n{good}x\n{good}\n")
+    assert resp.status_code == 413
+    assert resp.json()["detail"]["line"] == 2
+    assert resp.json()["detail"]["imported"] == 1
+
+    monkeypatch.setattr(board_router, "MAX_IMPORT_BYTES", len(good) * 2)
+    resp = client.post("/api/boards/import", content=(f"{good}\n".encode() for _ in range(3)))
+    assert resp.status_code == 413
+
+
+def test_import_requires_authentication(client) -> None:
+    resp = client.post("/api/boards/import", content="")
+    assert resp.status_code == 401
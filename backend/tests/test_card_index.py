@@ -0,0 +1,133 @@
+from app.db import PRIORITY_RANK_SQL, get_board_connection, get_user_by_username, init_db
+from tests.conftest import login_default_user, register_and_login
+
+
+def with_due_dates(board: dict, **changes: dict) -> dict:
+    cards = {card_id: dict(card) for card_id, card in board["cards"].items()}
+    for card_id, fields in changes.items():
+        cards[card_id.replace("_", "-")].update(fields)
+    return {**board, "cards": cards}
+
+
+def test_due_cards_are_filtered_by_date_and_priority(client) -> None:
+    login_default_user(client)
+    board = client.get("/api/board").json()
+    client.put(
+        "/api/board",
+        json=with_due_dates(
+            board,
+            card_1={"due_date": "2026-01-10", "priority": "high"},
+            card_3={"due_date": "2026-01-05"},
+            card_6={"due_date": "2026-03-01", "priority": "urgent"},
+            card_7={"priority": "low"},
+        ),
+    )
+
+    due = client.get("/api/cards/due").json()
+    assert [card["card_id"] for card in due] == ["card-3", "card-1", "card-6"]
+    assert due[0]["column_id"] == "col-discovery"
+    assert due[1]["title"] == "Align roadmap themes"
+
+    overdue = client.get("/api/cards/due?before=2026-02-01").json()
+    assert [card["card_id"] for card in overdue] == ["card-3", "card-1"]
+
+    urgent = client.get("/api/cards/due?priority=high&priority=urgent").json()
+    assert [card["card_id"] for card in urgent] == ["card-1", "card-6"]
+
+    assert client.get("/api/cards/due?before=soon").status_code == 422
+
+
+def test_due_cards_on_one_date_are_ordered_by_priority_rank(client) -> None:
+    login_default_user(client)
+    board = client.get("/api/board").json()
+    client.put(
+        "/api/board",
+        json=with_due_dates(
+            board,
+            card_1={"due_date": "2026-01-10", "priority": "low"},
+            card_2={"due_date": "2026-01-10", "priority": "urgent"},
+            card_3={"due_date": "2026-01-10", "priority": "none"},
+            card_4={"due_date": "2026-01-10", "priority": "medium"},
+            card_5={"due_date": "2026-01-10", "priority": "high"},
+            card_6={"due_date": "2026-01-09", "priority": "low"},
+        ),
+    )
+
+    due = client.get("/api/cards/due").json()
+    assert [card["card_id"] for card in due] == ["card-6", "card-2", "card-5", "card-4", "card-1", "card-3"]
+
+
+def test_index_follows_moves_edits_and_deletes(client) -> None:
+    login_default_user(client)
+    board = client.get("/api/board").json()
+    board = with_due_dates(board, card_1={"due_date": "2026-01-10"}, card_2={"due_date": "2026-01-11"})
+    client.put("/api/board", json=board)
+
+    # Move card-1 to Done without touching the card itself.
+    columns = [dict(column) for column in board["columns"]]
+    columns[0]["cardIds"] = ["card-2"]
+    columns[4]["cardIds"] = ["card-1", *columns[4]["cardIds"]]
+    board = {**board, "columns": columns}
+    client.put("/api/board", json=board)
+    assert client.get("/api/cards/due").json()[0]["column_id"] == "col-done"
+
+    # Clearing the due date and deleting a card both drop them from the index.
+    cards = dict(board["cards"])
+    cards["card-1"] = {**cards["card-1"], "due_date": None}
+    del cards["card-2"]
+    columns[0]["cardIds"] = []
+    client.put("/api/board", json={"columns": columns, "cards": cards})
+    assert client.get("/api/cards/due").json() == []
+
+
+def test_due_cards_span_boards_and_stay_per_user(client) -> None:
+    login_default_user(client)
+    board = client.get("/api/board").json()
+    client.put("/api/board", json=with_due_dates(board, card_1={"due_date": "2026-01-10"}))
+    created = client.post("/api/boards", json={"name": "Second"}).json()
+    second = with_due_dates(created["board_json"], card_2={"due_date": "2026-01-01"})
+    client.put(f"/api/boards/{created['id']}", json=second)
+
+    due = client.get("/api/cards/due").json()
+    assert [(card["board_id"] == created["id"], card["card_id"]) for card in due] == [
+        (True, "card-2"),
+        (False, "card-1"),
+    ]
+
+    client.delete(f"/api/boards/{created['id']}")
+    assert [card["card_id"] for card in client.get("/api/cards/due").json()] == ["card-1"]
+
+    client.post("/api/auth/logout")
+    register_and_login(client)
+    assert client.get("/api/cards/due").json() == []
+
+
+def test_existing_boards_are_indexed_when_the_table_is_added(client) -> None:
+    login_default_user(client)
+    board = client.get("/api/board").json()
+    client.put("/api/board", json=with_due_dates(board, card_4={"due_date": "2026-05-05"}))
+    user_id = get_user_by_username("user")["id"]
+    with get_board_connection(user_id) as connection:
+        connection.execute("DROP TABLE card_index")
+
+    init_db()
+    assert [card["card_id"] for card in client.get("/api/cards/due").json()] == ["card-4"]
+
+
+def test_due_query_is_served_from_the_covering_index(app) -> None:
+    user_id = get_user_by_username("user")["id"]
+    with get_board_connection(user_id) as connection:
+        plan = connection.execute(
+            f"""
+            EXPLAIN QUERY PLAN
+            SELECT board_id, card_id, column_id, title, due_date, priority
+            FROM card_index
+            WHERE user_id = ? AND due_date IS NOT NULL AND due_date < ? AND priority IN (?, ?)
+            ORDER BY due_date, {PRIORITY_RANK_SQL}, board_id, card_id
+            LIMIT ?
+            """,
+            (user_id, "2026-01-01", "high", "urgent", 100),
+        ).fetchall()
+    details = " ".join(row["detail"] for row in plan)
+    assert "COVERING INDEX idx_card_index_due_rank" in details
+    assert "TEMP B-TREE" not in details
@@ -0,0 +1,108 @@
+from app.db import SNAPSHOT_INTERVAL, get_board_connection, get_board_version, get_user_by_username
+from tests.conftest import login_default_user
+
+
+def card_ranks(board_id: str) -> dict[str, str]:
+    user_id = get_user_by_username("user")["id"]
+    with get_board_connection(user_id) as connection:
+        rows = connection.execute(
+            "SELECT card_id, rank FROM card_index WHERE board_id = ?", (board_id,)
+        ).fetchall()
+    return {row["card_id"]: row["rank"] for row in rows}
+
+
+def column_cards(board: dict) -> dict[str, list[str]]:
+    return {column["id"]: column["cardIds"] for column in board["columns"]}
+
+
+def test_move_rewrites_one_rank_and_derives_card_order(client) -> None:
+    login_default_user(client)
+    board_id = client.get("/api/boards").json()[0]["id"]
+    before = card_ranks(board_id)
+
+    resp = client.post(
+        f"/api/boards/{board_id}/cards/card-8/move",
+        json={"column_id": "col-backlog", "before_card_id": "card-2"},
+    )
+    assert resp.status_code == 200
+    assert resp.json()["version"] == 2
+    after = card_ranks(board_id)
+    assert {card_id for card_id in after if after[card_id] != before[card_id]} == {"card-8"}
+
+    board = client.get(f"/api/boards/{board_id}").json()["board_json"]
+    assert column_cards(board)["col-backlog"] == ["card-1", "card-8", "card-2"]
+    assert column_cards(board)["col-done"] == ["card-7"]
+    shallow = client.get(f"/api/boards/{board_id}?shallow=true").json()
+    assert shallow["board_json"]["columns"][0]["cardIds"] == ["card-1", "card-8", "card-2"]
+    dashboard = client.get("/api/dashboard").json()["columns"]
+    assert (dashboard["Backlog"], dashboard["Done"]) == (3, 1)
+
+    client.post(f"/api/boards/{board_id}/cards/card-1/move", json={"column_id": "col-backlog"})
+    assert column_cards(client.get("/api/board").json())["col-backlog"] == ["card-8", "card-2", "card-1"]
+    user_id = get_user_by_username("user")["id"]
+    assert column_cards(get_board_version(board_id, user_id, 2))["col-backlog"] == ["card-1", "card-8", "card-2"]
+
+
+def test_full_save_after_moves_keeps_the_ranked_order(client) -> None:
+    login_default_user(client)
+    board_id = client.get("/api/boards").json()[0]["id"]
+    client.post(
+        f"/api/boards/{board_id}/cards/card-3/move",
+        json={"column_id": "col-progress", "after_card_id": "card-4"},
+    )
+
+    board = client.get("/api/board").json()
+    board["cards"]["card-5"]["title"] = "Renamed"
+    assert client.put("/api/board", json=board).status_code == 200
+    stored = client.get(f"/api/boards/{board_id}").json()
+    assert column_cards(stored["board_json"])["col-progress"] == ["card-4", "card-3", "card-5"]
+    assert column_cards(stored["board_json"])["col-discovery"] == []
+    history = client.get(f"/api/boards/{board_id}/history").json()
+    assert [entry["version"] for entry in history][:2] == [3, 2]
+
+
+def test_moves_fold_into_snapshots_and_replay(client) -> None:
+    login_default_user(client)
+    board_id = client.get("/api/boards").json()[0]["id"]
+    expected = {}
+    for version in range(2, SNAPSHOT_INTERVAL + 3):
+        card_id = "card-1" if version % 2 else "card-2"
+        client.post(f"/api/boards/{board_id}/cards/{card_id}/move", json={"column_id": "col-backlog"})
+        expected[version] = column_cards(client.get("/api/board").json())
+
+    user_id = get_user_by_username("user")["id"]
+    for version in (2, 3, SNAPSHOT_INTERVAL - 1, SNAPSHOT_INTERVAL, SNAPSHOT_INTERVAL + 2):
+        assert column_cards(get_board_version(board_id, user_id, version)) == expected[version]
+
+
+def test_move_rejects_bad_targets(client) -> None:
+    login_default_user(client)
+    board_id = client.get("/api/boards").json()[0]["id"]
+    url = f"/api/boards/{board_id}/cards/card-1/move"
+
+    assert client.post(f"/api/boards/{board_id}/cards/nope/move", json={"column_id": "col-done"}).status_code == 404
+    assert client.post(url, json={"column_id": "col-nope"}).status_code == 409
+    assert client.post(url, json={"column_id": "col-done", "after_card_id": "card-2"}).status_code == 409
+    assert client.post(url, json={"column_id": "col-done", "after_card_id": "card-1"}).status_code == 409
+    resp = client.post(url, json={"column_id": "col-done", "after_card_id": "card-7", "before_card_id": "card-8"})
+    assert resp.status_code == 422
+
+
+def test_repeated_inserts_respread_the_column(client) -> None:
+    login_default_user(client)
+    board_id = client.get("/api/boards").json()[0]["id"]
+    for index in range(60):
+        card_id = "card-1" if index % 2 else "card-2"
+        other = "card-2" if index % 2 else "card-1"
+        client.post(
+            f"/api/boards/{board_id}/cards/{card_id}/move",
+            json={"column_id": "col-done", "after_card_id": "card-7"},
+        )
+        client.post(
+            f"/api/boards/{board_id}/cards/{other}/move",
+            json={"column_id": "col-done", "before_card_id": card_id},
+        )
+    ranks = card_ranks(board_id)
+    assert max(len(rank) for rank in ranks.values()) <= 12
+    done = column_cards(client.get("/api/board").json())["col-done"]
+    assert done[0] == "card-7" and set(done) == {"card-1", "card-2", "card-7", "card-8"}
@@ -0,0 +1,103 @@
+import gzip
+
+import pytest
+
+from app import compression
+from app.compression import negotiate_encoding
+from tests.conftest import login_default_user
+
+
+def make_large_board(card_count: int = 300) -> dict:
+    cards = {
+        f"card-{i}": {
+            "id": f"card-{i}",
+            "title": f"Task number {i}",
+            "details": "Investigate the reported regression and document the fix. " * 3,
+        }
+        for i in range(card_count)
+    }
+    return {
+        "columns": [{"id": "col-backlog", "title": "Backlog", "cardIds": list(cards)}],
+        "cards": cards,
+    }
+
+
+def test_negotiate_encoding_respects_q_values() -> None:
+    assert negotiate_encoding("gzip, br;q=0.5", ["br", "gzip"]) == "gzip"
+    assert negotiate_encoding("br, gzip", ["br", "gzip"]) == "br"
+    assert negotiate_encoding("gzip;q=0", ["gzip"]) is None
+    assert negotiate_encoding("*", ["gzip"]) == "gzip"
+    assert negotiate_encoding(None, ["gzip"]) is None
+
+
+def test_large_board_response_is_gzipped(client) -> None:
+    login_default_user(client)
+    board_id = client.get("/api/boards").json()[0]["id"]
+    client.put(f"/api/boards/{board_id}", json=make_large_board())
+
+    resp = client.get(f"/api/boards/{board_id}", headers={"Accept-Encoding": "gzip"})
+    assert resp.status_code == 200
+    assert resp.headers["content-encoding"] == "gzip"
+    assert "Accept-Encoding" in resp.headers["vary"]
+    assert int(resp.headers["content-length"]) < len(resp.content) / 4
+    assert len(resp.json()["board_json"]["cards"]) == 300
+
+
+def test_small_responses_are_not_compressed(client) -> None:
+    resp = client.get("/api/health", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in resp.headers
+
+
+def test_identity_when_not_accepted(client) -> None:
+    login_default_user(client)
+    board_id = client.get("/api/boards").json()[0]["id"]
+    client.put(f"/api/boards/{board_id}", json=make_large_board())
+
+    resp = client.get(f"/api/boards/{board_id}", headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in resp.headers
+
+
+def test_unchanged_board_is_compressed_once(client, monkeypatch) -> None:
+    login_default_user(client)
+    board_id = client.get("/api/boards").json()[0]["id"]
+    board = make_large_board()
+    client.put(f"/api/boards/{board_id}", json=board)
+
+    calls = {"count": 0}
+    original = compression.compress
+
+    def counting_compress(data, encoding, best=False):
+        calls["count"] += 1
+        return original(data, encoding, best)
+
+    monkeypatch.setattr(compression, "compress", counting_compress)
+    headers = {"Accept-Encoding": "gzip"}
+    first = client.get(f"/api/boards/{board_id}", headers=headers)
+    second = client.get(f"/api/boards/{board_id}", headers=headers)
+    assert first.content == second.content
+    assert calls["count"] == 1
+
+    board["cards"]["card-0"]["title"] = "Changed"
+    client.put(f"/api/boards/{board_id}", json=board, headers={"Accept-Encoding": "identity"})
+    changed = client.get(f"/api/boards/{board_id}", headers=headers)
+    assert changed.json()["board_json"]["cards"]["card-0"]["title"] == "Changed"
+    assert calls["count"] == 2
+
+
+@pytest.mark.parametrize("encoding, module", [("br", "brotli"), ("zstd", "zstandard")])
+def test_optional_encodings_are_negotiated(client, encoding, module) -> None:
+    pytest.importorskip(module)
+    login_default_user(client)
+    board_id = client.get("/api/boards").json()[0]["id"]
+    client.put(f"/api/boards/{board_id}", json=make_large_board())
+
+    resp = client.get(
+        f"/api/boards/{board_id}",
+        headers={"Accept-Encoding": f"{encoding}, gzip;q=0.5"},
+    )
+    assert resp.headers["content-encoding"] == encoding
+
+
+def test_gzip_body_round_trips() -> None:
+    data = b'{"cards": {}}' * 100
+    assert gzip.decompress(compression.compress(data, "gzip")) == data
@@ -0,0 +1,169 @@
+import sqlite3
+
+from app.ai_client import OpenRouterRequestError
+from app.conversations import condense, estimate_tokens, extend_summary, split_by_budget
+from app.db import get_db_path
+from tests.conftest import login_default_user
+
+
+def turn(seq: int, content: str, role: str = "user") -> dict:
+    return {"seq": seq, "role": role, "content": content}
+
+
+def test_split_by_budget_keeps_newest_turns() -> None:
+    turns = [turn(1, "a" * 40), turn(2, "b" * 40), turn(3, "c" * 40)]
+    older, recent = split_by_budget(turns, budget=25)
+    assert [t["seq"] for t in older] == [1]
+    assert [t["seq"] for t in recent] == [2, 3]
+
+
+def test_split_by_budget_always_keeps_last_turn() -> None:
+    older, recent = split_by_budget([turn(1, "x"), turn(2, "y" * 1000)], budget=10)
+    assert [t["seq"] for t in older] == [1]
+    assert [t["seq"] for t in recent] == [2]
+
+
+def test_extend_summary_clips_lines_and_respects_budget() -> None:
+    summary = extend_summary("", [turn(1, "word " * 100)], budget=1000)
+    assert summary.startswith("user: word word")
+    assert len(summary) <= len("user: ") + 160
+
+    for seq in range(2, 40):
+        summary = extend_summary(summary, [turn(seq, f"message {seq} " * 20)], budget=120)
+    assert estimate_tokens(summary) <= 120
+    assert "message 39" in summary
+    assert "message 2 " not in summary
+
+
+def test_condense_keeps_the_opening_and_salient_sentences() -> None:
+    text = (
+        "Move the launch checklist to Done. It has been a long week. "
+        "The team met on Tuesday and chatted about many things. "
+        "Card card-7 is due 2026-03-01. Everyone seemed happy with progress."
+    )
+    condensed = condense(text, 80)
+    assert len(condensed) <= 80
+    assert condensed.startswith("Move the launch checklist to Done.")
+    assert "card-7 is due 2026-03-01" in condensed
+    assert "long week" not in condensed
+
+
+def test_extend_summary_condenses_older_lines_before_dropping_them() -> None:
+    summary = ""
+    for seq in range(1, 9):
+        content = f"Question {seq} about card-{seq}. " + "Some filler sentence here. " * 6
+        summary = extend_summary(summary, [turn(seq, content)], budget=200)
+    lines = summary.splitlines()
+    assert estimate_tokens(summary) <= 200
+    assert lines[0].startswith("user: Question 1 about card-1.")
+    assert len(lines[0]) < len(lines[-1])
+    assert lines[-1].startswith("user: Question 8 about card-8.")
+
+
+def test_board_action_returns_conversation_and_remembers_turns(client, monkeypatch) -> None:
+    prompts = []
+
+    def fake_query(prompt):
+        prompts.append(prompt)
+        return f'{{"assistant_response":"answer {len(prompts)}","board_update":null}}'
+
+    monkeypatch.setattr("app.routers.ai.query_openrouter", fake_query)
+    login_default_user(client)
+
+    first = client.post("/api/ai/board-action", json={"question": "What is blocked?"}).json()
+    conversation_id = first["conversation_id"]
+
+    second = client.post(
+        "/api/ai/board-action",
+        json={"question": "And after that?", "conversation_id": conversation_id},
+    ).json()
+    assert second["conversation_id"] == conversation_id
+    assert "user: What is blocked?" in prompts[1]
+    assert "assistant: answer 1" in prompts[1]
+
+    conversation = client.get(f"/api/ai/conversations/{conversation_id}").json()
+    assert [(t["role"], t["content"]) for t in conversation["turns"]] == [
+        ("user", "What is blocked?"),
+        ("assistant", "answer 1"),
+        ("user", "And after that?"),
+        ("assistant", "answer 2"),
+    ]
+
+
+def test_long_conversation_prompt_stays_bounded(client, monkeypatch) -> None:
+    monkeypatch.setenv("PM_AI_HISTORY_TOKEN_BUDGET", "200")
+    monkeypatch.setenv("PM_AI_SUMMARY_TOKEN_BUDGET", "150")
+    prompts = []
+
+    def fake_query(prompt):
+        prompts.append(prompt)
+        return '{"assistant_response":"noted","board_update":null}'
+
+    monkeypatch.setattr("app.routers.ai.query_openrouter", fake_query)
+    login_default_user(client)
+
+    conversation_id = None
+    for index in range(30):
+        body = {"question": f"Question {index}: " + "context " * 30}
+        if conversation_id:
+            body["conversation_id"] = conversation_id
+        conversation_id = client.post("/api/ai/board-action", json=body).json()["conversation_id"]
+
+    assert len(prompts[-1]) - len(prompts[10]) < 200
+    assert "Summary of earlier conversation:" in prompts[-1]
+    assert "Question 28" in prompts[-1]
+    assert "Question 0:" not in prompts[-1]
+
+    conversation = client.get(f"/api/ai/conversations/{conversation_id}").json()
+    assert conversation["summarized_through"] > 0
+    assert len(conversation["turns"]) == 60
+
+
+def test_conversation_is_scoped_to_board_and_user(client, monkeypatch) -> None:
+    monkeypatch.setattr(
+        "app.routers.ai.query_openrouter",
+        lambda _: '{"assistant_response":"ok","board_update":null}',
+    )
+    login_default_user(client)
+    conversation_id = client.post("/api/ai/board-action", json={"question": "Hi"}).json()[
+        "conversation_id"
+    ]
+    other_board = client.post("/api/boards", json={"name": "Other"}).json()["id"]
+
+    resp = client.post(
+        "/api/ai/board-action",
+        json={"question": "Hi", "conversation_id": conversation_id, "board_id": other_board},
+    )
+    assert resp.status_code == 404
+
+    client.post("/api/auth/logout")
+    client.post("/api/auth/register", json={"username": "other", "password": "otherpass123"})
+    assert client.get(f"/api/ai/conversations/{conversation_id}").status_code == 404
+
+
+def test_failed_first_reply_leaves_no_conversation(client, monkeypatch) -> None:
+    def unavailable(_):
+        raise OpenRouterRequestError("upstream error")
+
+    monkeypatch.setattr("app.routers.ai.query_openrouter", unavailable)
+    login_default_user(client)
+
+    resp = client.post(
+        "/api/ai/board-action",
+        json={"question": "Hi", "conversation_history": [{"role": "user", "content": "Earlier"}]},
+    )
+    assert resp.status_code == 502
+    with sqlite3.connect(get_db_path()) as connection:
+        assert connection.execute("SELECT COUNT(*) FROM ai_conversations").fetchone()[0] == 0
+        assert connection.execute("SELECT COUNT(*) FROM ai_conversation_turns").fetchone()[0] == 0
+
+    monkeypatch.setattr(
+        "app.routers.ai.query_openrouter",
+        lambda _: '{"assistant_response":"ok","board_update":null}',
+    )
+    resp = client.post(
+        "/api/ai/board-action",
+        json={"question": "Hi", "conversation_history": [{"role": "user", "content": "Earlier"}]},
+    )
+    turns = client.get(f"/api/ai/conversations/{resp.json()['conversation_id']}").json()["turns"]
+    assert [t["content"] for t in turns] == ["Earlier", "Hi", "ok"]
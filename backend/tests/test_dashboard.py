@@ -0,0 +1,72 @@
+from app.db import get_board_connection, get_user_by_username
+from app.reindex import reindex
+from tests.conftest import login_default_user
+
+LABEL = {"id": "l1", "text": "Bug", "color": "#ff0000"}
+
+
+def test_dashboard_counts_cards_across_boards(client) -> None:
+    login_default_user(client)
+    dashboard = client.get("/api/dashboard").json()
+    assert dashboard["columns"] == {
+        "Backlog": 2,
+        "Discovery": 1,
+        "Done": 2,
+        "In Progress": 2,
+        "Review": 1,
+    }
+    assert dashboard["priorities"] == {"none": 8}
+    assert dashboard["labels"] == {}
+
+    created = client.post("/api/boards", json={"name": "Second"}).json()
+    dashboard = client.get("/api/dashboard").json()
+    assert dashboard["columns"]["Backlog"] == 4
+    assert [(board["name"], board["cards"]) for board in dashboard["boards"]] == [
+        ("My Board", 8),
+        ("Second", 8),
+    ]
+
+    client.delete(f"/api/boards/{created['id']}")
+    assert client.get("/api/dashboard").json()["priorities"] == {"none": 8}
+
+
+def test_dashboard_follows_edits_moves_and_renames(client) -> None:
+    login_default_user(client)
+    board = client.get("/api/board").json()
+
+    cards = dict(board["cards"])
+    cards["card-1"] = {**cards["card-1"], "priority": "high", "labels": [LABEL]}
+    cards["card-2"] = {**cards["card-2"], "labels": [LABEL]}
+    del cards["card-8"]
+    columns = [dict(column) for column in board["columns"]]
+    columns[0]["cardIds"] = ["card-2"]
+    columns[1]["cardIds"] = ["card-3", "card-1"]
+    columns[3]["title"] = "QA"
+    columns[4]["cardIds"] = ["card-7"]
+    client.put("/api/board", json={"columns": columns, "cards": cards})
+
+    dashboard = client.get("/api/dashboard").json()
+    assert dashboard["columns"] == {
+        "Backlog": 1,
+        "Discovery": 2,
+        "Done": 1,
+        "In Progress": 2,
+        "QA": 1,
+    }
+    assert dashboard["priorities"] == {"high": 1, "none": 6}
+    assert dashboard["labels"] == {"Bug": 2}
+
+
+def test_reindex_repairs_drifted_aggregates(client) -> None:
+    login_default_user(client)
+    client.post("/api/boards", json={"name": "Second"})
+    expected = client.get("/api/dashboard").json()
+
+    user_id = get_user_by_username("user")["id"]
+    with get_board_connection(user_id) as connection:
+        connection.execute("UPDATE board_aggregates SET count = 99")
+        connection.execute("DELETE FROM card_index")
+
+    assert reindex() == {"central": 2}
+    assert reindex("user") == {"user": 2}
+    assert client.get("/api/dashboard").json() == expected
@@ -0,0 +1,101 @@
+import asyncio
+import threading
+
+import anyio
+import httpx
+
+from app import db_async
+from app.db import get_user_by_username
+from app.metrics import metrics
+
+
+def test_run_uses_dedicated_db_threads() -> None:
+    async def scenario():
+        return await asyncio.gather(*(db_async.run(lambda: threading.current_thread().name) for _ in range(20)))
+
+    names = asyncio.run(scenario())
+    assert all(name.startswith("db") for name in names)
+    assert metrics.snapshot()["gauges"]["db_executor"]["in_flight"] == 0
+
+
+def test_executor_stats_count_calls_from_many_loops() -> None:
+    before = db_async.executor_stats()
+    release = threading.Event()
+
+    async def scenario():
+        blocked = [asyncio.ensure_future(db_async.run(release.wait, 5)) for _ in range(db_async._threads)]
+        queued = [asyncio.ensure_future(db_async.run(lambda: None)) for _ in range(3)]
+        await asyncio.sleep(0.2)
+        stats = db_async.executor_stats()
+        for task in queued:
+            task.cancel()
+        await asyncio.gather(*queued, return_exceptions=True)
+        release.set()
+        await asyncio.gather(*blocked)
+        return stats
+
+    busy = asyncio.run(scenario())
+    assert busy["running"] == db_async._threads
+    assert busy["queued"] == 3
+
+    def on_own_loop() -> None:
+        async def calls():
+            await asyncio.gather(*(db_async.run(lambda: None) for _ in range(50)))
+
+        asyncio.run(calls())
+
+    threads = [threading.Thread(target=on_own_loop) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    after = db_async.executor_stats()
+    assert after["submitted"] - before["submitted"] == db_async._threads + 3 + 200
+    assert after["finished"] - before["finished"] == db_async._threads + 200
+    assert after["running"] == after["queued"] == after["in_flight"] == 0
+
+
+def test_async_wrappers_round_trip(app) -> None:
+    user_id = get_user_by_username("user")["id"]
+
+    async def scenario():
+        board = await db_async.get_default_board_for_user(user_id)
+        created = await db_async.create_board(user_id, "Async")
+        renamed = await db_async.rename_board(created["id"], user_id, "Renamed")
+        updated = await db_async.update_board(created["id"], user_id, board["board_json"])
+        history = await db_async.get_board_history(created["id"], user_id)
+        return renamed, updated, history
+
+    renamed, updated, history = asyncio.run(scenario())
+    assert renamed["name"] == "Renamed"
+    assert updated["version"] == 2
+    assert [entry["version"] for entry in history] == [2, 1]
+
+
+def test_board_routes_work_when_threadpool_is_exhausted(app) -> None:
+    async def scenario():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            resp = await client.post("/api/auth/login", json={"username": "user", "password": "password"})
+            assert resp.status_code == 200
+
+            limiter = anyio.to_thread.current_default_thread_limiter()
+            limiter.total_tokens = 1
+            await limiter.acquire()
+            try:
+                boards = await asyncio.wait_for(client.get("/api/boards"), timeout=5)
+                board = await asyncio.wait_for(client.get("/api/board"), timeout=5)
+                put = await asyncio.wait_for(client.put("/api/board", json=board.json()), timeout=5)
+                # A sync route still needs a threadpool slot and stalls.
+                sync_route = asyncio.ensure_future(client.get("/api/auth/me"))
+                await asyncio.sleep(0.2)
+                assert not sync_route.done()
+            finally:
+                limiter.release()
+            assert (await asyncio.wait_for(sync_route, timeout=5)).status_code == 200
+            return boards, put
+
+    boards, put = asyncio.run(scenario())
+    assert boards.status_code == 200
+    assert put.status_code == 200
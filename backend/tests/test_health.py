@@ -1,3 +1,14 @@
+import sqlite3
+
+from fastapi.testclient import TestClient
+
+from app import db_async
+from app.db import clear_shard_cache, get_shard_path, get_user_by_username, get_user_shard
+from app.main import create_app
+from app.write_behind import write_buffer
+from tests.conftest import register_and_login
+
+
 def test_health_endpoint(client) -> None:
     response = client.get("/api/health")
     assert response.status_code == 200
@@ -14,3 +25,114 @@ def test_root_serves_static_html(client) -> None:
     response = client.get("/")
     assert response.status_code == 200
     assert "<html" in response.text.lower()
+
+
+def test_liveness_endpoint(client) -> None:
+    response = client.get("/api/health/live")
+    assert response.status_code == 200
+    assert response.json() == {"status": "ok"}
+
+
+def test_readiness_reports_dependencies(client) -> None:
+    response = client.get("/api/health/ready")
+    assert response.status_code == 200
+    data = response.json()
+    assert data["status"] == "ready"
+    assert data["checks"]["database"]["ok"] is True
+    assert data["checks"]["threadpool"]["size"] > 0
+    assert "lag_ms" in data["checks"]["event_loop"]
+    assert data["checks"]["openrouter"] == {"enabled": False}
+
+
+def test_readiness_fails_when_database_locked(client, tmp_path) -> None:
+    client.app.state.health_monitor.sqlite_probe.close()
+    locker = sqlite3.connect(tmp_path / "pm.db")
+    # The database runs in WAL mode, where only an exclusive locking mode
+    # (which needs every other connection closed) keeps readers out.
+    locker.execute("PRAGMA locking_mode = EXCLUSIVE")
+    locker.execute("BEGIN EXCLUSIVE")
+    try:
+        response = client.get("/api/health/ready")
+    finally:
+        locker.rollback()
+        locker.close()
+
+    assert response.status_code == 503
+    assert response.json()["checks"]["database"]["ok"] is False
+
+
+def test_readiness_fails_when_a_shard_is_locked(monkeypatch) -> None:
+    monkeypatch.setenv("PM_DB_SHARDS", "2")
+    clear_shard_cache()
+    with TestClient(create_app()) as client:
+        register_and_login(client, username="sharded", password="shardpass123")
+        shard = get_shard_path(get_user_shard(get_user_by_username("sharded")["id"]))
+        assert client.get("/api/health/ready").status_code == 200
+
+        client.app.state.health_monitor.sqlite_probe.close()
+        locker = sqlite3.connect(shard)
+        locker.execute("PRAGMA locking_mode = EXCLUSIVE")
+        locker.execute("BEGIN EXCLUSIVE")
+        try:
+            response = client.get("/api/health/ready")
+        finally:
+            locker.rollback()
+            locker.close()
+    clear_shard_cache()
+
+    assert response.status_code == 503
+    assert response.json()["checks"]["database"]["error"].startswith(shard.name)
+
+
+def test_readiness_fails_when_disk_nearly_full(client, monkeypatch) -> None:
+    monkeypatch.setenv("PM_HEALTH_MIN_FREE_BYTES", str(2**62))
+    response = client.get("/api/health/ready")
+    assert response.status_code == 503
+    assert response.json()["checks"]["database"]["error"] == "insufficient free disk space"
+
+
+def test_readiness_fails_when_writes_back_up(client, monkeypatch) -> None:
+    data = client.get("/api/health/ready").json()
+    assert data["checks"]["write_buffer"]["pending"] == 0
+    assert data["checks"]["db_executor"]["in_flight"] == 0
+
+    monkeypatch.setattr(write_buffer, "pending_count", lambda: 5)
+    monkeypatch.setenv("PM_HEALTH_MAX_PENDING_WRITES", "4")
+    response = client.get("/api/health/ready")
+    assert response.status_code == 503
+    assert response.json()["checks"]["write_buffer"] == {"pending": 5, "max": 4, "ok": False}
+    monkeypatch.undo()
+
+    monkeypatch.setattr(db_async, "executor_stats", lambda: {"in_flight": 300})
+    response = client.get("/api/health/ready")
+    assert response.status_code == 503
+    assert response.json()["checks"]["db_executor"] == {"in_flight": 300, "max": 256, "ok": False}
+
+
+def test_readiness_result_is_cached(client, monkeypatch) -> None:
+    calls = {"count": 0}
+    probe = client.app.state.health_monitor.sqlite_probe
+    original = probe._probe
+
+    def counting_probe():
+        calls["count"] += 1
+        return original()
+
+    monkeypatch.setattr(probe, "_probe", counting_probe)
+    for _ in range(5):
+        assert client.get("/api/health/ready").status_code == 200
+    assert calls["count"] == 1
+
+
+def test_metrics_require_the_token_when_configured(client, monkeypatch) -> None:
+    assert client.get("/api/metrics").status_code == 200
+
+    monkeypatch.setenv("PM_METRICS_TOKEN", "scrape-secret")
+    assert client.get("/api/metrics").status_code == 401
+    wrong = client.get("/api/metrics", headers={"Authorization": "Bearer nope"})
+    assert wrong.status_code == 401
+    assert wrong.headers["www-authenticate"] == "Bearer"
+
+    resp = client.get("/api/metrics", headers={"Authorization": "Bearer scrape-secret"})
+    assert resp.status_code == 200
+    assert "counters" in resp.json()
@@ -0,0 +1,132 @@
+import sqlite3
+
+import pytest
+
+from app import db
+from app.board_diff import apply_delta, diff_boards
+from app.board_defaults import default_board
+from app.db import get_db_path
+from tests.conftest import login_default_user
+
+
+def default_board_id(client) -> str:
+    return client.get("/api/boards").json()[0]["id"]
+
+
+def test_diff_and_apply_round_trip() -> None:
+    old = default_board()
+    new = default_board()
+    new["cards"]["card-1"]["title"] = "Changed"
+    del new["cards"]["card-2"]
+    new["columns"][0]["cardIds"] = ["card-1"]
+
+    delta = diff_boards(old, new)
+    assert set(delta) == {"cards", "removed", "column_updates"}
+    assert list(delta["cards"]) == ["card-1"]
+    assert list(delta["column_updates"]) == ["col-backlog"]
+    assert apply_delta(old, delta) == new
+
+
+def test_diff_stores_full_columns_on_reorder() -> None:
+    old = default_board()
+    new = default_board()
+    new["columns"].reverse()
+    delta = diff_boards(old, new)
+    assert delta == {"columns": new["columns"]}
+    assert apply_delta(old, delta) == new
+
+
+def test_updates_bump_version_and_record_deltas(client) -> None:
+    login_default_user(client)
+    board_id = default_board_id(client)
+    board = client.get(f"/api/boards/{board_id}").json()
+    assert board["version"] == 1
+
+    board_json = board["board_json"]
+    board_json["cards"]["card-1"]["title"] = "Second"
+    resp = client.put(f"/api/boards/{board_id}", json=board_json)
+    assert resp.json()["version"] == 2
+
+    history = client.get(f"/api/boards/{board_id}/history").json()
+    assert [(item["version"], item["kind"]) for item in history] == [
+        (2, "delta"),
+        (1, "snapshot"),
+    ]
+
+
+def test_delta_is_small_for_single_card_edit(client) -> None:
+    login_default_user(client)
+    board_id = default_board_id(client)
+    # The first save normalizes the seeded cards (labels, priority, ...).
+    board_json = client.put(
+        f"/api/boards/{board_id}",
+        json=client.get(f"/api/boards/{board_id}").json()["board_json"],
+    ).json()["board_json"]
+    board_json["cards"]["card-3"]["title"] = "Small edit"
+    client.put(f"/api/boards/{board_id}", json=board_json)
+
+    connection = sqlite3.connect(get_db_path())
+    payload = connection.execute(
+        "SELECT payload FROM board_events WHERE board_id = ? AND version = 3",
+        (board_id,),
+    ).fetchone()[0]
+    connection.close()
+    assert "card-3" in payload
+    assert "card-1" not in payload
+
+
+def test_revert_restores_earlier_version(client) -> None:
+    login_default_user(client)
+    board_id = default_board_id(client)
+    board_json = client.get(f"/api/boards/{board_id}").json()["board_json"]
+    for i in range(3):
+        board_json["cards"]["card-1"]["title"] = f"Edit {i}"
+        client.put(f"/api/boards/{board_id}", json=board_json)
+
+    resp = client.post(f"/api/boards/{board_id}/revert/2")
+    assert resp.status_code == 200
+    assert resp.json()["version"] == 5
+    assert resp.json()["board_json"]["cards"]["card-1"]["title"] == "Edit 0"
+
+    resp = client.post(f"/api/boards/{board_id}/revert/1")
+    assert resp.json()["board_json"]["cards"]["card-1"]["title"] == "Align roadmap themes"
+
+
+def test_snapshots_bound_reconstruction_and_compaction(client, monkeypatch) -> None:
+    monkeypatch.setattr(db, "SNAPSHOT_INTERVAL", 5)
+    monkeypatch.setenv("PM_HISTORY_MAX_VERSIONS", "10")
+    login_default_user(client)
+    board_id = default_board_id(client)
+    board_json = client.get(f"/api/boards/{board_id}").json()["board_json"]
+    for i in range(2, 31):
+        board_json["cards"]["card-1"]["title"] = f"Version {i}"
+        client.put(f"/api/boards/{board_id}", json=board_json)
+
+    history = client.get(f"/api/boards/{board_id}/history?limit=500").json()
+    versions = [item["version"] for item in history]
+    assert max(versions) == 30
+    assert min(versions) == 20
+    assert {item["version"] for item in history if item["kind"] == "snapshot"} == {20, 25, 30}
+
+    resp = client.post(f"/api/boards/{board_id}/revert/23")
+    assert resp.json()["board_json"]["cards"]["card-1"]["title"] == "Version 23"
+    assert client.post(f"/api/boards/{board_id}/revert/5").status_code == 404
+
+
+def test_history_of_other_users_board_is_hidden(client) -> None:
+    login_default_user(client)
+    board_id = default_board_id(client)
+    client.post("/api/auth/logout")
+    client.post(
+        "/api/auth/register",
+        json={"username": "intruder", "password": "pass1234", "display_name": ""},
+    )
+    assert client.get(f"/api/boards/{board_id}/history").status_code == 404
+    assert client.post(f"/api/boards/{board_id}/revert/1").status_code == 404
+
+
+@pytest.mark.parametrize("version", [0, 99])
+def test_revert_to_unknown_version_returns_404(client, version) -> None:
+    login_default_user(client)
+    board_id = default_board_id(client)
+    assert client.post(f"/api/boards/{board_id}/revert/{version}").status_code == 404
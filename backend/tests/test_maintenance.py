@@ -0,0 +1,65 @@
+import sqlite3
+import time
+
+from app.db import create_board, delete_board, get_db_path, get_user_by_username
+from app.maintenance import MaintenanceScheduler, convert_to_incremental, run_maintenance, storage_stats
+from app.metrics import metrics
+
+
+def fill_and_delete_boards(user_id: int, count: int = 20) -> None:
+    big = {
+        "columns": [{"id": "col-a", "title": "A", "cardIds": ["card-1"]}],
+        "cards": {"card-1": {"id": "card-1", "title": "Big", "details": "x" * 200_000}},
+    }
+    board_ids = [create_board(user_id, f"Big {index}", big)["id"] for index in range(count)]
+    for board_id in board_ids:
+        delete_board(board_id, user_id)
+
+
+def test_maintenance_returns_free_pages_and_reports_storage(client) -> None:
+    path = get_db_path()
+    assert storage_stats(path)["incremental_vacuum"]
+    fill_and_delete_boards(get_user_by_username("user")["id"])
+    with sqlite3.connect(path) as connection:
+        connection.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    before = storage_stats(path)
+    assert before["free_page_ratio"] > 0.5
+
+    freed = run_maintenance()
+    after = storage_stats(path)
+    assert freed[path.name] >= before["free_pages"] - 1
+    assert after["free_pages"] <= 1
+    assert after["size_bytes"] < before["size_bytes"] / 2
+    assert after["wal_bytes"] == 0
+
+    snapshot = client.get("/api/metrics").json()
+    assert snapshot["gauges"]["db_storage"][path.name]["free_pages"] <= 1
+    assert snapshot["counters"]["maintenance_pages_vacuumed_total"] == freed[path.name]
+    assert snapshot["summaries"]["maintenance_step_seconds"]["max"] < 0.5
+
+
+def test_maintenance_stops_when_traffic_returns(client, monkeypatch) -> None:
+    fill_and_delete_boards(get_user_by_username("user")["id"], count=5)
+    monkeypatch.setenv("PM_VACUUM_PAGES_PER_STEP", "4")
+    steps = iter([True, True, True])
+    run_maintenance(keep_going=lambda: next(steps, False))
+    assert storage_stats(get_db_path())["free_pages"] > 0
+
+    scheduler = MaintenanceScheduler()
+    client.get("/api/health")
+    assert not scheduler.is_quiet()
+    metrics.set("http_last_request_timestamp", time.time() - scheduler.quiet_seconds - 1)
+    assert scheduler.is_quiet()
+
+
+def test_existing_databases_are_converted_once(tmp_path, monkeypatch) -> None:
+    path = tmp_path / "legacy.db"
+    with sqlite3.connect(path) as connection:
+        connection.execute("CREATE TABLE t (value BLOB)")
+        connection.execute("INSERT INTO t VALUES (randomblob(100000))")
+
+    monkeypatch.setenv("PM_VACUUM_CONVERT_MAX_BYTES", "1000")
+    assert not convert_to_incremental(path)
+    assert not storage_stats(path)["incremental_vacuum"]
+    assert convert_to_incremental(path, force=True)
+    assert storage_stats(path)["incremental_vacuum"]
@@ -55,6 +55,12 @@ def test_migration_from_old_schema(tmp_path, monkeypatch) -> None:
     assert len(boards) >= 1
     board_data = json.loads(boards[0]["board_json"])
     assert board_data["cards"]["card-1"]["title"] == "Migrated Title"
+
+    # Migrated boards get their current state as the base history snapshot
+    event = conn.execute(
+        "SELECT version, kind FROM board_events WHERE board_id = ?", (boards[0]["id"],)
+    ).fetchone()
+    assert (event["version"], event["kind"]) == (1, "snapshot")
     conn.close()
 
     # Verify login still works
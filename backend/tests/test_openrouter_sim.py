@@ -0,0 +1,119 @@
+import json
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+
+from app import ai_client
+from app.ai_client import CircuitBreaker, OpenRouterRequestError, query_openrouter
+from app.metrics import metrics
+from app.openrouter_sim import OpenRouterSimulator, SimulatorConfig, board_action_reply
+from tests.conftest import login_default_user
+
+
+@pytest.fixture(autouse=True)
+def simulated_upstream(monkeypatch):
+    monkeypatch.setenv("OPENROUTER_API_KEY", "sim")
+    monkeypatch.setenv("OPENROUTER_BACKOFF_BASE_SECONDS", "0.001")
+    monkeypatch.setattr(ai_client, "circuit_breaker", CircuitBreaker(min_requests=100))
+    yield
+    ai_client.set_transport(None)
+
+
+def use_simulator(**options) -> OpenRouterSimulator:
+    simulator = OpenRouterSimulator(SimulatorConfig(**options))
+    ai_client.set_transport(simulator.transport())
+    return simulator
+
+
+def test_canned_responses_are_returned_in_turn() -> None:
+    use_simulator(responses=["first", "second"])
+    assert [query_openrouter("hi") for _ in range(3)] == ["first", "second", "first"]
+
+
+def test_base_url_is_configurable(monkeypatch) -> None:
+    monkeypatch.setenv("OPENROUTER_BASE_URL", "http://sim.local/api/v1/")
+    seen = []
+    simulator = OpenRouterSimulator(SimulatorConfig(responses=["ok"]))
+
+    def recording(request):
+        seen.append(str(request.url))
+        return simulator.handle(request)
+
+    ai_client.set_transport(httpx.MockTransport(recording))
+    assert query_openrouter("hi") == "ok"
+    assert seen == ["http://sim.local/api/v1/chat/completions"]
+
+
+def test_same_seed_gives_same_outcomes() -> None:
+    config = SimulatorConfig(latency="lognormal", latency_ms=50, error_rate=0.3, rate_limit_rate=0.2, seed=7)
+    runs = []
+    for _ in range(2):
+        simulator = OpenRouterSimulator(config)
+        runs.append([(reply.status_code, reply.delay) for reply in (simulator.plan({}) for _ in range(50))])
+    assert runs[0] == runs[1]
+    assert {status for status, _ in runs[0]} == {200, 429, 500}
+
+
+def test_rate_limits_drive_client_retries(monkeypatch) -> None:
+    monkeypatch.setenv("OPENROUTER_MAX_RETRIES", "2")
+    simulator = use_simulator(rate_limit_rate=1.0, retry_after_seconds=0)
+
+    with pytest.raises(OpenRouterRequestError, match="429"):
+        query_openrouter("hi")
+    assert simulator.stats["429"] == 3
+    assert metrics.snapshot()["counters"]["openrouter_retries_total"] == 2
+
+
+def test_board_action_reply_moves_first_card() -> None:
+    board = {
+        "columns": [
+            {"id": "a", "title": "A", "cardIds": []},
+            {"id": "b", "title": "B", "cardIds": ["card-1"]},
+            {"id": "c", "title": "C", "cardIds": []},
+        ],
+        "cards": {},
+    }
+    reply = json.loads(board_action_reply(f"...\nCurrent board JSON:\n{json.dumps(board)}\n\nmore"))
+    assert reply["operations"] == [
+        {"op": "move_card", "card_id": "card-1", "column_id": "c", "position": 0}
+    ]
+    assert board_action_reply("2+2") == "Simulated response."
+
+
+def test_board_action_end_to_end_against_simulator(client) -> None:
+    use_simulator()
+    login_default_user(client)
+
+    resp = client.post("/api/ai/board-action", json={"question": "Push something forward"})
+    assert resp.status_code == 200
+    data = resp.json()
+    assert data["operations_applied"] == 1
+    assert "card-1" in data["board"]["columns"][1]["cardIds"]
+
+
+def test_server_streams_chunks() -> None:
+    simulator = OpenRouterSimulator(SimulatorConfig(responses=["hello simulated world"], stream_chunks=4))
+    with TestClient(simulator.create_app()) as sim_client:
+        with sim_client.stream(
+            "POST", "/api/v1/chat/completions", json={"messages": [], "stream": True}
+        ) as resp:
+            events = [line.removeprefix("data: ") for line in resp.iter_lines() if line.startswith("data: ")]
+
+        assert events[-1] == "[DONE]"
+        pieces = [json.loads(event)["choices"][0]["delta"].get("content", "") for event in events[:-1]]
+        assert len(pieces) == 5
+        assert "".join(pieces) == "hello simulated world"
+
+        assert sim_client.post("/api/v1/chat/completions", json={"messages": []}).json()["choices"][0][
+            "message"
+        ]["content"] == "hello simulated world"
+        assert sim_client.get("/stats").json() == {"200": 2}
+
+
+def test_server_returns_rate_limit_headers() -> None:
+    simulator = OpenRouterSimulator(SimulatorConfig(rate_limit_rate=1.0, retry_after_seconds=3))
+    with TestClient(simulator.create_app()) as sim_client:
+        resp = sim_client.post("/api/v1/chat/completions", json={"messages": []})
+    assert resp.status_code == 429
+    assert resp.headers["retry-after"] == "3"
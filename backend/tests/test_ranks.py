@@ -0,0 +1,34 @@
+import random
+
+from app.ranks import MAX_RANK_LENGTH, rank_between, rerank, spread_ranks
+
+
+def test_rank_between_orders_and_stays_short_when_respread() -> None:
+    assert "0" < rank_between(None, None) < "z"
+    assert "a" < rank_between("a", "b") < "b"
+    assert rank_between("a", "a1") < "a1"
+
+    ranks = spread_ranks(10_000)
+    assert ranks == sorted(set(ranks))
+    assert max(len(rank) for rank in ranks) == 3
+
+    high = None
+    for _ in range(200):
+        high = rank_between(None, high)
+    assert len(high) > MAX_RANK_LENGTH
+
+
+def test_rerank_keeps_the_longest_ordered_run() -> None:
+    old = spread_ranks(5)
+    # Moving the last card to the top should only rewrite that card.
+    moved = [old[4], *old[:4]]
+    new = rerank(moved)
+    assert new == sorted(new)
+    assert new[1:] == old[:4]
+
+    rng = random.Random(7)
+    for _ in range(100):
+        ranks: list[str | None] = [rank if rng.random() < 0.8 else None for rank in spread_ranks(30)]
+        rng.shuffle(ranks)
+        new = rerank(ranks)
+        assert new == sorted(set(new))
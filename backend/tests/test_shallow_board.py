@@ -0,0 +1,99 @@
+from tests.conftest import login_default_user
+
+
+def big_board(cards_per_column: int) -> dict:
+    columns, cards = [], {}
+    for column_index in range(2):
+        column_id = f"col-{column_index}"
+        card_ids = [f"card-{column_index}-{index}" for index in range(cards_per_column)]
+        columns.append({"id": column_id, "title": f"Column {column_index}", "cardIds": card_ids})
+        for card_id in card_ids:
+            cards[card_id] = {
+                "id": card_id,
+                "title": f"Title {card_id}",
+                "details": "x" * 500,
+                "labels": [{"id": "l1", "text": "Ops", "color": "#00ff00"}],
+                "due_date": "2026-04-01",
+                "priority": "medium",
+            }
+    return {"columns": columns, "cards": cards}
+
+
+def test_shallow_fetch_returns_card_headers_per_column_page(client) -> None:
+    login_default_user(client)
+    board_id = client.get("/api/boards").json()[0]["id"]
+    client.put(f"/api/boards/{board_id}", json=big_board(120))
+
+    resp = client.get(f"/api/boards/{board_id}?shallow=true&limit=50")
+    assert resp.status_code == 200
+    shallow = resp.json()
+    assert shallow["shallow"] is True
+    assert shallow["version"] == 2
+    column = shallow["board_json"]["columns"][0]
+    assert column["cardIds"] == [f"card-0-{index}" for index in range(50)]
+    assert column["total"] == 120
+    assert column["next_cursor"] == "card-0-49"
+    assert len(shallow["board_json"]["cards"]) == 100
+    assert shallow["board_json"]["cards"]["card-0-0"] == {
+        "id": "card-0-0",
+        "title": "Title card-0-0",
+        "labels": [{"id": "l1", "text": "Ops", "color": "#00ff00"}],
+        "priority": "medium",
+        "due_date": "2026-04-01",
+    }
+    full = client.get(f"/api/boards/{board_id}")
+    assert len(resp.content) * 5 < len(full.content)
+
+
+def test_column_pages_follow_the_cursor_to_the_end(client) -> None:
+    login_default_user(client)
+    board_id = client.get("/api/boards").json()[0]["id"]
+    client.put(f"/api/boards/{board_id}", json=big_board(120))
+
+    seen, cursor = [], None
+    while True:
+        params = {"limit": 50} if cursor is None else {"limit": 50, "cursor": cursor}
+        page = client.get(f"/api/boards/{board_id}/columns/col-1/cards", params=params).json()
+        assert set(page["cards"]) == set(page["cardIds"])
+        seen += page["cardIds"]
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+    assert seen == [f"card-1-{index}" for index in range(120)]
+
+    stale = client.get(f"/api/boards/{board_id}/columns/col-1/cards?cursor=card-0-3")
+    assert stale.status_code == 409
+    assert client.get(f"/api/boards/{board_id}/columns/col-9/cards").status_code == 404
+
+
+def test_card_details_are_fetched_separately(client) -> None:
+    login_default_user(client)
+    board = client.get("/api/boards").json()[0]
+    card = client.get(f"/api/boards/{board['id']}/cards/card-1").json()
+    assert card["details"].startswith("Draft quarterly themes")
+
+    # Default cards have no priority stored; headers fill it in.
+    shallow = client.get(f"/api/boards/{board['id']}?shallow=true").json()
+    assert shallow["board_json"]["cards"]["card-1"]["priority"] == "none"
+    assert shallow["board_json"]["cards"]["card-1"]["labels"] == []
+
+    assert client.get(f"/api/boards/{board['id']}/cards/card-missing").status_code == 404
+    assert client.get("/api/boards/board-missing/cards/card-1").status_code == 404
+
+    client.post("/api/auth/logout")
+    client.post("/api/auth/register", json={"username": "other", "password": "password123"})
+    client.post("/api/auth/login", json={"username": "other", "password": "password123"})
+    assert client.get(f"/api/boards/{board['id']}/cards/card-1").status_code == 404
+    assert client.get(f"/api/boards/{board['id']}?shallow=true").status_code == 404
+
+
+def test_shallow_fetch_sees_buffered_saves(client, monkeypatch) -> None:
+    monkeypatch.setenv("PM_WRITE_COALESCE_MS", "60000")
+    login_default_user(client)
+    board_id = client.get("/api/boards").json()[0]["id"]
+    client.put(f"/api/boards/{board_id}", json=big_board(3))
+
+    shallow = client.get(f"/api/boards/{board_id}?shallow=true").json()
+    assert shallow["board_json"]["columns"][0]["cardIds"] == ["card-0-0", "card-0-1", "card-0-2"]
+    assert shallow["board_json"]["cards"]["card-0-0"]["title"] == "Title card-0-0"
+    assert client.get(f"/api/boards/{board_id}/cards/card-1-2").json()["details"] == "x" * 500
@@ -0,0 +1,166 @@
+import sqlite3
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.db import (
+    clear_shard_cache,
+    get_db_path,
+    get_shard_path,
+    get_user_by_username,
+    init_db,
+    shard_for_user,
+)
+from app.main import create_app
+from app.shards import main as shards_main
+from app.shards import move_user, plan_moves, rebalance
+from tests.conftest import login_default_user, register_and_login
+
+
+@pytest.fixture(autouse=True)
+def fresh_shard_cache():
+    clear_shard_cache()
+    yield
+    clear_shard_cache()
+
+
+def count_boards(path, user_id: int | None = None) -> int:
+    connection = sqlite3.connect(path)
+    try:
+        if user_id is None:
+            return connection.execute("SELECT COUNT(*) FROM boards").fetchone()[0]
+        return connection.execute(
+            "SELECT COUNT(*) FROM boards WHERE user_id = ?", (user_id,)
+        ).fetchone()[0]
+    finally:
+        connection.close()
+
+
+def make_users(client, count: int) -> dict[str, int]:
+    ids = {}
+    for index in range(count):
+        register_and_login(client, username=f"tenant{index}", password="tenantpass123")
+        ids[f"tenant{index}"] = get_user_by_username(f"tenant{index}")["id"]
+        client.put("/api/board", json=client.get("/api/board").json())
+        client.post("/api/boards", json={"name": "Second"})
+        client.post("/api/auth/logout")
+    return ids
+
+
+def login(client, username: str) -> None:
+    resp = client.post("/api/auth/login", json={"username": username, "password": "tenantpass123"})
+    assert resp.status_code == 200
+
+
+def test_shard_for_user_is_stable_and_spread() -> None:
+    assert shard_for_user(42, 8) == shard_for_user(42, 8)
+    assert len({shard_for_user(user_id, 8) for user_id in range(1, 200)}) == 8
+
+
+def test_sharded_mode_keeps_boards_out_of_central_db(monkeypatch) -> None:
+    monkeypatch.setenv("PM_DB_SHARDS", "4")
+    with TestClient(create_app()) as client:
+        ids = make_users(client, 6)
+        login_default_user(client)
+        assert client.get("/api/board").status_code == 200
+
+        assert count_boards(get_db_path()) == 0
+        for user_id in ids.values():
+            shard = shard_for_user(user_id, 4)
+            assert count_boards(get_shard_path(shard), user_id) == 2
+
+        login(client, "tenant3")
+        boards = client.get("/api/boards").json()
+        assert [board["name"] for board in boards] == ["My Board", "Second"]
+        history = client.get(f"/api/boards/{boards[0]['id']}/history").json()
+        assert len(history) == 2
+
+
+def test_rebalance_moves_users_between_layouts(monkeypatch, capsys) -> None:
+    with TestClient(create_app()) as client:
+        ids = make_users(client, 5)
+    assert count_boards(get_db_path()) == 11
+
+    monkeypatch.setenv("PM_DB_SHARDS", "3")
+    assert len(plan_moves()) == 6
+    moves = rebalance()
+    assert sum(move["boards"] for move in moves) == 11
+    assert count_boards(get_db_path()) == 0
+    assert plan_moves() == []
+
+    monkeypatch.setenv("PM_DB_SHARDS", "2")
+    shards_main(["rebalance"])
+    assert "users" in capsys.readouterr().out
+    for user_id in ids.values():
+        assert count_boards(get_shard_path(shard_for_user(user_id, 2)), user_id) == 2
+
+    with TestClient(create_app()) as client:
+        login(client, "tenant4")
+        boards = client.get("/api/boards").json()
+        assert len(boards) == 2
+        assert len(client.get(f"/api/boards/{boards[0]['id']}/history").json()) == 2
+
+    monkeypatch.setenv("PM_DB_SHARDS", "0")
+    rebalance()
+    assert count_boards(get_db_path()) == 11
+
+
+def test_schema_upgrades_run_on_every_shard(monkeypatch) -> None:
+    monkeypatch.setenv("PM_DB_SHARDS", "2")
+    create_app()
+    shard_path = get_shard_path(1)
+    connection = sqlite3.connect(shard_path)
+    connection.execute("DROP TABLE board_events")
+    connection.commit()
+    connection.close()
+
+    create_app()
+    connection = sqlite3.connect(shard_path)
+    try:
+        tables = {row[0] for row in connection.execute("SELECT name FROM sqlite_master WHERE type='table'")}
+        columns = {row[1] for row in connection.execute("PRAGMA table_info(boards)")}
+    finally:
+        connection.close()
+    assert "board_events" in tables
+    assert "version" in columns
+
+
+def test_rebalance_finishes_a_move_interrupted_after_the_copy(monkeypatch) -> None:
+    with TestClient(create_app()) as client:
+        ids = make_users(client, 1)
+        login(client, "tenant0")
+        board_id = client.get("/api/boards").json()[0]["id"]
+        assert client.post("/api/templates", json={"name": "Mine", "board_id": board_id}).status_code == 201
+        client.post("/api/ai/board-action?async=1", json={"question": "Hi"})
+    user_id = ids["tenant0"]
+
+    monkeypatch.setenv("PM_DB_SHARDS", "2")
+    init_db()
+    [(moving, source, target)] = [move for move in plan_moves() if move[0] == user_id]
+
+    def crash():
+        raise RuntimeError("killed after the target commit")
+
+    # The copy commits on the target; repointing user_shards never happens.
+    with monkeypatch.context() as patched:
+        patched.setattr("app.shards.get_connection", crash)
+        with pytest.raises(RuntimeError):
+            move_user(moving, source, target)
+
+    rebalance()
+    assert plan_moves() == []
+    target_path = get_shard_path(target)
+    assert count_boards(target_path, user_id) == 2
+    assert count_boards(get_db_path(), user_id) == 0
+    connection = sqlite3.connect(target_path)
+    try:
+        templates = connection.execute(
+            "SELECT COUNT(*) FROM board_templates WHERE user_id = ?", (user_id,)
+        ).fetchone()[0]
+    finally:
+        connection.close()
+    assert templates == 1
+
+    with TestClient(create_app()) as client:
+        login(client, "tenant0")
+        assert "Mine" in [template["name"] for template in client.get("/api/templates").json()]
@@ -0,0 +1,46 @@
+from benchmarks.startup import cold_start, import_times
+
+# Generous enough for a loaded CI machine; importing used to take well over
+# a second because it built the app, and cold start also paid for bcrypt.
+IMPORT_BUDGET_SECONDS = 2.0
+COLD_START_BUDGET_SECONDS = 5.0
+
+# Loaded by create_app, never by importing app.main.
+DEFERRED_MODULES = [
+    "app.ai_jobs",
+    "app.archive",
+    "app.backup",
+    "app.compression",
+    "app.health_checks",
+    "app.maintenance",
+    "app.routers",
+    "app.routers.ai",
+    "app.static_files",
+    "app.write_behind",
+    "bcrypt",
+    "httpx",
+]
+
+
+def test_importing_main_defers_the_app_and_heavy_modules() -> None:
+    times = import_times("app.main")
+    assert times["app.main"] < IMPORT_BUDGET_SECONDS
+    assert [module for module in DEFERRED_MODULES if module in times] == []
+    # A submodule import should not drag in FastAPI through app/__init__.
+    assert "fastapi" not in import_times("app.db")
+
+
+def test_cold_start_to_first_response() -> None:
+    assert cold_start() < COLD_START_BUDGET_SECONDS
+
+
+def test_app_is_created_on_first_access(tmp_path) -> None:
+    import app.main
+
+    assert "app" not in vars(app.main)
+    try:
+        application = app.main.app
+        assert app.main.app is application
+        assert (tmp_path / "pm.db").exists()
+    finally:
+        del app.main.app
@@ -0,0 +1,112 @@
+import gzip
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.static_files import (
+    IMMUTABLE_CACHE_CONTROL,
+    PrecompressedStaticFiles,
+    precompress_directory,
+)
+
+BUNDLE = b"console.log('kanban');\n" * 400
+
+
+@pytest.fixture
+def site_dir(tmp_path):
+    site = tmp_path / "site"
+    (site / "_next" / "static" / "chunks").mkdir(parents=True)
+    (site / "_next" / "static" / "chunks" / "main-abc123.js").write_bytes(BUNDLE)
+    (site / "index.html").write_text("<html><body>" + "board " * 200 + "</body></html>")
+    (site / "tiny.txt").write_text("hi")
+    return site
+
+
+def make_client(site_dir) -> TestClient:
+    application = FastAPI()
+    application.mount("/", PrecompressedStaticFiles(directory=site_dir, html=True))
+    return TestClient(application)
+
+
+def test_hashed_assets_are_immutable_and_compressed(site_dir) -> None:
+    client = make_client(site_dir)
+    resp = client.get(
+        "/_next/static/chunks/main-abc123.js",
+        headers={"Accept-Encoding": "gzip"},
+    )
+    assert resp.status_code == 200
+    assert resp.headers["content-encoding"] == "gzip"
+    assert resp.headers["cache-control"] == IMMUTABLE_CACHE_CONTROL
+    assert resp.headers["vary"] == "Accept-Encoding"
+    assert resp.headers["etag"].endswith('-gzip"')
+    assert not resp.headers["etag"].startswith("W/")
+    assert int(resp.headers["content-length"]) < len(BUNDLE)
+    assert resp.content == BUNDLE
+
+
+def test_identity_when_client_does_not_accept_encoding(site_dir) -> None:
+    client = make_client(site_dir)
+    resp = client.get(
+        "/_next/static/chunks/main-abc123.js",
+        headers={"Accept-Encoding": "identity"},
+    )
+    assert resp.status_code == 200
+    assert "content-encoding" not in resp.headers
+    assert resp.content == BUNDLE
+
+
+def test_html_is_revalidated_and_supports_etag(site_dir) -> None:
+    client = make_client(site_dir)
+    resp = client.get("/", headers={"Accept-Encoding": "gzip"})
+    assert resp.status_code == 200
+    assert resp.headers["cache-control"] == "no-cache"
+
+    cached = client.get(
+        "/",
+        headers={"Accept-Encoding": "gzip", "If-None-Match": resp.headers["etag"]},
+    )
+    assert cached.status_code == 304
+
+
+def test_small_files_are_not_compressed(site_dir) -> None:
+    client = make_client(site_dir)
+    resp = client.get("/tiny.txt", headers={"Accept-Encoding": "gzip"})
+    assert resp.status_code == 200
+    assert "content-encoding" not in resp.headers
+    assert resp.text == "hi"
+
+
+def test_changed_file_is_reloaded(site_dir) -> None:
+    client = make_client(site_dir)
+    first = client.get("/tiny.txt")
+    (site_dir / "tiny.txt").write_text("hello again")
+    second = client.get("/tiny.txt")
+    assert second.text == "hello again"
+    assert second.headers["etag"] != first.headers["etag"]
+
+
+def test_build_time_precompressed_siblings_are_used(site_dir) -> None:
+    assert precompress_directory(site_dir) >= 2
+    sibling = site_dir / "_next" / "static" / "chunks" / "main-abc123.js.gz"
+    assert gzip.decompress(sibling.read_bytes()) == BUNDLE
+
+    client = make_client(site_dir)
+    resp = client.get(
+        "/_next/static/chunks/main-abc123.js",
+        headers={"Accept-Encoding": "gzip"},
+    )
+    assert resp.headers["content-encoding"] == "gzip"
+    assert resp.content == BUNDLE
+
+
+def test_brotli_preferred_when_available(site_dir) -> None:
+    pytest.importorskip("brotli")
+    client = make_client(site_dir)
+    resp = client.get(
+        "/_next/static/chunks/main-abc123.js",
+        headers={"Accept-Encoding": "gzip, br"},
+    )
+    assert resp.headers["content-encoding"] == "br"
+    # httpx decodes brotli transparently once the brotli package is installed.
+    assert resp.content == BUNDLE
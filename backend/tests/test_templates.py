@@ -0,0 +1,84 @@
+from app.board_defaults import DEFAULT_BOARD
+from app.db import get_board_connection, get_user_by_username
+from tests.conftest import login_default_user, register_and_login
+
+
+def stored_row(board_id: str) -> dict:
+    user_id = get_user_by_username("user")["id"]
+    with get_board_connection(user_id) as connection:
+        row = connection.execute(
+            "SELECT board_json, template_id, version FROM boards WHERE id = ?", (board_id,)
+        ).fetchone()
+        events = connection.execute(
+            "SELECT COUNT(*) AS cnt FROM board_events WHERE board_id = ?", (board_id,)
+        ).fetchone()["cnt"]
+    return {**dict(row), "events": events}
+
+
+def test_new_boards_reference_the_default_template_until_written(client) -> None:
+    login_default_user(client)
+    board = client.get("/api/boards").json()[0]
+    assert stored_row(board["id"]) == {
+        "board_json": "null",
+        "template_id": "template-default",
+        "version": 1,
+        "events": 0,
+    }
+    assert client.get("/api/board").json() == DEFAULT_BOARD
+    assert client.get(f"/api/boards/{board['id']}/history").json()[0]["version"] == 1
+    assert client.get(f"/api/boards/{board['id']}/cards/card-1").json()["title"] == "Align roadmap themes"
+
+    current = client.get("/api/board").json()
+    current["columns"][0]["title"] = "Ideas"
+    client.put("/api/board", json=current)
+
+    row = stored_row(board["id"])
+    assert row["template_id"] is None
+    assert row["version"] == 2
+    assert row["events"] == 2
+    assert client.post(f"/api/boards/{board['id']}/revert/1").json()["board_json"] == DEFAULT_BOARD
+    # The template itself is untouched by writes to boards made from it.
+    created = client.post("/api/boards", json={"name": "Fresh"}).json()
+    assert created["board_json"] == DEFAULT_BOARD
+
+
+def test_user_templates_stamp_out_boards(client) -> None:
+    login_default_user(client)
+    source = client.get("/api/board").json()
+    source["columns"] = source["columns"][:2]
+    client.put("/api/board", json=source)
+    board_id = client.get("/api/boards").json()[0]["id"]
+
+    template = client.post("/api/templates", json={"name": "Two columns", "board_id": board_id})
+    assert template.status_code == 201
+    template_id = template.json()["id"]
+    assert [(t["name"], t["builtin"]) for t in client.get("/api/templates").json()] == [
+        ("Default", True),
+        ("Two columns", False),
+    ]
+
+    created = client.post(f"/api/boards?template={template_id}", json={"name": "Sprint 2"})
+    assert created.status_code == 201
+    assert len(created.json()["board_json"]["columns"]) == 2
+    assert stored_row(created.json()["id"])["template_id"] == template_id
+    assert client.get("/api/dashboard").json()["columns"]["Backlog"] == 4
+    assert client.post("/api/boards?template=template-missing", json={"name": "X"}).status_code == 404
+    assert client.post("/api/templates", json={"name": "Both"}).status_code == 422
+
+    # Deleting the template hands its boards their own copy first.
+    assert client.delete(f"/api/templates/{template_id}").status_code == 200
+    assert stored_row(created.json()["id"])["template_id"] is None
+    assert len(client.get(f"/api/boards/{created.json()['id']}").json()["board_json"]["columns"]) == 2
+    assert client.delete("/api/templates/template-default").status_code == 404
+
+
+def test_templates_are_private_to_their_owner(client) -> None:
+    login_default_user(client)
+    board = client.get("/api/board").json()
+    template_id = client.post("/api/templates", json={"name": "Mine", "board_json": board}).json()["id"]
+
+    client.post("/api/auth/logout")
+    register_and_login(client)
+    assert [t["id"] for t in client.get("/api/templates").json()] == ["template-default"]
+    assert client.post(f"/api/boards?template={template_id}", json={"name": "X"}).status_code == 404
+    assert client.delete(f"/api/templates/{template_id}").status_code == 404
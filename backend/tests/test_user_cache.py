@@ -0,0 +1,100 @@
+import sqlite3
+
+import pytest
+
+from app import db
+from app.db import (
+    create_user,
+    get_db_path,
+    get_user_by_id,
+    get_user_by_username,
+    update_user_display_name,
+)
+from tests.conftest import login_default_user
+
+
+@pytest.fixture
+def no_db(monkeypatch):
+    """Make any further central-database access fail."""
+
+    def block() -> None:
+        def refuse(*_args, **_kwargs):
+            raise AssertionError("unexpected database access")
+
+        monkeypatch.setenv("PM_USER_CACHE_CHECK_MS", "600000")
+        monkeypatch.setattr(db, "get_connection", refuse)
+
+    return block
+
+
+def test_repeat_lookups_and_unknown_usernames_skip_sqlite(client, no_db) -> None:
+    login_default_user(client)
+    assert get_user_by_username("nobody") is None
+    no_db()
+
+    user = get_user_by_username("user")
+    assert user["display_name"] == "Default User"
+    assert get_user_by_id(user["id"])["username"] == "user"
+    assert "password_hash" not in get_user_by_id(user["id"])
+    assert get_user_by_username("nobody") is None
+    resp = client.post("/api/auth/login", json={"username": "nobody", "password": "password"})
+    assert resp.status_code == 401
+
+
+def test_writes_update_the_cache(client, no_db) -> None:
+    assert get_user_by_username("newbie") is None
+    created = create_user("newbie", "!", "New")
+    renamed = update_user_display_name(created["id"], "Renamed")
+    assert renamed == {"id": created["id"], "username": "newbie", "display_name": "Renamed"}
+    no_db()
+    assert get_user_by_username("newbie")["display_name"] == "Renamed"
+
+
+def test_password_change_is_seen_by_login(client) -> None:
+    login_default_user(client)
+    resp = client.put(
+        "/api/auth/password",
+        json={"current_password": "password", "new_password": "changed-pw"},
+    )
+    assert resp.status_code == 200
+    assert client.post("/api/auth/login", json={"username": "user", "password": "password"}).status_code == 401
+    assert client.post("/api/auth/login", json={"username": "user", "password": "changed-pw"}).status_code == 200
+
+
+def test_changes_from_another_process_invalidate_the_cache(client, monkeypatch) -> None:
+    monkeypatch.setenv("PM_USER_CACHE_CHECK_MS", "0")
+    user_id = get_user_by_username("user")["id"]
+    assert get_user_by_username("elsewhere") is None
+
+    # Another worker writes straight to the database, bypassing this cache.
+    with sqlite3.connect(get_db_path()) as other:
+        other.execute("UPDATE users SET display_name = 'Other' WHERE id = ?", (user_id,))
+        other.execute("INSERT INTO users (username, password_hash) VALUES ('elsewhere', '!')")
+
+    assert get_user_by_id(user_id)["display_name"] == "Other"
+    assert get_user_by_username("elsewhere")["username"] == "elsewhere"
+
+
+def test_cache_is_bounded(client, monkeypatch) -> None:
+    monkeypatch.setenv("PM_USER_CACHE_SIZE", "3")
+    for index in range(10):
+        create_user(f"bounded{index}", "!")
+        get_user_by_username(f"missing{index}")
+    assert len(db._user_cache._by_id) <= 3
+    assert len(db._user_cache._by_username) <= 3
+    assert get_user_by_username("bounded0")["username"] == "bounded0"
+
+
+def test_register_race_returns_409_and_forgets_the_free_name(client, monkeypatch) -> None:
+    monkeypatch.setenv("PM_USER_CACHE_CHECK_MS", "600000")
+    assert get_user_by_username("racer") is None
+    # Another process registers the name while this one still caches it as free.
+    other = sqlite3.connect(get_db_path())
+    other.execute("INSERT INTO users (username, password_hash, display_name) VALUES ('racer', '!', 'Other')")
+    other.commit()
+    other.close()
+
+    resp = client.post("/api/auth/register", json={"username": "racer", "password": "racerpass123"})
+    assert resp.status_code == 409
+    assert resp.json()["detail"] == "Username already taken"
+    assert get_user_by_username("racer")["display_name"] == "Other"
@@ -0,0 +1,171 @@
+import asyncio
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.board_records import BoardRecord
+from app.db import get_board, get_user_by_username
+from app.main import create_app
+from app.metrics import metrics
+from app.write_behind import BOARD_LOCK_STRIPES, WriteBehindBuffer, write_buffer
+from tests.conftest import login_default_user, register_and_login
+
+
+@pytest.fixture
+def buffered(monkeypatch):
+    def start(window_ms: int = 200) -> TestClient:
+        monkeypatch.setenv("PM_WRITE_COALESCE_MS", str(window_ms))
+        return TestClient(create_app())
+
+    yield start
+    write_buffer.flush_all()
+
+
+def renamed(board: dict, title: str) -> dict:
+    columns = [dict(column) for column in board["columns"]]
+    columns[0]["title"] = title
+    return {**board, "columns": columns}
+
+
+def stored_board(board_id: str) -> dict:
+    return get_board(board_id, get_user_by_username("user")["id"])
+
+
+def test_rapid_puts_are_coalesced_into_one_write(buffered) -> None:
+    with buffered(200) as client:
+        login_default_user(client)
+        board = client.get("/api/boards").json()[0]
+        base = client.get(f"/api/boards/{board['id']}").json()
+
+        for index in range(10):
+            resp = client.put(f"/api/boards/{board['id']}", json=renamed(base["board_json"], f"T{index}"))
+            assert resp.status_code == 200
+            assert resp.json()["pending"] is True
+
+        # Read-your-writes before anything is persisted.
+        assert client.get(f"/api/boards/{board['id']}").json()["board_json"]["columns"][0]["title"] == "T9"
+        assert client.get("/api/board").json()["columns"][0]["title"] == "T9"
+        assert stored_board(board["id"])["version"] == 1
+
+        deadline = time.monotonic() + 3
+        while stored_board(board["id"])["version"] == 1 and time.monotonic() < deadline:
+            time.sleep(0.05)
+
+        stored = stored_board(board["id"])
+        assert stored["version"] == 2
+        assert stored["board_json"]["columns"][0]["title"] == "T9"
+    counters = metrics.snapshot()["counters"]
+    assert counters["board_writes_buffered_total"] == 1
+    assert counters["board_writes_coalesced_total"] == 9
+
+
+def test_pending_writes_are_flushed_on_shutdown(buffered) -> None:
+    with buffered(60_000) as client:
+        login_default_user(client)
+        board = client.get("/api/boards").json()[0]
+        client.put("/api/board", json=renamed(client.get("/api/board").json(), "Saved on exit"))
+        assert stored_board(board["id"])["version"] == 1
+
+    assert stored_board(board["id"])["board_json"]["columns"][0]["title"] == "Saved on exit"
+
+
+def test_durable_writes_bypass_the_buffer(buffered, monkeypatch) -> None:
+    with buffered(60_000) as client:
+        login_default_user(client)
+        board = client.get("/api/boards").json()[0]
+        current = client.get("/api/board").json()
+
+        client.put("/api/board", json=renamed(current, "Buffered"))
+        resp = client.put(f"/api/boards/{board['id']}?durable=true", json=renamed(current, "Durable"))
+        assert "pending" not in resp.json()
+        assert stored_board(board["id"])["board_json"]["columns"][0]["title"] == "Durable"
+        # The durable write superseded the buffered one.
+        assert write_buffer.pending_board(board["id"]) is None
+
+        monkeypatch.setenv("PM_WRITE_DURABILITY", "strict")
+        client.put("/api/board", json=renamed(current, "Strict"))
+        assert stored_board(board["id"])["board_json"]["columns"][0]["title"] == "Strict"
+
+
+def test_history_and_ai_see_buffered_saves(buffered, monkeypatch) -> None:
+    prompts = []
+
+    def fake_query(prompt):
+        prompts.append(prompt)
+        return '{"assistant_response":"ok","operations":[]}'
+
+    monkeypatch.setattr("app.routers.ai.query_openrouter", fake_query)
+    with buffered(60_000) as client:
+        login_default_user(client)
+        board = client.get("/api/boards").json()[0]
+        current = client.get("/api/board").json()
+
+        client.put("/api/board", json=renamed(current, "Before history"))
+        history = client.get(f"/api/boards/{board['id']}/history").json()
+        assert history[0]["version"] == 2
+
+        client.put("/api/board", json=renamed(current, "Before AI"))
+        client.post("/api/ai/board-action", json={"question": "Hi"})
+        assert '"title": "Before AI"' in prompts[0]
+        assert stored_board(board["id"])["version"] == 3
+
+
+def test_other_users_requests_do_not_flush_a_pending_write(buffered) -> None:
+    with buffered(60_000) as client:
+        login_default_user(client)
+        board = client.get("/api/boards").json()[0]
+        client.put("/api/board", json=renamed(client.get("/api/board").json(), "Still pending"))
+        card_id = next(iter(client.get("/api/board").json()["cards"]))
+        client.post("/api/auth/logout")
+
+        register_and_login(client, username="intruder", password="intruder123")
+        board_url = f"/api/boards/{board['id']}"
+        assert client.get(f"{board_url}/history").status_code == 404
+        assert client.post(f"{board_url}/archive", json={"card_ids": [card_id]}).status_code == 404
+        assert client.post(f"{board_url}/archive/{card_id}/restore").status_code == 404
+        assert client.post(f"{board_url}/cards/{card_id}/move", json={"column_id": "col-todo"}).status_code == 404
+        assert client.post(f"{board_url}/revert/1").status_code == 404
+
+        assert stored_board(board["id"])["version"] == 1
+        assert write_buffer.pending_board(board["id"]) is not None
+
+
+def test_board_locks_do_not_grow_with_boards() -> None:
+    buffer = WriteBehindBuffer()
+    for index in range(1000):
+        buffer.flush_board(f"board-{index}")
+    assert len(buffer._board_locks) == BOARD_LOCK_STRIPES
+
+
+def test_buffered_boards_are_converted_off_the_event_loop(buffered, monkeypatch) -> None:
+    on_loop = []
+
+    def note_thread() -> None:
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            on_loop.append(False)
+        else:
+            on_loop.append(True)
+    from_json, to_json = BoardRecord.from_json.__func__, BoardRecord.to_json
+
+    def tracking_from_json(cls, board_json):
+        note_thread()
+        return from_json(cls, board_json)
+
+    def tracking_to_json(self):
+        note_thread()
+        return to_json(self)
+
+    monkeypatch.setattr(BoardRecord, "from_json", classmethod(tracking_from_json))
+    monkeypatch.setattr(BoardRecord, "to_json", tracking_to_json)
+    with buffered(60_000) as client:
+        login_default_user(client)
+        board = client.get("/api/boards").json()[0]
+        client.put("/api/board", json=renamed(client.get("/api/board").json(), "Buffered"))
+        assert client.get(f"/api/boards/{board['id']}").json()["board_json"]["columns"][0]["title"] == "Buffered"
+        assert client.get(f"/api/boards/{board['id']}?shallow=true").status_code == 200
+
+    assert len(on_loop) >= 3
+    assert not any(on_loop)